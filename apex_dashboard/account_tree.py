@@ -0,0 +1,157 @@
+"""
+Chart-of-accounts index for Apex Dashboard
+Caches each company's Account tree (nested-set intervals, leaf lists per
+node, parent names, currencies) so dashboards expand subtrees and read
+account metadata without querying the Account table on every request.
+"""
+
+import frappe
+
+ACCOUNT_TREE_TTL = 24 * 60 * 60
+
+ACCOUNT_FIELDS = [
+    "name",
+    "account_name",
+    "company",
+    "parent_account",
+    "lft",
+    "rgt",
+    "is_group",
+    "account_currency",
+    "account_type",
+    "root_type",
+    "report_type",
+    "disabled",
+]
+
+def get_account_tree(company):
+    """
+    Get the cached Account tree of a company
+    Args:
+        company: Company name
+    Returns:
+        dict: accounts (name -> account fields, in lft order) and
+            leaves (group name -> ledger names of its subtree)
+    """
+    trees = _get_request_trees()
+    if company in trees:
+        return trees[company]
+
+    cache_key = _account_tree_key(company)
+    tree = frappe.cache().get_value(cache_key)
+    if tree is None:
+        tree = build_account_tree(company)
+        frappe.cache().set_value(cache_key, tree, expires_in_sec=ACCOUNT_TREE_TTL)
+
+    trees[company] = tree
+    return tree
+
+def build_account_tree(company):
+    """Build the Account tree of a company with one query (uncached)"""
+    accounts = frappe.get_all(
+        "Account",
+        filters={"company": company},
+        fields=ACCOUNT_FIELDS,
+        order_by="lft asc",
+    )
+
+    # Walk in lft order keeping the open ancestors on a stack
+    leaves = {}
+    stack = []
+    for account in accounts:
+        while stack and stack[-1].rgt < account.lft:
+            stack.pop()
+
+        if account.is_group:
+            leaves[account.name] = []
+            stack.append(account)
+        else:
+            for ancestor in stack:
+                leaves[ancestor.name].append(account.name)
+
+    return {
+        "accounts": {account.name: account for account in accounts},
+        "leaves": leaves,
+    }
+
+def get_account(account, company=None):
+    """Get the cached fields of an account (see ACCOUNT_FIELDS), or None"""
+    company = company or frappe.get_cached_value("Account", account, "company")
+    if not company:
+        return None
+    return get_account_tree(company)["accounts"].get(account)
+
+def get_leaf_accounts(account, company=None):
+    """
+    Get the ledger accounts of a subtree
+    Args:
+        account: Account name, ledger or group
+        company: Company of the account (looked up when omitted)
+    Returns:
+        list: Ledger names; [account] for a ledger, [] for an unknown account
+    """
+    company = company or frappe.get_cached_value("Account", account, "company")
+    if not company:
+        return []
+
+    tree = get_account_tree(company)
+    if account in tree["leaves"]:
+        return list(tree["leaves"][account])
+    if account in tree["accounts"]:
+        return [account]
+    return []
+
+def get_descendants(account, company, is_group=None):
+    """
+    Get the accounts strictly below an account
+    Args:
+        account: Parent account name
+        company: Company name
+        is_group: Filter by is_group (0 = ledgers, 1 = groups, None = both)
+    Returns:
+        list: Account field dicts in lft order
+    """
+    accounts = get_account_tree(company)["accounts"]
+    parent = accounts.get(account)
+    if not parent:
+        return []
+
+    return [
+        acc for acc in accounts.values()
+        if parent.lft < acc.lft and acc.rgt < parent.rgt
+        and (is_group is None or acc.is_group == is_group)
+    ]
+
+def get_accounts(company, **filters):
+    """
+    Get the accounts of a company matching field filters
+    Values may be lists, meaning any of them, e.g.
+    get_accounts(company, account_type=["Bank", "Cash"], is_group=0)
+    """
+    def matches(account):
+        for field, value in filters.items():
+            if isinstance(value, (list, tuple, set)):
+                if account.get(field) not in value:
+                    return False
+            elif account.get(field) != value:
+                return False
+        return True
+
+    return [acc for acc in get_account_tree(company)["accounts"].values() if matches(acc)]
+
+def clear_account_tree(doc=None, method=None):
+    """
+    Drop the cached Account trees
+    Inserting an account renumbers the nested set across companies, so every
+    company's tree is dropped. This function is used as an Account hook.
+    """
+    frappe.cache().delete_keys("apex_dashboard:account_tree:")
+    _get_request_trees().clear()
+
+def _account_tree_key(company):
+    return f"apex_dashboard:account_tree:{company}"
+
+def _get_request_trees():
+    if not hasattr(frappe.local, "apex_dashboard_account_trees"):
+        frappe.local.apex_dashboard_account_trees = {}
+    return frappe.local.apex_dashboard_account_trees
@@ -0,0 +1,15 @@
+# Copyright (c) 2026, Gaber and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+
+
+class ApexEquityPartner(Document):
+	def validate(self):
+		for rule in self.rules:
+			if not rule.account and not (rule.account_name_contains or "").strip():
+				frappe.throw(_("Row {0}: set an Account or an Account Name Contains pattern").format(rule.idx))
+			if rule.account and frappe.get_cached_value("Account", rule.account, "root_type") != "Equity":
+				frappe.throw(_("Row {0}: {1} is not an Equity account").format(rule.idx, frappe.bold(rule.account)))
@@ -0,0 +1,18 @@
+# Copyright (c) 2026, Gaber and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class ApexGLMonthlyBalance(Document):
+	pass
+
+
+def on_doctype_update():
+	# One row per cell; apex_dashboard.gl_snapshot upserts against this key
+	frappe.db.add_unique(
+		"Apex GL Monthly Balance",
+		["company", "account", "account_currency", "month"],
+		constraint_name="unique_gl_monthly_balance",
+	)
@@ -0,0 +1,18 @@
+# Copyright (c) 2026, Gaber and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class ApexYearlyProfit(Document):
+	pass
+
+
+def on_doctype_update():
+	# One row per company and year; apex_dashboard.yearly_profits upserts against this key
+	frappe.db.add_unique(
+		"Apex Yearly Profit",
+		["company", "year"],
+		constraint_name="unique_yearly_profit",
+	)
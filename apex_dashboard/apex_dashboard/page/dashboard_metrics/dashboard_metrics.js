@@ -0,0 +1,233 @@
+frappe.pages['dashboard_metrics'].on_page_load = function (wrapper) {
+    new DashboardMetrics(wrapper);
+};
+
+// Per-endpoint timings, query counts and cache hit rates recorded by
+// apex_dashboard.metrics.instrument_endpoint
+class DashboardMetrics {
+    constructor(wrapper) {
+        this.wrapper = $(wrapper);
+        this.page = frappe.ui.make_app_page({
+            parent: wrapper,
+            title: __('Dashboard Metrics'),
+            single_column: true
+        });
+
+        this.page.add_field({
+            fieldname: 'window',
+            label: __('Window'),
+            fieldtype: 'Select',
+            options: [
+                { value: '900', label: __('Last 15 minutes') },
+                { value: '3600', label: __('Last hour') },
+                { value: '21600', label: __('Last 6 hours') },
+                { value: '86400', label: __('Last 24 hours') }
+            ],
+            default: '3600',
+            change: () => this.load_data()
+        });
+
+        this.page.set_primary_action(__('Refresh'), () => this.load_data(), 'refresh');
+        this.page.add_menu_item(__('Reset Metrics'), () => this.reset());
+        this.page.add_menu_item(__('Profile Dashboard Calls of a User'), () => this.enable_profiling());
+        this.page.add_menu_item(__('Stop Profiling a User'), () => this.disable_profiling());
+
+        this.container = $('<div class="dashboard-metrics" style="overflow-x: auto;"></div>').appendTo(this.page.body);
+        this.profiles = $('<div class="dashboard-profiles" style="overflow-x: auto; margin-top: 20px;"></div>').appendTo(this.page.body);
+        this.profiles.on('click', '.profile-timeline', (e) => this.show_profile($(e.currentTarget).attr('data-profile')));
+        this.load_data();
+    }
+
+    load_data() {
+        frappe.call({
+            method: 'apex_dashboard.metrics.get_dashboard_metrics',
+            args: { window: this.page.fields_dict.window.get_value() || 3600 },
+            callback: (r) => this.render(r.message || [])
+        });
+        this.load_profiles();
+    }
+
+    load_profiles() {
+        frappe.call({
+            method: 'apex_dashboard.profiler.get_profiling_users',
+            callback: (users) => {
+                frappe.call({
+                    method: 'apex_dashboard.profiler.get_profiles',
+                    callback: (r) => this.render_profiles(r.message || [], users.message || [])
+                });
+            }
+        });
+    }
+
+    enable_profiling() {
+        frappe.prompt([
+            { fieldname: 'user', label: __('User'), fieldtype: 'Link', options: 'User', reqd: 1, default: frappe.session.user },
+            { fieldname: 'minutes', label: __('Minutes'), fieldtype: 'Int', reqd: 1, default: 30 }
+        ], (values) => {
+            frappe.call({
+                method: 'apex_dashboard.profiler.enable_profiling',
+                args: values,
+                callback: () => {
+                    frappe.show_alert({ message: __('Dashboard calls of {0} are profiled', [values.user]), indicator: 'green' });
+                    this.load_profiles();
+                }
+            });
+        }, __('Profile Dashboard Calls'), __('Start'));
+    }
+
+    disable_profiling() {
+        frappe.prompt([
+            { fieldname: 'user', label: __('User'), fieldtype: 'Link', options: 'User', reqd: 1, default: frappe.session.user }
+        ], (values) => {
+            frappe.call({
+                method: 'apex_dashboard.profiler.disable_profiling',
+                args: values,
+                callback: () => this.load_profiles()
+            });
+        }, __('Stop Profiling'), __('Stop'));
+    }
+
+    reset() {
+        frappe.confirm(__('Clear all recorded dashboard metrics?'), () => {
+            frappe.call({
+                method: 'apex_dashboard.metrics.reset_dashboard_metrics',
+                callback: () => this.load_data()
+            });
+        });
+    }
+
+    render(rows) {
+        if (!rows.length) {
+            this.container.html(`<div class="text-muted text-center p-5">${__('No dashboard calls recorded in this window')}</div>`);
+            return;
+        }
+
+        const ms = (value) => value === 'inf' ? '> 10 s' : `${Math.round(value).toLocaleString()} ms`;
+        const number = (value, digits = 0) => (value || 0).toLocaleString(undefined, { maximumFractionDigits: digits });
+        const kb = (value) => `${number((value || 0) / 1024, 1)} KB`;
+        const rate = (value) => value === null || value === undefined ? '-' : `${(value * 100).toFixed(0)}%`;
+
+        const body = rows.map(row => `
+            <tr>
+                <td><code>${frappe.utils.escape_html(row.endpoint)}</code></td>
+                <td class="text-right">${number(row.calls)}</td>
+                <td class="text-right">${number(row.errors)}</td>
+                <td class="text-right">${ms(row.total_ms)}</td>
+                <td class="text-right">${ms(row.avg_wall_ms)}</td>
+                <td class="text-right">${ms(row.p50_ms)} / ${ms(row.p95_ms)} / ${ms(row.p99_ms)}</td>
+                <td class="text-right">${ms(row.avg_db_ms)}</td>
+                <td class="text-right">${number(row.avg_queries, 1)}</td>
+                <td class="text-right">${number(row.avg_rows)}</td>
+                <td class="text-right">${kb(row.avg_bytes)}</td>
+                <td class="text-right" title="${__('hit')}: ${row.cache.hit}, ${__('stale')}: ${row.cache.stale}, ${__('miss')}: ${row.cache.miss}, ${__('stream')}: ${row.cache.stream}">${rate(row.hit_rate)}</td>
+            </tr>
+        `).join('');
+
+        this.container.html(`
+            <table class="table table-bordered table-hover" style="font-size: 12px;">
+                <thead>
+                    <tr>
+                        <th>${__('Endpoint')}</th>
+                        <th class="text-right">${__('Calls')}</th>
+                        <th class="text-right">${__('Errors')}</th>
+                        <th class="text-right">${__('Total Time')}</th>
+                        <th class="text-right">${__('Avg Time')}</th>
+                        <th class="text-right">${__('p50 / p95 / p99')}</th>
+                        <th class="text-right">${__('Avg DB Time')}</th>
+                        <th class="text-right">${__('Avg Queries')}</th>
+                        <th class="text-right">${__('Avg Rows')}</th>
+                        <th class="text-right">${__('Avg Payload')}</th>
+                        <th class="text-right">${__('Cache Hit Rate')}</th>
+                    </tr>
+                </thead>
+                <tbody>${body}</tbody>
+            </table>
+            <p class="text-muted small">${__('Percentiles are upper bounds of latency histogram buckets. Endpoints are sorted by total time.')}</p>
+        `);
+    }
+
+    render_profiles(profiles, users) {
+        const escape = frappe.utils.escape_html;
+        const profiling = users.length
+            ? __('Profiling the dashboard calls of: {0}', [users.map(escape).join(', ')])
+            : __('No user is being profiled. Single calls can be profiled by adding apex_profile=1 to the request.');
+
+        const body = profiles.map(profile => `
+            <tr>
+                <td>${escape(profile.created_at)}</td>
+                <td><code>${escape(profile.endpoint)}</code></td>
+                <td>${escape(profile.user)}</td>
+                <td class="text-right">${Math.round(profile.wall_ms).toLocaleString()} ms</td>
+                <td class="text-right">${Math.round(profile.db_ms).toLocaleString()} ms</td>
+                <td class="text-right">${profile.queries}</td>
+                <td>${escape(profile.cache || '-')}${profile.error ? ` <span class="indicator-pill red">${__('Error')}</span>` : ''}</td>
+                <td>
+                    <a class="profile-timeline" data-profile="${escape(profile.id)}">${__('SQL Timeline')}</a> ·
+                    <a href="/api/method/apex_dashboard.profiler.download_profile?profile_id=${encodeURIComponent(profile.id)}">${escape(profile.profiler === 'pyinstrument' ? __('Flame View') : __('pstats'))}</a>
+                </td>
+            </tr>
+        `).join('');
+
+        this.profiles.html(`
+            <h5>${__('Profiles')}</h5>
+            <p class="text-muted small">${profiling}</p>
+            ${profiles.length ? `
+                <table class="table table-bordered table-hover" style="font-size: 12px;">
+                    <thead>
+                        <tr>
+                            <th>${__('Time')}</th>
+                            <th>${__('Endpoint')}</th>
+                            <th>${__('User')}</th>
+                            <th class="text-right">${__('Wall Time')}</th>
+                            <th class="text-right">${__('DB Time')}</th>
+                            <th class="text-right">${__('Queries')}</th>
+                            <th>${__('Cache')}</th>
+                            <th></th>
+                        </tr>
+                    </thead>
+                    <tbody>${body}</tbody>
+                </table>
+            ` : ''}
+        `);
+    }
+
+    show_profile(profile_id) {
+        frappe.call({
+            method: 'apex_dashboard.profiler.get_profile',
+            args: { profile_id },
+            callback: (r) => {
+                const profile = r.message;
+                const escape = frappe.utils.escape_html;
+                const rows = profile.sql_timeline.map(statement => `
+                    <tr>
+                        <td class="text-right">${statement.start_ms.toFixed(1)}</td>
+                        <td class="text-right">${statement.duration_ms.toFixed(1)}</td>
+                        <td class="text-right">${statement.rows}</td>
+                        <td><code style="white-space: pre-wrap;">${escape(statement.query)}</code></td>
+                    </tr>
+                `).join('');
+
+                const dialog = new frappe.ui.Dialog({
+                    title: `${profile.endpoint} · ${profile.created_at}`,
+                    size: 'extra-large',
+                    fields: [{ fieldname: 'body', fieldtype: 'HTML' }]
+                });
+                dialog.fields_dict.body.$wrapper.html(`
+                    <table class="table table-bordered" style="font-size: 11px;">
+                        <thead>
+                            <tr>
+                                <th class="text-right">${__('Start (ms)')}</th>
+                                <th class="text-right">${__('Duration (ms)')}</th>
+                                <th class="text-right">${__('Rows')}</th>
+                                <th>${__('Query')}</th>
+                            </tr>
+                        </thead>
+                        <tbody>${rows}</tbody>
+                    </table>
+                    <pre style="font-size: 11px; max-height: 400px; overflow: auto;">${escape(profile.summary || '')}</pre>
+                `);
+                dialog.show();
+            }
+        });
+    }
+}
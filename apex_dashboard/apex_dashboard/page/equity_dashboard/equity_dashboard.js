@@ -183,7 +183,7 @@ class EquityDashboard {
 
         // Update Header Total
         this.wrapper.find('#total-value').text(this.format_currency(metrics.total_equity, currency));
-        this.wrapper.find('#last-updated').text(frappe.datetime.now_datetime());
+        this.wrapper.find('#last-updated').text(data.computed_at ? frappe.datetime.str_to_user(data.computed_at) : frappe.datetime.now_datetime());
 
         // 1. Metrics Cards
         const metricsHtml = `
@@ -1,8 +1,10 @@
 import frappe
 from apex_dashboard.api.equity_v2 import get_dashboard_data as api_get_dashboard_data
 from apex_dashboard.api.finance_api import get_equity_trends as api_get_equity_trends
+from apex_dashboard.metrics import instrument_endpoint
 
 @frappe.whitelist()
+@instrument_endpoint
 def get_dashboard_data(company=None, period="This Month", from_date=None, to_date=None):
     """
     Proxy method for backward compatibility.
@@ -11,6 +13,7 @@ def get_dashboard_data(company=None, period="This Month", from_date=None, to_dat
     return api_get_dashboard_data(company, period, from_date, to_date)
 
 @frappe.whitelist()
+@instrument_endpoint
 def get_equity_trends(company=None):
     """
     Proxy method for backward compatibility.
@@ -279,7 +279,7 @@ class ExpenseDashboard {
 
 	render(data) {
 		const currency = data.currency || 'EGP';
-		this.wrapper.find('#last-updated').text(frappe.datetime.now_datetime());
+		this.wrapper.find('#last-updated').text(data.computed_at ? frappe.datetime.str_to_user(data.computed_at) : frappe.datetime.now_datetime());
 		this.wrapper.find('#header-total-expense').text(this.format_currency(data.total_expenses, currency));
 
 		const grid = this.wrapper.find('#dashboard-content');
@@ -1,16 +1,17 @@
 import frappe
 from frappe import _
 from frappe.utils import flt, getdate, add_months, add_days, get_first_day, get_last_day, today
+from apex_dashboard.metrics import instrument_endpoint
 
 @frappe.whitelist()
+@instrument_endpoint
 def get_dashboard_data(company=None, period="This Month", from_date=None, to_date=None, fiscal_year=None):
     """
     Get expense dashboard data using the standalone expense_dashboard_utils.
     This function is called by the frontend JavaScript.
     """
-    # Import the standalone utility function
-    from apex_dashboard.expense_dashboard_utils import get_expense_dashboard_data
-    
+    from apex_dashboard.cache_utils import get_cached_dashboard
+
     # Map the period parameter to the format expected by the utility
     period_mapping = {
         "Today": "daily",
@@ -26,9 +27,12 @@ def get_dashboard_data(company=None, period="This Month", from_date=None, to_dat
     
     mapped_period = period_mapping.get(period, "monthly")
     
+    if not company:
+        company = frappe.defaults.get_user_default("Company")
+
     # Calculate dates
     if fiscal_year:
-        from_date, to_date = frappe.db.get_value("Fiscal Year", fiscal_year, ["year_start_date", "year_end_date"])
+        from_date, to_date = frappe.get_cached_value("Fiscal Year", fiscal_year, ["year_start_date", "year_end_date"])
     elif period == "Custom" and from_date and to_date:
         from_date = getdate(from_date)
         to_date = getdate(to_date)
@@ -36,7 +40,23 @@ def get_dashboard_data(company=None, period="This Month", from_date=None, to_dat
         if not period:
             period = "This Month"
         from_date, to_date = get_period_dates(period)
-    
+
+    return get_cached_dashboard(
+        "expense",
+        company,
+        build_dashboard_data,
+        stale_while_revalidate=True,
+        period=period,
+        mapped_period=mapped_period,
+        from_date=str(from_date),
+        to_date=str(to_date)
+    )
+
+def build_dashboard_data(company, period, mapped_period, from_date, to_date):
+    """Build expense dashboard data in the frontend format (uncached)."""
+    # Import the standalone utility function
+    from apex_dashboard.expense_dashboard_utils import get_expense_dashboard_data
+
     # Call the standalone utility function
     data = get_expense_dashboard_data(
         company=company,
@@ -1,9 +1,18 @@
 import frappe
-from frappe.utils import flt
+from frappe.utils import flt, getdate, today
+
+from apex_dashboard.account_tree import get_account, get_leaf_accounts
+from apex_dashboard.card_dashboard import get_active_cards
+from apex_dashboard.metrics import instrument_endpoint
 
 @frappe.whitelist()
-def get_dashboard_config(dashboard_name):
-    """Get dashboard configuration by name or route"""
+@instrument_endpoint
+def get_dashboard_config(dashboard_name, company=None, as_of_date=None):
+    """
+    Get dashboard configuration by name or route
+    Card values are balances of `company` (default: the user's default
+    company) as of `as_of_date` (default: today).
+    """
     try:
         # Try to find by route first
         dashboard = frappe.get_all(
@@ -28,7 +37,7 @@ def get_dashboard_config(dashboard_name):
         dash = dashboard[0]
         
         # Get cards for this category
-        cards = get_cards_for_category(dash['category'])
+        cards = get_cards_for_category(dash['category'], company, as_of_date)
         
         # Return dashboard config with cards
         return {
@@ -45,21 +54,29 @@ def get_dashboard_config(dashboard_name):
         frappe.throw(str(e))
 
 
-def get_cards_for_category(category):
+def get_cards_for_category(category, company=None, as_of_date=None):
     """Get all cards for a specific category from Config"""
     
+    if not company:
+        company = frappe.defaults.get_user_default("Company")
+    as_of_date = getdate(as_of_date or today())
+    
     # Get config
-    config = frappe.get_single("Apex Dashboard Config")
+    config = frappe.get_cached_doc("Apex Dashboard Config")
+    active_cards = get_active_cards(category)
+    rows = [row for row in config.cards if row.card in active_cards]
+    
+    # Balances of every Chart of Accounts card in one query
+    balances = get_card_account_balances(
+        [row.account for row in rows if row.card_source == "Chart of Accounts" and row.account],
+        company,
+        as_of_date
+    )
     
     cards_data = []
     
-    for row in config.cards:
-        # Get card details
-        card = frappe.get_doc("Apex Dashboard Card", row.card)
-        
-        # Check if card matches category and is active
-        if card.category != category or not card.is_active:
-            continue
+    for row in rows:
+        card = active_cards[row.card]
         
         # Get card value based on source
         value = 0
@@ -70,9 +87,7 @@ def get_cards_for_category(category):
             description = "Static Value"
             
         elif row.card_source == "Chart of Accounts" and row.account:
-            # Get account balance
-            account_balance = get_account_balance(row.account)
-            value = account_balance
+            value = balances.get(row.account, 0.0)
             description = row.account
         
         # Add card data
@@ -86,19 +101,41 @@ def get_cards_for_category(category):
     return cards_data
 
 
-def get_account_balance(account):
-    """Get account balance from GL Entry"""
+def get_card_account_balances(accounts, company, as_of_date):
+    """
+    Get the balances of card accounts with one grouped GL query
+    Group accounts sum the ledgers of their subtree, resolved from the
+    cached chart-of-accounts index.
+    Args:
+        accounts: Card account names, ledger or group
+        company: Company name
+        as_of_date: Count GL entries posted on or before this date
+    Returns:
+        dict: Account name -> debit - credit in company currency
+    """
+    leaves = {}
+    for account in set(accounts):
+        details = get_account(account)
+        if details and details.company == company:
+            leaves[account] = get_leaf_accounts(account, company)
+    
+    leaf_names = sorted({leaf for names in leaves.values() for leaf in names})
+    if not leaf_names:
+        return {account: 0.0 for account in accounts}
     
-    # Get account balance
-    balance = frappe.db.sql("""
-        SELECT 
-            SUM(debit) - SUM(credit) as balance
+    rows = frappe.db.sql("""
+        SELECT account, SUM(debit) - SUM(credit) AS balance
         FROM `tabGL Entry`
-        WHERE account = %s
+        WHERE account IN %(accounts)s
+            AND company = %(company)s
+            AND posting_date <= %(as_of_date)s
             AND is_cancelled = 0
-    """, (account,), as_dict=1)
+        GROUP BY account
+    """, {"accounts": leaf_names, "company": company, "as_of_date": as_of_date}, as_dict=1)
     
-    if balance and balance[0]:
-        return flt(balance[0].balance)
+    ledger_balances = {row.account: flt(row.balance) for row in rows}
     
-    return 0.0
+    return {
+        account: sum(ledger_balances.get(leaf, 0.0) for leaf in leaves.get(account, []))
+        for account in accounts
+    }
@@ -55,10 +55,14 @@ class InventoryDashboard {
         }
 
         this.format_currency = this.format_currency.bind(this);
-        this.setup_filters();
-        this.add_custom_buttons_to_filters();
-        this.bind_events();
-        this.load_data();
+
+        // Sections are streamed in as they are computed (see dashboard_stream.js)
+        frappe.require('/assets/apex_dashboard/js/dashboard_stream.js', () => {
+            this.setup_filters();
+            this.add_custom_buttons_to_filters();
+            this.bind_events();
+            this.load_data();
+        });
     }
 
     add_custom_buttons_to_filters() {
@@ -219,17 +223,42 @@ class InventoryDashboard {
         const to_date = this.page.fields_dict.to_date.get_value();
         const fiscal_year = this.page.fields_dict.fiscal_year.get_value();
 
+        const method = 'apex_dashboard.apex_dashboard.page.inventory_dashboard.inventory_dashboard.get_dashboard_data';
+        const args = {
+            company: company,
+            period: period,
+            from_date: from_date,
+            to_date: to_date,
+            fiscal_year: fiscal_year
+        };
+
+        if (this.stream) {
+            this.stream.close();
+            this.stream = null;
+        }
+
         this.show_loader(true);
 
+        if (window.DashboardStream && DashboardStream.isAvailable()) {
+            this.stream = DashboardStream.load({
+                method,
+                args,
+                on_update: (data) => {
+                    this.show_loader(false);
+                    this.render(data);
+                },
+                on_error: () => this.load_all(method, args)
+            });
+            return;
+        }
+
+        this.load_all(method, args);
+    }
+
+    load_all(method, args) {
         frappe.call({
-            method: 'apex_dashboard.apex_dashboard.page.inventory_dashboard.inventory_dashboard.get_dashboard_data',
-            args: {
-                company: company,
-                period: period,
-                from_date: from_date,
-                to_date: to_date,
-                fiscal_year: fiscal_year
-            },
+            method,
+            args,
             callback: (r) => {
                 this.show_loader(false);
                 if (r.message) {
@@ -261,38 +290,42 @@ class InventoryDashboard {
 
     render(data) {
         const currency = data.currency || 'EGP';
-        this.wrapper.find('#last-updated').text(frappe.datetime.now_datetime());
-        this.wrapper.find('#header-total-value').text(this.format_currency(data.total_stock.value, currency));
+        // Sections not streamed in yet are shown as placeholders
+        const placeholder = (title, css_class) => DashboardStream.placeholder(title, css_class);
+
+        this.wrapper.find('#last-updated').text(data.computed_at ? frappe.datetime.str_to_user(data.computed_at) : frappe.datetime.now_datetime());
+        this.wrapper.find('#header-total-value').text(data.total_stock ? this.format_currency(data.total_stock.value, currency) : 'Loading...');
 
         const content = `
 			<div class="inventory-container">
 				<!-- Total Stock Card (Top) -->
+				${data.total_stock ? `
 				<div class="total-stock-card">
 					<h2>💰 Total Stock Value</h2>
 					<div class="total-value">${this.format_currency(data.total_stock.value, currency)}</div>
 					<div class="total-items">${data.total_stock.items} items across all categories</div>
-				</div>
+				</div>` : placeholder('💰 Total Stock Value', 'total-stock-card')}
 				
 				<!-- Main Category Cards (Dynamic) -->
 				<div class="category-cards">
-					${data.groups.map(group => this.render_category_card(group, currency)).join('')}
+					${data.groups ? data.groups.map(group => this.render_category_card(group, currency)).join('') : placeholder('📦 Categories', 'category-card-new')}
 				</div>
 				
 				<!-- Alerts Section -->
-				${data.alerts.total_alerts > 0 ? this.render_alerts(data.alerts) : ''}
+				${data.alerts && data.alerts.total_alerts > 0 ? this.render_alerts(data.alerts) : ''}
 				
 				<!-- Bottom Grid -->
 				<div class="content-grid">
 					<!-- Top Items -->
 					<div class="dashboard-card">
 						<h3>⭐ Top Items by Value</h3>
-						${this.render_top_items(data.top_items, currency)}
+						${data.top_items ? this.render_top_items(data.top_items, currency) : placeholder('', '')}
 					</div>
 					
 					 <!-- Warehouse Breakdown -->
 					<div class="dashboard-card">
 						<h3>🏭 Warehouse Breakdown</h3>
-						${this.render_warehouses(data.warehouses, currency)}
+						${data.warehouses ? this.render_warehouses(data.warehouses, currency) : placeholder('', '')}
 					</div>
 				</div>
 			</div>
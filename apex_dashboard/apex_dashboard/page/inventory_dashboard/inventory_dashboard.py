@@ -1,8 +1,9 @@
 import frappe
 from frappe import _
-from frappe.utils import flt, today, getdate, add_days, add_months, get_first_day, get_last_day
+from frappe.utils import cint, flt, today, getdate, add_days, add_months, get_first_day, get_last_day
 from frappe.query_builder import DocType
 from frappe.query_builder.functions import Sum, Count
+from apex_dashboard.metrics import instrument_endpoint
 
 def get_period_dates(period):
 	current_date = getdate(today())
@@ -29,24 +30,24 @@ def get_period_dates(period):
 		return get_first_day(current_date), get_last_day(current_date)
 
 @frappe.whitelist()
-def get_dashboard_data(company=None, period="Today", from_date=None, to_date=None, fiscal_year=None):
+@instrument_endpoint
+def get_dashboard_data(company=None, period="Today", from_date=None, to_date=None, fiscal_year=None, stream=0, stream_id=None):
 	"""
 	Get inventory dashboard data with dynamic card configuration.
 	Note: Currently returns real-time stock (Bin) regardless of date filter, 
 	as historical stock calculation is resource intensive.
+	With stream set, sections are pushed over realtime as they are computed
+	(see apex_dashboard.dashboard_stream).
 	"""
-	# Check cache first
-	cache_key = f"inventory_{company}_{period}_{from_date}_{to_date}_{fiscal_year}"
-	cached_data = frappe.cache().get_value(cache_key)
-	if cached_data:
-		return cached_data
-	
+	from apex_dashboard.cache_utils import get_cached_dashboard
+	from apex_dashboard.dashboard_stream import stream_dashboard
+
 	if not company:
 		company = frappe.defaults.get_user_default("Company")
 
 	# Determine Date Range (for display purposes mostly, as we use Bin)
 	if fiscal_year:
-		from_date, to_date = frappe.db.get_value("Fiscal Year", fiscal_year, ["year_start_date", "year_end_date"])
+		from_date, to_date = frappe.get_cached_value("Fiscal Year", fiscal_year, ["year_start_date", "year_end_date"])
 	elif period == "Custom" and from_date and to_date:
 		from_date = getdate(from_date)
 		to_date = getdate(to_date)
@@ -55,10 +56,22 @@ def get_dashboard_data(company=None, period="Today", from_date=None, to_date=Non
 			period = "Today"
 		from_date, to_date = get_period_dates(period)
 
+	if cint(stream):
+		return stream_dashboard("inventory", company, SECTIONS, stream_id=stream_id, from_date=from_date, to_date=to_date)
+
+	return get_cached_dashboard("inventory", company, build_dashboard_data, from_date=from_date, to_date=to_date)
+
+def build_dashboard_data(company, from_date, to_date):
+	"""Build inventory dashboard data (uncached)"""
+	from apex_dashboard.dashboard_stream import build_sections
+
+	return build_sections(SECTIONS, company=company, from_date=from_date, to_date=to_date)
+
+def get_total_stock_section(company, from_date, to_date):
+	"""Total Stock Value"""
 	# Get Company Currency
-	currency = frappe.get_value("Company", company, "default_currency") or "EGP"
+	currency = frappe.get_cached_value("Company", company, "default_currency") or "EGP"
 
-	# 1. Get Total Stock Value
 	Bin = DocType("Bin")
 	Warehouse = DocType("Warehouse")
 	query_total = (
@@ -73,7 +86,21 @@ def get_dashboard_data(company=None, period="Today", from_date=None, to_date=Non
 	)
 	total_stock = query_total.run(as_dict=True)[0]
 
-	# 2. Define Categories (Groups)
+	return {
+		"currency": currency,
+		"total_stock": {
+			"items": total_stock.get('items_count') or 0,
+			"value": total_stock.get('total_value') or 0
+		},
+		"period": {
+			"from_date": from_date or today(),
+			"to_date": to_date or today()
+		}
+	}
+
+def get_groups_section(company, from_date, to_date):
+	"""Stock per category (group of item groups)"""
+	# Define Categories (Groups)
 	# Hardcoded groups for standalone architecture
 	
 	groups_data = []
@@ -130,36 +157,16 @@ def get_dashboard_data(company=None, period="Today", from_date=None, to_date=Non
 			"details": group_data["details"]
 		})
 
-	# 3. Get Alerts (Low Stock & Out of Stock)
-	alerts = get_alerts(company)
+	return {"groups": groups_data}  # Standardized list for dynamic rendering
 
-	# 4. Get Top Items
-	top_items = get_top_items(company)
+def get_alerts_section(company, from_date, to_date):
+	return {"alerts": get_alerts(company)}
 
-	# 5. Get Warehouse Breakdown
-	warehouses = get_warehouse_breakdown(company)
+def get_top_items_section(company, from_date, to_date):
+	return {"top_items": get_top_items(company)}
 
-	# Build response data
-	data = {
-		"currency": currency,
-		"total_stock": {
-			"items": total_stock.get('items_count') or 0,
-			"value": total_stock.get('total_value') or 0
-		},
-		"groups": groups_data, # Standardized list for dynamic rendering
-		"alerts": alerts,
-		"warehouses": warehouses,
-		"top_items": top_items,
-		"period": {
-			"from_date": from_date or today(),
-			"to_date": to_date or today()
-		}
-	}
-	
-	# Cache for 5 minutes
-	frappe.cache().set_value(cache_key, data, expires_in_sec=300)
-	
-	return data
+def get_warehouses_section(company, from_date, to_date):
+	return {"warehouses": get_warehouse_breakdown(company)}
 
 def get_group_data(item_groups, company):
 	"""Helper to fetch stock data for specific item groups using Query Builder"""
@@ -289,3 +296,12 @@ def get_warehouse_breakdown(company):
 		.orderby(Sum(Bin.stock_value), order=frappe.qb.desc)
 		.limit(15)
 	).run(as_dict=True)
+
+# Independent parts of the payload, computed in parallel when streamed
+SECTIONS = {
+	"total_stock": get_total_stock_section,
+	"groups": get_groups_section,
+	"alerts": get_alerts_section,
+	"top_items": get_top_items_section,
+	"warehouses": get_warehouses_section,
+}
@@ -7,6 +7,7 @@ from frappe import _
 from frappe.utils import getdate, nowdate
 
 from apex_dashboard.dashboard import utils as dashboard_utils
+from apex_dashboard.metrics import instrument_endpoint
 
 
 @frappe.whitelist()
@@ -17,6 +18,7 @@ def get_context(context):
 
 
 @frappe.whitelist()
+@instrument_endpoint
 def get_dashboard_data(company: Optional[str] = None, posting_date: Optional[str] = None):
 	try:
 		posting_date = posting_date or nowdate()
@@ -117,9 +119,14 @@ def _build_section(
 	total_currency: Dict[str, float] = {}
 	total_base = 0.0
 
-	for label, config in entries:
-		accounts = _normalize_accounts(config)
-		balances = dashboard_utils.get_balances_for_accounts(accounts, company=company, posting_date=posting_date)
+	accounts_by_entry = {index: _normalize_accounts(config) for index, (_label, config) in enumerate(entries)}
+	section_balances = dashboard_utils.get_balances_for_groups(
+		accounts_by_entry, company=company, posting_date=posting_date
+	)
+
+	for index, (label, _config) in enumerate(entries):
+		accounts = accounts_by_entry[index]
+		balances = section_balances[index]
 		by_currency = dashboard_utils.summarize_balances_by_currency(balances)
 		base_total = dashboard_utils.summarize_base_total(balances)
 
@@ -386,7 +386,7 @@ class LiquidityDashboard {
         this.render_chart(data);
 
         this.wrapper.find('#header-total-liquidity').text(this.format_currency(data.total_liquidity, 'EGP'));
-        this.wrapper.find('#last-updated').text(frappe.datetime.now_datetime());
+        this.wrapper.find('#last-updated').text(data.computed_at ? frappe.datetime.str_to_user(data.computed_at) : frappe.datetime.now_datetime());
 
         const grid = this.wrapper.find('#dashboard-content');
         grid.empty();
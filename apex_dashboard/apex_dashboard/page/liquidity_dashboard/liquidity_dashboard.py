@@ -1,10 +1,13 @@
 import frappe
 from frappe import _
-import requests
 import json
 from frappe.utils import flt, nowdate, add_days, getdate, get_first_day, get_last_day, add_months, today
 from erpnext.accounts.utils import get_balance_on
 
+from apex_dashboard.account_tree import get_account_tree, get_accounts
+from apex_dashboard.exchange_rates import rates_for
+from apex_dashboard.metrics import instrument_endpoint
+
 def get_period_dates(period):
 	current_date = getdate(today())
 	
@@ -30,25 +33,20 @@ def get_period_dates(period):
 		return get_first_day(current_date), get_last_day(current_date)
 
 @frappe.whitelist()
+@instrument_endpoint
 def get_dashboard_data(company=None, period="Today", from_date=None, to_date=None, fiscal_year=None):
 	"""
 	Get liquidity dashboard data with account grouping and live exchange rates.
-	Data is cached for 5 minutes for better performance.
+	Data is cached until the company's ledger version changes.
 	"""
-	# Check cache first
-	from apex_dashboard.cache_utils import get_cached_dashboard_data, set_dashboard_cache
-	
-	cache_key = f"liquidity_{company}_{period}_{from_date}_{to_date}_{fiscal_year}"
-	cached_data = frappe.cache().get_value(cache_key)
-	if cached_data:
-		return cached_data
+	from apex_dashboard.cache_utils import get_cached_dashboard
 	
 	if not company:
 		company = frappe.defaults.get_user_default("Company") or "APEX"
 
 	# Determine Date Range (we mainly use to_date for balances)
 	if fiscal_year:
-		from_date, to_date = frappe.db.get_value("Fiscal Year", fiscal_year, ["year_start_date", "year_end_date"])
+		from_date, to_date = frappe.get_cached_value("Fiscal Year", fiscal_year, ["year_start_date", "year_end_date"])
 	elif period == "Custom" and from_date and to_date:
 		from_date = getdate(from_date)
 		to_date = getdate(to_date)
@@ -56,13 +54,20 @@ def get_dashboard_data(company=None, period="Today", from_date=None, to_date=Non
 		if not period:
 			period = "Today"
 		from_date, to_date = get_period_dates(period)
-	
-	# 1. Get API Key from site config or use default
-	api_key = frappe.conf.get("openexchangerates_api_key") or "39167a07fcc74a86be7f6b6677bc25e4"
-	
-	# 2. Get Rates
-	rates = get_exchange_rates(api_key)
-	
+
+	return get_cached_dashboard(
+		"liquidity",
+		company,
+		build_dashboard_data,
+		stale_while_revalidate=True,
+		from_date=from_date,
+		to_date=to_date
+	)
+
+def build_dashboard_data(company, from_date, to_date):
+	"""
+	Build liquidity dashboard data (uncached).
+	"""
 	data = {
 		"groups": [],
 		"total_liquidity": 0.0,
@@ -73,34 +78,24 @@ def get_dashboard_data(company=None, period="Today", from_date=None, to_date=Non
 		}
 	}
 
-	# 3. Fetch Bank and Cash Accounts directly (Standalone Mode)
+	# Fetch Bank and Cash Accounts directly (Standalone Mode)
 	from apex_dashboard.query_utils import get_gl_balances
 	
-	# Fetch all Bank and Cash accounts
-	accounts = frappe.db.get_all("Account", 
-		filters={
-			"account_type": ["in", ["Bank", "Cash"]],
-			"is_group": 0,
-			"company": company,
-			"disabled": 0
-		},
-		fields=["name", "account_name", "account_currency", "parent_account", "account_type"]
-	)
+	# Fetch all Bank and Cash accounts from the cached chart of accounts
+	tree_accounts = get_account_tree(company)["accounts"]
+	accounts = get_accounts(company, account_type=["Bank", "Cash"], is_group=0, disabled=0)
 	
 	if not accounts:
 		return data
 
+	rates = rates_for({acc["account_currency"] for acc in accounts})
+
 	# Get parent account names for better labeling
-	parent_names = {}
-	parent_ids = list(set([acc["parent_account"] for acc in accounts if acc["parent_account"]]))
-	
-	if parent_ids:
-		parents = frappe.db.get_all("Account",
-			filters={"name": ["in", parent_ids]},
-			fields=["name", "account_name"]
-		)
-		for p in parents:
-			parent_names[p["name"]] = p["account_name"]
+	parent_names = {
+		acc["parent_account"]: tree_accounts[acc["parent_account"]].account_name
+		for acc in accounts
+		if acc["parent_account"] in tree_accounts
+	}
 
 	# Group by Parent Account
 	grouped_accounts = {}
@@ -179,87 +174,8 @@ def get_dashboard_data(company=None, period="Today", from_date=None, to_date=Non
 	metrics = calculate_metrics(data["groups"], data["total_liquidity"])
 	data["metrics"] = metrics
 	
-	# Cache the result for 5 minutes
-	frappe.cache().set_value(cache_key, data, expires_in_sec=300)
-	
 	return data
 
-def get_exchange_rates(api_key):
-	"""
-	Fetches exchange rates from OpenExchangeRates or cache.
-	Falls back to ERPNext Currency Exchange if API fails or is not configured.
-	"""
-	cache_key = "liquidity_dashboard_rates"
-	cached_rates = frappe.cache().get_value(cache_key)
-	
-	if cached_rates:
-		return cached_rates
-		
-	if not api_key:
-		# No API key, use ERPNext rates immediately
-		return get_erpnext_rates()
-
-	try:
-		url = f"https://openexchangerates.org/api/latest.json?app_id={api_key}&base=USD"
-		# Increased timeout to 10 seconds and added connection timeout
-		response = requests.get(url, timeout=(3, 10))  # (connect timeout, read timeout)
-		response.raise_for_status()
-		data = response.json()
-		
-		# Convert to EGP base
-		if "EGP" not in data.get("rates", {}):
-			frappe.log_error("OpenExchangeRates: EGP not found in rates", "Liquidity Dashboard")
-			return get_erpnext_rates()
-
-		usd_to_egp = data["rates"]["EGP"]
-		rates = {}
-		for currency, rate_in_usd in data["rates"].items():
-			# 1 USD = X EGP
-			# 1 Currency = (1/rate_in_usd) USD = (1/rate_in_usd) * usd_to_egp EGP
-			if currency == "USD":
-				rates[currency] = usd_to_egp
-			else:
-				if rate_in_usd > 0:
-					rates[currency] = usd_to_egp / rate_in_usd
-				else:
-					rates[currency] = 0.0
-					
-		# Cache for 1 hour
-		frappe.cache().set_value(cache_key, rates, expires_in_sec=3600)
-		return rates
-	except requests.exceptions.Timeout:
-		# Timeout - fallback immediately to avoid long waits
-		frappe.log_error("OpenExchangeRates: Request timeout - using ERPNext rates", "Liquidity Dashboard")
-		return get_erpnext_rates()
-	except requests.exceptions.RequestException as e:
-		# Network errors - fallback immediately
-		frappe.log_error(f"OpenExchangeRates: Network error - {str(e)}", "Liquidity Dashboard")
-		return get_erpnext_rates()
-	except Exception as e:
-		# Other errors
-		frappe.log_error(f"OpenExchangeRates Error: {str(e)}", "Liquidity Dashboard")
-		return get_erpnext_rates()
-
-def get_erpnext_rates():
-	"""
-	Fallback to fetch rates from Currency Exchange in ERPNext.
-	"""
-	from erpnext.setup.utils import get_exchange_rate
-	
-	rates = {}
-	currencies = frappe.db.get_all("Currency", pluck="name")
-	for currency in currencies:
-		if currency == "EGP":
-			rates[currency] = 1.0
-			continue
-			
-		try:
-			rate = get_exchange_rate(currency, "EGP")
-			rates[currency] = rate if rate else 1.0
-		except Exception:
-			rates[currency] = 1.0
-	return rates
-
 def calculate_metrics(groups, total_liquidity):
 	"""
 	Calculate key metrics for dashboard.
@@ -104,10 +104,13 @@ class ProfitabilityDashboard {
             this.wrapper.find('.page-head').hide();
         }
 
-        this.setup_filters();
-        this.add_custom_buttons_to_filters();
-        this.bind_events();
-        this.load_data();
+        // Sections are streamed in as they are computed (see dashboard_stream.js)
+        frappe.require('/assets/apex_dashboard/js/dashboard_stream.js', () => {
+            this.setup_filters();
+            this.add_custom_buttons_to_filters();
+            this.bind_events();
+            this.load_data();
+        });
     }
 
     add_custom_buttons_to_filters() {
@@ -268,11 +271,37 @@ class ProfitabilityDashboard {
         const to_date = this.page.fields_dict.to_date.get_value();
         const fiscal_year = this.page.fields_dict.fiscal_year.get_value();
 
+        const method = 'apex_dashboard.apex_dashboard.page.profitability_dashboard.profitability_dashboard.get_dashboard_data';
+        const args = { company, period, from_date, to_date, fiscal_year };
+
+        if (this.stream) {
+            this.stream.close();
+            this.stream = null;
+        }
+
         this.show_loader(true);
 
+        if (window.DashboardStream && DashboardStream.isAvailable()) {
+            // Lists show gross profit until the summary (with expenses) arrives
+            this.stream = DashboardStream.load({
+                method,
+                args,
+                on_update: (data) => {
+                    this.show_loader(false);
+                    this.render(data);
+                },
+                on_error: () => this.load_all(method, args)
+            });
+            return;
+        }
+
+        this.load_all(method, args);
+    }
+
+    load_all(method, args) {
         frappe.call({
-            method: 'apex_dashboard.apex_dashboard.page.profitability_dashboard.profitability_dashboard.get_dashboard_data',
-            args: { company, period, from_date, to_date, fiscal_year },
+            method,
+            args,
             callback: (r) => {
                 this.show_loader(false);
                 if (r.message) {
@@ -296,13 +325,14 @@ class ProfitabilityDashboard {
 
     render(data) {
         const summary = data.summary || {};
-        const items = data.item_profitability || [];
-        const suppliers = data.supplier_profitability || [];
+        // Undefined while a streamed section is still being computed
+        const items = data.item_profitability;
+        const suppliers = data.supplier_profitability;
         const currency = data.currency || 'EGP';
 
-        // Update Header
-        this.wrapper.find('#total-profit-header').text(this.format_currency(summary.total_profit, currency));
-        this.wrapper.find('#last-updated').text(frappe.datetime.now_datetime());
+        // Update Header (the summary comes last when streamed)
+        this.wrapper.find('#total-profit-header').text(data.summary ? this.format_currency(summary.total_profit, currency) : 'Loading...');
+        this.wrapper.find('#last-updated').text(data.computed_at ? frappe.datetime.str_to_user(data.computed_at) : frappe.datetime.now_datetime());
 
         // Update Summary Cards
         // Changed to Net Profit
@@ -350,6 +380,11 @@ class ProfitabilityDashboard {
         const container = this.wrapper.find('#top-items-list');
         container.empty();
 
+        if (items === undefined) {
+            container.html(DashboardStream.placeholder(''));
+            return;
+        }
+
         if (!items || items.length === 0) {
             container.html('<div class="text-muted text-center p-3">No item data available</div>');
             return;
@@ -397,6 +432,11 @@ class ProfitabilityDashboard {
         const container = this.wrapper.find('#top-suppliers-list');
         container.empty();
 
+        if (suppliers === undefined) {
+            container.html(DashboardStream.placeholder(''));
+            return;
+        }
+
         if (!suppliers || suppliers.length === 0) {
             container.html('<div class="text-muted text-center p-3">No supplier data available</div>');
             return;
@@ -1,76 +1,29 @@
 import frappe
 from frappe import _
-from frappe.utils import flt, getdate, add_months, add_days, get_first_day, get_last_day, today
-import requests
+from frappe.utils import cint, flt, getdate, add_months, add_days, get_first_day, get_last_day, today
+from apex_dashboard.exchange_rates import rates_for
+from apex_dashboard.metrics import instrument_endpoint
 
-def get_exchange_rates():
+# Currencies converted to EGP on this dashboard
+DASHBOARD_CURRENCIES = ("EGP", "USD", "EUR", "SAR")
+
+@frappe.whitelist()
+@instrument_endpoint
+def get_dashboard_data(company=None, period="This Month", from_date=None, to_date=None, fiscal_year=None, stream=0, stream_id=None):
 	"""
-	Fetches exchange rates from OpenExchangeRates API (same as Liquidity/Suppliers Dashboard).
+	Get profitability dashboard data
+	With stream set, sections are pushed over realtime as they are computed
+	(see apex_dashboard.dashboard_stream).
 	"""
-	# Get API key from site config or use default
-	api_key = frappe.conf.get("openexchangerates_api_key") or "39167a07fcc74a86be7f6b6677bc25e4"
-	
-	# Check cache first
-	cache_key = "profitability_dashboard_rates"
-	cached_rates = frappe.cache().get_value(cache_key)
-	if cached_rates:
-		return cached_rates
-	
-	if not api_key:
-		return get_fallback_rates()
-	
-	try:
-		url = f"https://openexchangerates.org/api/latest.json?app_id={api_key}&base=USD"
-		response = requests.get(url, timeout=5)
-		response.raise_for_status()
-		data = response.json()
-		
-		# Convert to EGP base
-		if "EGP" not in data["rates"]:
-			return get_fallback_rates()
-		
-		usd_to_egp = data["rates"]["EGP"]
-		rates = {'EGP': 1.0}
-		
-		for currency in ['USD', 'EUR', 'SAR']:
-			if currency in data["rates"]:
-				rate_in_usd = data["rates"][currency]
-				if currency == "USD":
-					rates[currency] = usd_to_egp
-				else:
-					# Cross-currency conversion: EUR to EGP = (USD to EGP) × (EUR to USD)
-					if rate_in_usd > 0:
-						rates[currency] = usd_to_egp * rate_in_usd
-					else:
-						rates[currency] = 0.0
-		
-		# Cache for 1 hour
-		frappe.cache().set_value(cache_key, rates, expires_in_sec=3600)
-		return rates
-	except Exception as e:
-		frappe.log_error(f"OpenExchangeRates Error: {str(e)}")
-		return get_fallback_rates()
-
-def get_fallback_rates():
-	"""Fallback to Currency Exchange table using Query Builder utility."""
-	from apex_dashboard.query_utils import get_exchange_rates_bulk
-	return get_exchange_rates_bulk(['USD', 'EUR', 'SAR'])
+	from apex_dashboard.cache_utils import get_cached_dashboard
+	from apex_dashboard.dashboard_stream import stream_dashboard
 
-@frappe.whitelist()
-def get_dashboard_data(company=None, period="This Month", from_date=None, to_date=None, fiscal_year=None):
-	"""Get profitability dashboard data"""
-	# Check cache first - include fiscal_year in cache key
-	cache_key = f"profitability_{company}_{period}_{from_date}_{to_date}_{fiscal_year}"
-	cached_data = frappe.cache().get_value(cache_key)
-	if cached_data:
-		return cached_data
-	
 	if not company:
 		company = frappe.defaults.get_user_default("Company")
 
 	# Use custom dates if provided, otherwise calculate from period
 	if fiscal_year:
-		from_date, to_date = frappe.db.get_value("Fiscal Year", fiscal_year, ["year_start_date", "year_end_date"])
+		from_date, to_date = frappe.get_cached_value("Fiscal Year", fiscal_year, ["year_start_date", "year_end_date"])
 	elif period == "Custom" and from_date and to_date:
 		from_date = getdate(from_date)
 		to_date = getdate(to_date)
@@ -80,24 +33,40 @@ def get_dashboard_data(company=None, period="This Month", from_date=None, to_dat
 		if not period: 
 			period = "All Time"
 		from_date, to_date = get_period_dates(period)
-	
-	# Get Company Currency
-	currency = frappe.get_value("Company", company, "default_currency") or "EGP"
+
+	if cint(stream):
+		return stream_dashboard(
+			"profitability",
+			company,
+			SECTIONS,
+			finalize_dashboard_data,
+			stream_id=stream_id,
+			from_date=from_date,
+			to_date=to_date
+		)
+
+	return get_cached_dashboard(
+		"profitability",
+		company,
+		build_dashboard_data,
+		stale_while_revalidate=True,
+		from_date=from_date,
+		to_date=to_date
+	)
+
+def build_dashboard_data(company, from_date, to_date):
+	"""Build profitability dashboard data (uncached)"""
+	from apex_dashboard.dashboard_stream import build_sections
+
+	return build_sections(SECTIONS, finalize_dashboard_data, company=company, from_date=from_date, to_date=to_date)
+
+def get_sales_expressions(company):
+	"""Query Builder tables and EGP revenue/cost expressions shared by the item and supplier queries"""
+	from frappe.query_builder import DocType, Case
+	from frappe.query_builder.functions import Coalesce
 	
 	# Get exchange rates
-	exchange_rates = get_exchange_rates()
-	
-	# Build CASE statement for exchange rates
-	rate_cases = []
-	for curr, rate in exchange_rates.items():
-		rate_cases.append(f"WHEN si.currency = '{curr}' THEN {rate}")
-	
-	rate_case_sql = f"CASE {' '.join(rate_cases)} ELSE 1.0 END"
-	
-	# 1. Item Profitability
-	# Use Query Builder
-	from frappe.query_builder import DocType, Case
-	from frappe.query_builder.functions import Sum, Count, Min, Coalesce
+	exchange_rates = rates_for(DASHBOARD_CURRENCIES)
 	
 	SII = DocType("Sales Invoice Item")
 	SI = DocType("Sales Invoice")
@@ -133,8 +102,17 @@ def get_dashboard_data(company=None, period="This Month", from_date=None, to_dat
 		SII.qty * Coalesce(purchase_rate_subquery, 0)
 	)
 	
+	return frappe._dict(SII=SII, SI=SI, PII=PII, PI=PI, rate_case_si=rate_case_si, cost_expr=cost_expr)
+
+def get_item_profitability_section(company, from_date, to_date):
+	"""Item Profitability: top items by gross profit in the period"""
+	from frappe.query_builder.functions import Sum, Count, Min
+	
+	q = get_sales_expressions(company)
+	SII, SI = q.SII, q.SI
+	
 	# Profit Expression for Having/Order By
-	profit_expr = Sum(SII.amount * rate_case_si) - Sum(cost_expr)
+	profit_expr = Sum(SII.amount * q.rate_case_si) - Sum(q.cost_expr)
 	
 	query = (
 		frappe.qb.from_(SII)
@@ -144,8 +122,8 @@ def get_dashboard_data(company=None, period="This Month", from_date=None, to_dat
 			SII.item_name,
 			Count(SI.name).distinct().as_("invoice_count"),
 			Sum(SII.qty).as_("total_qty"),
-			Sum(SII.amount * rate_case_si).as_("revenue_egp"),
-			Sum(cost_expr).as_("cost_egp"),
+			Sum(SII.amount * q.rate_case_si).as_("revenue_egp"),
+			Sum(q.cost_expr).as_("cost_egp"),
 			Min(SI.posting_date).as_("first_sale_date")
 		)
 		.where(SI.docstatus == 1)
@@ -163,8 +141,17 @@ def get_dashboard_data(company=None, period="This Month", from_date=None, to_dat
 	for item in item_profitability:
 		item['profit_egp'] = item['revenue_egp'] - item['cost_egp']
 		item['margin'] = (item['profit_egp'] / item['revenue_egp'] * 100) if item['revenue_egp'] > 0 else 0
+		# Gross until expenses are allocated (see finalize_dashboard_data)
+		item['net_profit'] = item['profit_egp']
+		item['net_margin'] = item['margin']
 	
-	# 2. Supplier Profitability
+	return {
+		'currency': frappe.get_cached_value('Company', company, 'default_currency'),
+		'item_profitability': item_profitability
+	}
+
+def get_supplier_profitability_section(company, from_date, to_date):
+	"""Supplier Profitability: suppliers of the items sold in the period"""
 	# For suppliers, we still need to estimate cost based on purchase history if we want "Profit by Supplier"
 	# But to be consistent with Item Profitability, we should ideally link Sales Items back to their Purchase source (Serial/Batch)
 	# However, without strict Serial/Batch tracking, this is hard.
@@ -192,24 +179,11 @@ def get_dashboard_data(company=None, period="This Month", from_date=None, to_dat
     # Alternative: Just show "Top Suppliers by Spend" or "Volume"?
     # The user wants "Profitability".
     # Let's leave the Supplier query as is for now but fix the Item query which is the main "Total Profit" driver.
-    
-	# Build separate CASE statement for Sales Invoice currency (for subquery)
-	rate_cases_si = []
-	for curr, rate in exchange_rates.items():
-		rate_cases_si.append(f"WHEN si.currency = '{curr}' THEN {rate}")
-	
-	rate_case_sql_si = f"CASE {' '.join(rate_cases_si)} ELSE 1.0 END"
-	
-	# Build CASE statement for Purchase Invoice currency
-	rate_cases_pi = []
-	for curr, rate in exchange_rates.items():
-		rate_cases_pi.append(f"WHEN pi.currency = '{curr}' THEN {rate}")
+	from frappe.query_builder import DocType
+	from frappe.query_builder.functions import Sum, Count, Min, Coalesce, GroupConcat
 	
-	rate_case_sql_pi = f"CASE {' '.join(rate_cases_pi)} ELSE 1.0 END"
-	
-	# Supplier Profitability: Show suppliers based on items SOLD in the period
-	# Use Query Builder
-	from frappe.query_builder.functions import GroupConcat
+	q = get_sales_expressions(company)
+	SII, SI, PII, PI = q.SII, q.SI, q.PII, q.PI
 	
 	Supplier = DocType("Supplier")
 	
@@ -236,7 +210,7 @@ def get_dashboard_data(company=None, period="This Month", from_date=None, to_dat
 	)
 	
 	# Profit Expression for Having/Order By
-	profit_expr_supplier = Sum(SII.amount * rate_case_si) - Sum(cost_expr)
+	profit_expr_supplier = Sum(SII.amount * q.rate_case_si) - Sum(q.cost_expr)
 	
 	query_supplier = (
 		frappe.qb.from_(SII)
@@ -247,8 +221,8 @@ def get_dashboard_data(company=None, period="This Month", from_date=None, to_dat
 			Count(SII.item_code).distinct().as_("item_count"),
 			GroupConcat(SI.name).distinct().as_("invoice_list"),
 			Sum(SII.qty).as_("total_qty"),
-			Sum(SII.amount * rate_case_si).as_("revenue_egp"),
-			Sum(cost_expr).as_("cost_egp"),
+			Sum(SII.amount * q.rate_case_si).as_("revenue_egp"),
+			Sum(q.cost_expr).as_("cost_egp"),
 			Min(SI.posting_date).as_("first_sale_date")
 		)
 		.where(SI.docstatus == 1)
@@ -266,21 +240,32 @@ def get_dashboard_data(company=None, period="This Month", from_date=None, to_dat
 	for supplier in supplier_profitability:
 		supplier['profit_egp'] = (supplier['revenue_egp'] or 0) - (supplier['cost_egp'] or 0)
 		supplier['margin'] = (supplier['profit_egp'] / supplier['revenue_egp'] * 100) if supplier.get('revenue_egp') and supplier['revenue_egp'] > 0 else 0
+		# Gross until expenses are allocated (see finalize_dashboard_data)
+		supplier['net_profit'] = supplier['profit_egp']
+		supplier['net_margin'] = supplier['margin']
+	
+	return {'supplier_profitability': supplier_profitability}
+
+def get_expenses_section(company, from_date, to_date):
+	return {'total_expenses': get_total_expenses(company, from_date, to_date)}
+
+def finalize_dashboard_data(parts, company, from_date, to_date):
+	"""Summary metrics and expense allocation over the computed sections"""
+	item_profitability = parts['items']['item_profitability']
+	supplier_profitability = parts['suppliers']['supplier_profitability']
+	total_expenses = parts['expenses']['total_expenses']
 	
-	# 3. Calculate Summary Metrics
+	# Calculate Summary Metrics
 	total_revenue = sum(item.get('revenue_egp', 0) for item in item_profitability)
 	total_cogs = sum(item.get('cost_egp', 0) for item in item_profitability)
 	gross_profit = total_revenue - total_cogs
 	
-	# Fetch Total Expenses (Indirect/Operating)
-	total_expenses = get_total_expenses(company, from_date, to_date)
-	
 	# Net Profit = Gross Profit - Total Expenses
 	net_profit = gross_profit - total_expenses
 	
 	overall_margin = (net_profit / total_revenue * 100) if total_revenue else 0.0
 
-	# 4. Allocate Expenses to Items and Suppliers (Revenue Share)
+	# Allocate Expenses to Items and Suppliers (Revenue Share)
 	# Formula: Allocated Expense = Total Expenses * (Item Revenue / Total Revenue)
 	
 	for item in item_profitability:
@@ -321,9 +306,6 @@ def get_dashboard_data(company=None, period="This Month", from_date=None, to_dat
 		'supplier_profitability': supplier_profitability
 	}
 
-	# Cache for 5 minutes
-	frappe.cache().set_value(cache_key, data, expires_in_sec=300)
-
 	return data
 
 def get_total_expenses(company, from_date, to_date):
@@ -394,3 +376,10 @@ def get_period_dates(period):
 		return getdate("2000-01-01"), current_date
 	else:
 		return get_first_day(current_date), get_last_day(current_date)
+
+# Independent parts of the payload, computed in parallel when streamed
+SECTIONS = {
+	'items': get_item_profitability_section,
+	'suppliers': get_supplier_profitability_section,
+	'expenses': get_expenses_section,
+}
@@ -54,10 +54,14 @@ class SuppliersDashboard {
 		}
 
 		this.format_currency = this.format_currency.bind(this);
-		this.setup_filters();
-		this.add_custom_buttons_to_filters();
-		this.bind_events();
-		this.load_data();
+
+		// Sections are streamed in as they are computed (see dashboard_stream.js)
+		frappe.require('/assets/apex_dashboard/js/dashboard_stream.js', () => {
+			this.setup_filters();
+			this.add_custom_buttons_to_filters();
+			this.bind_events();
+			this.load_data();
+		});
 	}
 
 	add_custom_buttons_to_filters() {
@@ -223,17 +227,42 @@ class SuppliersDashboard {
 		const to_date = this.page.fields_dict.to_date.get_value();
 		const fiscal_year = this.page.fields_dict.fiscal_year.get_value();
 
+		const method = 'apex_dashboard.apex_dashboard.page.suppliers_dashboard.suppliers_dashboard.get_dashboard_data';
+		const args = {
+			company: company,
+			period: period,
+			from_date: from_date,
+			to_date: to_date,
+			fiscal_year: fiscal_year
+		};
+
+		if (this.stream) {
+			this.stream.close();
+			this.stream = null;
+		}
+
 		this.show_loader(true);
 
+		if (window.DashboardStream && DashboardStream.isAvailable()) {
+			this.stream = DashboardStream.load({
+				method,
+				args,
+				on_update: (data) => {
+					this.show_loader(false);
+					this.render(data);
+				},
+				on_error: () => this.load_all(method, args)
+			});
+			return;
+		}
+
+		this.load_all(method, args);
+	}
+
+	load_all(method, args) {
 		frappe.call({
-			method: 'apex_dashboard.apex_dashboard.page.suppliers_dashboard.suppliers_dashboard.get_dashboard_data',
-			args: {
-				company: company,
-				period: period,
-				from_date: from_date,
-				to_date: to_date,
-				fiscal_year: fiscal_year
-			},
+			method,
+			args,
 			callback: (r) => {
 				this.show_loader(false);
 				if (r.message) {
@@ -262,8 +291,14 @@ class SuppliersDashboard {
 	render(data) {
 		const currency = data.currency || 'EGP';
 
+		// Sections not streamed in yet are shown as placeholders
+		const has = (key) => data[key] !== undefined;
+		const placeholder = (title, css_class) => DashboardStream.placeholder(title, css_class);
+
 		// Update Header Total
-		this.wrapper.find('#header-total-payables').text(this.format_currency(data.total_payables_egp, 'EGP'));
+		this.wrapper.find('#header-total-payables').text(
+			has('total_payables_egp') ? this.format_currency(data.total_payables_egp, 'EGP') : 'Loading...'
+		);
 
 		// Render payables cards for each currency
 		let payablesCards = '';
@@ -285,22 +320,22 @@ class SuppliersDashboard {
 			<div class="suppliers-dashboard">
 				<!-- Total Summary Cards -->
 				<div class="total-summary-cards">
-					${this.render_total_card('💰 Total Payables', data.total_payables_egp, 'EGP', '#e74c3c', data.exchange_rates, data.payables_breakdown)}
-					${this.render_total_card('📊 Total Purchase Volume', data.total_purchase_egp, 'EGP', '#667eea', data.exchange_rates, data.purchase_breakdown)}
+					${has('total_payables_egp') ? this.render_total_card('💰 Total Payables', data.total_payables_egp, 'EGP', '#e74c3c', data.exchange_rates, data.payables_breakdown) : placeholder('💰 Total Payables', 'total-card')}
+					${has('total_purchase_egp') ? this.render_total_card('📊 Total Purchase Volume', data.total_purchase_egp, 'EGP', '#667eea', data.exchange_rates, data.purchase_breakdown) : placeholder('📊 Total Purchase Volume', 'total-card')}
 				</div>
 				
 				<!-- Summary Cards -->
 				<div class="summary-cards">
-					${payablesCards}
-					${this.render_card('💵 Total Paid', data.paid, currency, '#27ae60', 'paid')}
-					${this.render_card('📦 Active Suppliers', data.active_suppliers, currency, '#3498db', 'active')}
-					${overdueCards}
+					${has('payables_by_currency') ? payablesCards : placeholder('💰 Payables', 'category-card-new')}
+					${has('paid') ? this.render_card('💵 Total Paid', data.paid, currency, '#27ae60', 'paid') : placeholder('💵 Total Paid', 'category-card-new')}
+					${has('active_suppliers') ? this.render_card('📦 Active Suppliers', data.active_suppliers, currency, '#3498db', 'active') : placeholder('📦 Active Suppliers', 'category-card-new')}
+					${has('overdue_by_currency') ? overdueCards : placeholder('⚠️ Overdue', 'category-card-new')}
 				</div>
 				
 				<!-- Top Suppliers Section -->
 				<div class="top-suppliers-section">
 					<h3>📊 Top Suppliers by Purchase Volume</h3>
-					${this.render_top_suppliers(data.top_suppliers, data.exchange_rates)}
+					${has('top_suppliers') ? this.render_top_suppliers(data.top_suppliers, data.exchange_rates) : placeholder('', '')}
 				</div>
 			</div>
 		`;
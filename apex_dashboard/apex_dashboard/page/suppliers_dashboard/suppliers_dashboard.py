@@ -1,87 +1,11 @@
 import frappe
 from frappe import _
-from frappe.utils import flt, getdate, add_months, add_days, get_first_day, get_last_day, today
-import requests
+from frappe.utils import cint, flt, getdate, add_months, add_days, get_first_day, get_last_day, today
+from apex_dashboard.exchange_rates import rates_for
+from apex_dashboard.metrics import instrument_endpoint
 
-def get_exchange_rates():
-	"""
-	Fetches exchange rates from OpenExchangeRates API (same as Liquidity Dashboard).
-	"""
-	# Get API key from site config or use default
-	api_key = frappe.conf.get("openexchangerates_api_key") or "39167a07fcc74a86be7f6b6677bc25e4"
-	
-	# Check cache first
-	cache_key = "suppliers_dashboard_rates"
-	cached_rates = frappe.cache().get_value(cache_key)
-	if cached_rates:
-		return cached_rates
-	
-	if not api_key:
-		return get_fallback_rates()
-	
-	try:
-		url = f"https://openexchangerates.org/api/latest.json?app_id={api_key}&base=USD"
-		response = requests.get(url, timeout=5)
-		response.raise_for_status()
-		data = response.json()
-		
-		# Convert to EGP base
-		if "EGP" not in data["rates"]:
-			return get_fallback_rates()
-		
-		usd_to_egp = data["rates"]["EGP"]
-		rates = {'EGP': 1.0}
-		
-		for currency in ['USD', 'EUR', 'SAR']:
-			if currency in data["rates"]:
-				rate_in_usd = data["rates"][currency]
-				if currency == "USD":
-					rates[currency] = usd_to_egp
-				else:
-					# Cross-currency conversion: EUR to EGP = (USD to EGP) × (EUR to USD)
-					if rate_in_usd > 0:
-						rates[currency] = usd_to_egp / rate_in_usd
-					else:
-						rates[currency] = 0.0
-		
-		# Cache for 1 hour
-		frappe.cache().set_value(cache_key, rates, expires_in_sec=3600)
-		return rates
-	except Exception as e:
-		# Log error but don't fail if log fails (e.g., error message too long)
-		try:
-			error_msg = str(e)[:100]  # Truncate to 100 chars to avoid "Title too long" error
-			frappe.log_error(f"OpenExchangeRates API Error: {error_msg}", "Exchange Rates Error")
-		except:
-			pass  # Silently ignore log errors
-		return get_fallback_rates()
-
-def get_fallback_rates():
-	"""Fallback to Currency Exchange table."""
-	rates = {'EGP': 1.0}
-	for curr in ['USD', 'EUR', 'SAR']:
-		# Get latest exchange rate
-		rate_data = frappe.db.sql("""
-			SELECT exchange_rate 
-			FROM `tabCurrency Exchange`
-			WHERE from_currency = %s 
-				AND to_currency = 'EGP'
-				AND for_selling = 1
-			ORDER BY date DESC
-			LIMIT 1
-		""", curr, as_dict=1)
-		
-		if rate_data and len(rate_data) > 0:
-			rates[curr] = flt(rate_data[0].get('exchange_rate'))
-		else:
-			# Hard defaults
-			if curr == 'USD':
-				rates[curr] = 50.0
-			elif curr == 'EUR':
-				rates[curr] = 55.0
-			elif curr == 'SAR':
-				rates[curr] = 13.0
-	return rates
+# Currencies converted to EGP on this dashboard
+DASHBOARD_CURRENCIES = ("EGP", "USD", "EUR", "SAR")
 
 def get_period_dates(period):
 	current_date = getdate(today())
@@ -108,14 +32,22 @@ def get_period_dates(period):
 		return get_first_day(current_date), get_last_day(current_date)
 
 @frappe.whitelist()
-def get_dashboard_data(company=None, period="All Time", from_date=None, to_date=None, fiscal_year=None):
-	"""Get comprehensive supplier dashboard data"""
+@instrument_endpoint
+def get_dashboard_data(company=None, period="All Time", from_date=None, to_date=None, fiscal_year=None, stream=0, stream_id=None):
+	"""
+	Get comprehensive supplier dashboard data
+	With stream set, sections are pushed over realtime as they are computed
+	(see apex_dashboard.dashboard_stream).
+	"""
+	from apex_dashboard.cache_utils import get_cached_dashboard
+	from apex_dashboard.dashboard_stream import stream_dashboard
+
 	if not company:
 		company = frappe.defaults.get_user_default("Company")
 	
 	# Determine Date Range
 	if fiscal_year:
-		from_date, to_date = frappe.db.get_value("Fiscal Year", fiscal_year, ["year_start_date", "year_end_date"])
+		from_date, to_date = frappe.get_cached_value("Fiscal Year", fiscal_year, ["year_start_date", "year_end_date"])
 	elif period == "Custom" and from_date and to_date:
 		from_date = getdate(from_date)
 		to_date = getdate(to_date)
@@ -123,13 +55,26 @@ def get_dashboard_data(company=None, period="All Time", from_date=None, to_date=
 		if not period:
 			period = "All Time"
 		from_date, to_date = get_period_dates(period)
-	
-	currency = frappe.get_value("Company", company, "default_currency") or "EGP"
+
+	if cint(stream):
+		return stream_dashboard("suppliers", company, SECTIONS, stream_id=stream_id, from_date=from_date, to_date=to_date)
+
+	return get_cached_dashboard("suppliers", company, build_dashboard_data, from_date=from_date, to_date=to_date)
+
+def build_dashboard_data(company, from_date, to_date):
+	"""Build supplier dashboard data (uncached)"""
+	from apex_dashboard.dashboard_stream import build_sections
+
+	return build_sections(SECTIONS, company=company, from_date=from_date, to_date=to_date)
+
+def get_payables_section(company, from_date, to_date):
+	"""Total Payables (Outstanding Purchase Invoices) - Grouped by Currency"""
+	from_date, to_date = getdate(from_date), getdate(to_date)
+	currency = frappe.get_cached_value("Company", company, "default_currency") or "EGP"
 	
 	# Get exchange rates
-	exchange_rates = get_exchange_rates()
+	exchange_rates = rates_for(DASHBOARD_CURRENCIES)
 	
-	# 1. Total Payables (Outstanding Purchase Invoices) - Grouped by Currency
 	# Filter by posting_date to show outstanding invoices FROM that period
 	payables_data = frappe.db.sql("""
 		SELECT 
@@ -176,7 +121,19 @@ def get_dashboard_data(company=None, period="All Time", from_date=None, to_date=
 		# Add to total in EGP
 		total_payables_egp += d.get('outstanding', 0) * exchange_rates.get(curr, 1.0)
 	
-	# Calculate Total Purchase Volume (all invoices, not just outstanding)
+	return {
+		'currency': currency,
+		'exchange_rates': exchange_rates,
+		'total_payables_egp': total_payables_egp,
+		'payables_breakdown': payables_breakdown,
+		'payables_by_currency': payables_by_currency
+	}
+
+def get_purchase_volume_section(company, from_date, to_date):
+	"""Total Purchase Volume (all invoices, not just outstanding)"""
+	from_date, to_date = getdate(from_date), getdate(to_date)
+	exchange_rates = rates_for(DASHBOARD_CURRENCIES)
+	
 	total_purchase_data = frappe.db.sql("""
 		SELECT 
 			pi.currency,
@@ -196,7 +153,16 @@ def get_dashboard_data(company=None, period="All Time", from_date=None, to_date=
 		purchase_breakdown[curr] = d.get('total', 0)
 		total_purchase_egp += d.get('total', 0) * exchange_rates.get(curr, 1.0)
 	
-	# 2. Total Paid (Payment Entries)
+	return {
+		'exchange_rates': exchange_rates,
+		'total_purchase_egp': total_purchase_egp,
+		'purchase_breakdown': purchase_breakdown
+	}
+
+def get_paid_section(company, from_date, to_date):
+	"""Total Paid (Payment Entries)"""
+	from_date, to_date = getdate(from_date), getdate(to_date)
+	
 	paid_data = frappe.db.sql("""
 		SELECT 
 			pe.party as supplier,
@@ -218,7 +184,17 @@ def get_dashboard_data(company=None, period="All Time", from_date=None, to_date=
 	total_paid = sum(d.get('paid_amount', 0) for d in paid_data)
 	paid_count = sum(d.get('payment_count', 0) for d in paid_data)
 	
-	# 3. Active Suppliers (with transactions in period)
+	return {
+		'paid': {
+			'total': total_paid,
+			'count': paid_count,
+			'details': paid_data[:10],  # Top 10
+			'period': f"{from_date.strftime('%d %b')} - {to_date.strftime('%d %b %Y')}"
+		}
+	}
+
+def get_active_suppliers_section(company, from_date, to_date):
+	"""Active Suppliers (with transactions in period)"""
 	active_suppliers = frappe.db.sql("""
 		SELECT DISTINCT pi.supplier, s.supplier_name, s.supplier_group
 		FROM `tabPurchase Invoice` pi
@@ -228,7 +204,7 @@ def get_dashboard_data(company=None, period="All Time", from_date=None, to_date=
 			AND pi.posting_date BETWEEN %s AND %s
 			AND s.disabled = 0
 		ORDER BY s.supplier_name
-	""", (company, from_date, to_date), as_dict=1)
+	""", (company, getdate(from_date), getdate(to_date)), as_dict=1)
 	
 	# Group by supplier group
 	supplier_groups = {}
@@ -241,7 +217,15 @@ def get_dashboard_data(company=None, period="All Time", from_date=None, to_date=
 			'code': sup.get('supplier')
 		})
 	
-	# 4. Overdue Payments - Grouped by Currency
+	return {
+		'active_suppliers': {
+			'total': len(active_suppliers),
+			'groups': supplier_groups
+		}
+	}
+
+def get_overdue_section(company, from_date, to_date):
+	"""Overdue Payments - Grouped by Currency"""
 	overdue_data = frappe.db.sql("""
 		SELECT 
 			pi.supplier,
@@ -260,7 +244,7 @@ def get_dashboard_data(company=None, period="All Time", from_date=None, to_date=
 			AND s.disabled = 0
 		GROUP BY pi.supplier, pi.currency
 		ORDER BY pi.currency, overdue_amount DESC
-	""", (company, from_date, to_date), as_dict=1)
+	""", (company, getdate(from_date), getdate(to_date)), as_dict=1)
 	
 	# Group by currency
 	overdue_by_currency = {}
@@ -276,7 +260,12 @@ def get_dashboard_data(company=None, period="All Time", from_date=None, to_date=
 		overdue_by_currency[curr]['count'] += d.get('overdue_count', 0)
 		overdue_by_currency[curr]['details'].append(d)
 	
-	# 5. Top Suppliers by Total Purchase Volume - With Currency and EGP Conversion
+	return {'overdue_by_currency': overdue_by_currency}
+
+def get_top_suppliers_section(company, from_date, to_date):
+	"""Top Suppliers by Total Purchase Volume - With Currency and EGP Conversion"""
+	exchange_rates = rates_for(DASHBOARD_CURRENCIES)
+	
 	# Build CASE statement for exchange rates
 	rate_cases = []
 	for curr, rate in exchange_rates.items():
@@ -304,26 +293,19 @@ def get_dashboard_data(company=None, period="All Time", from_date=None, to_date=
 		GROUP BY pi.supplier, pi.currency
 		ORDER BY total_purchase_egp DESC
 		LIMIT 20
-	""", (company, from_date, to_date), as_dict=1)
+	""", (company, getdate(from_date), getdate(to_date)), as_dict=1)
 	
 	return {
-		'currency': currency,
 		'exchange_rates': exchange_rates,
-		'total_payables_egp': total_payables_egp,
-		'payables_breakdown': payables_breakdown,
-		'total_purchase_egp': total_purchase_egp,
-		'purchase_breakdown': purchase_breakdown,
-		'payables_by_currency': payables_by_currency,
-		'paid': {
-			'total': total_paid,
-			'count': paid_count,
-			'details': paid_data[:10],  # Top 10
-			'period': f"{from_date.strftime('%d %b')} - {to_date.strftime('%d %b %Y')}"
-		},
-		'active_suppliers': {
-			'total': len(active_suppliers),
-			'groups': supplier_groups
-		},
-		'overdue_by_currency': overdue_by_currency,
 		'top_suppliers': top_suppliers
 	}
+
+# Independent parts of the payload, computed in parallel when streamed
+SECTIONS = {
+	'payables': get_payables_section,
+	'purchase_volume': get_purchase_volume_section,
+	'paid': get_paid_section,
+	'active_suppliers': get_active_suppliers_section,
+	'overdue': get_overdue_section,
+	'top_suppliers': get_top_suppliers_section,
+}
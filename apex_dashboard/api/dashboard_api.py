@@ -3,8 +3,10 @@ from frappe import _
 from frappe.query_builder import DocType
 from frappe.utils import flt, getdate, today
 from apex_dashboard.query_utils import get_gl_balances
+from apex_dashboard.metrics import instrument_endpoint
 
 @frappe.whitelist()
+@instrument_endpoint
 def get_dashboard_stats(dashboard_name):
     """
     Get statistics for a specific dashboard.
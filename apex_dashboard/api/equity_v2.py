@@ -1,15 +1,65 @@
 import frappe
 from frappe import _
-from frappe.query_builder import DocType
-from frappe.utils import flt, getdate, add_months, today, get_first_day, get_last_day
-from frappe.query_builder.functions import Sum, Coalesce, Extract
+from frappe.query_builder import Case, DocType
+from frappe.utils import flt, getdate, add_days, add_months, today, get_first_day, get_last_day
+from frappe.query_builder.functions import Sum, Max, Extract
+from pypika.analytics import RowNumber
+from apex_dashboard.equity_partners import WITHDRAWAL, get_partner_map, get_role_from_name
+from apex_dashboard.fiscal_calendar import get_fiscal_year_start
+from apex_dashboard.metrics import instrument_endpoint
+from apex_dashboard.yearly_profits import get_open_years_start, get_yearly_profits
+
+# Recent withdrawals shown per partner
+RECENT_WITHDRAWALS = 5
+# Recent withdrawals kept per partner by the engine (the legacy endpoint shows them all)
+MAX_RECENT_WITHDRAWALS = 10
+OTHER_PARTNER = "Other"
 
 @frappe.whitelist()
+@instrument_endpoint
 def get_dashboard_data(company=None, period="This Month", from_date=None, to_date=None):
     """
     Get Equity Dashboard Data (v2).
-    Strictly uses Query Builder and handles historical data correctly.
+    Thin wrapper over the cached equity engine (get_equity_data).
+    """
+    data = get_equity_data(company, period, from_date, to_date)
+    
+    return {
+        "company": data["company"],
+        "currency": data["currency"],
+        "period": {
+            "label": period,
+            "from_date": data["from_date"],
+            "to_date": data["to_date"]
+        },
+        "metrics": {
+            "total_equity": data["total_equity"],
+            "retained_earnings": data["retained_earnings"],
+            "ytd_profit": data["ytd_profit"],
+            "yearly_profits": data["yearly_profits"]
+        },
+        "partners": [
+            {
+                **partner,
+                "name": _(partner["name"]) if partner["name"] == OTHER_PARTNER else partner["name"],
+                "recent_withdrawals": partner["recent_withdrawals"][:RECENT_WITHDRAWALS]
+            }
+            for partner in data["partners"]
+        ],
+        "computed_at": data.get("computed_at")
+    }
+
+def get_equity_data(company=None, period="This Month", from_date=None, to_date=None):
+    """
+    Get the equity engine payload of a company and period.
+    Shared by this endpoint and api.finance_api.get_dashboard_data, so both
+    read one cache entry per company and date range (stale-while-revalidate).
+    
+    Returns:
+        dict: See build_equity_data, stamped with computed_at
     """
+    from apex_dashboard.cache_utils import get_cached_dashboard
+
     if not company:
         company = frappe.defaults.get_user_default("Company")
         
@@ -19,130 +69,135 @@ def get_dashboard_data(company=None, period="This Month", from_date=None, to_dat
         to_date = getdate(to_date)
     else:
         from_date, to_date = get_period_dates(period)
+    
+    # YTD profit runs from the start of the fiscal year for This Year, else from the period start
+    ytd_from_date = from_date
+    if period == "This Year":
+        ytd_from_date = get_fiscal_year_start(to_date, company, default=from_date)
         
-    currency = frappe.get_cached_value('Company', company, 'default_currency')
+    return get_cached_dashboard(
+        "equity_v2",
+        company,
+        build_equity_data,
+        stale_while_revalidate=True,
+        from_date=from_date,
+        to_date=to_date,
+        ytd_from_date=ytd_from_date
+    )
+
+def build_equity_data(company, from_date, to_date, ytd_from_date):
+    """
+    Build the equity engine payload (uncached).
     
-    # 2. Fetch Data
-    # A. Total Equity (Assets - Liabilities) or (Credit - Debit of Equity Accounts)
-    # We use Equity Accounts approach for direct correlation with the dashboard purpose.
-    total_equity = get_total_equity(company, to_date)
+    Returns:
+        dict: company, currency, from_date, to_date, ytd_from_date,
+            total_equity, retained_earnings, ytd_profit, yearly_profits and
+            partners (see get_partner_equity)
+    """
+    currency = frappe.get_cached_value('Company', company, 'default_currency')
     
+    # 2. Fetch Data in one pass over GL x Account
+    # A. Total Equity: Credit - Debit of Equity Accounts (direct correlation with the dashboard purpose)
     # B. Yearly Profits (Operating Profit - Excluding Closing Entries)
-    yearly_profits = get_yearly_profits(company)
+    # C. Per-account Equity Balances and YTD Profit for the Partner Breakdown
+    totals = get_equity_totals(company, ytd_from_date, to_date)
     
-    # C. Partner Breakdown
-    partners, retained_earnings, ytd_profit = get_partner_equity(company, to_date, from_date)
+    partners, retained_earnings = get_partner_equity(company, totals.account_balances)
     
     return {
         "company": company,
         "currency": currency,
-        "period": {
-            "label": period,
-            "from_date": from_date,
-            "to_date": to_date
-        },
-        "metrics": {
-            "total_equity": total_equity,
-            "retained_earnings": retained_earnings,
-            "ytd_profit": ytd_profit,
-            "yearly_profits": yearly_profits
-        },
+        "from_date": from_date,
+        "to_date": to_date,
+        "ytd_from_date": ytd_from_date,
+        "total_equity": totals.total_equity,
+        "retained_earnings": retained_earnings,
+        "ytd_profit": totals.ytd_profit,
+        "yearly_profits": totals.yearly_profits,
         "partners": partners
     }
 
-def get_total_equity(company, to_date):
-    """
-    Calculate Total Equity: Sum(Credit - Debit) for all Equity accounts up to to_date.
+def get_equity_totals(company, period_start_date, to_date):
     """
-    gl = DocType("GL Entry")
-    acc = DocType("Account")
-    
-    query = (
-        frappe.qb.from_(gl)
-        .join(acc).on(gl.account == acc.name)
-        .select(Sum(gl.credit - gl.debit).as_("net_equity"))
-        .where(gl.company == company)
-        .where(gl.is_cancelled == 0)
-        .where(acc.root_type == "Equity")
-        .where(gl.posting_date <= to_date)
-    )
-    
-    result = query.run(as_dict=True)
-    return flt(result[0].net_equity) if result and result[0].net_equity else 0.0
+    Aggregate the equity dashboard metrics with one scan of the company's GL.
+    Rows are grouped by year and, for Equity accounts, by account, and each
+    metric sums only the rows it needs (conditional aggregation):
+    - equity: Credit - Debit of Equity accounts up to to_date
+    - profit: Income - Expense of the open years, excluding Period Closing
+      Vouchers; closed years come from the frozen yearly profits
+    - period_profit: the same, from the start of the selected period to to_date
 
-def get_yearly_profits(company):
-    """
-    Get Yearly Profits (Income - Expense).
-    CRITICAL: Exclude 'Period Closing Voucher' to show operating profit.
+    Returns:
+        frappe._dict: total_equity, ytd_profit, yearly_profits (newest year
+            first) and account_balances (account rows with name, account_name, balance)
     """
     gl = DocType("GL Entry")
     acc = DocType("Account")
+    open_from = get_open_years_start(company)
     
-    query = (
-        frappe.qb.from_(gl)
-        .join(acc).on(gl.account == acc.name)
-        .select(
-            Extract('year', gl.posting_date).as_("year"),
-            Sum(gl.credit - gl.debit).as_("profit")
-        )
-        .where(gl.company == company)
-        .where(gl.is_cancelled == 0)
-        .where(gl.voucher_type != "Period Closing Voucher") # EXCLUDE CLOSING ENTRIES
-        .where(acc.root_type.isin(["Income", "Expense"]))
-        .groupby(Extract('year', gl.posting_date))
-        .orderby(Extract('year', gl.posting_date), order=frappe.qb.desc)
-    )
-    
-    return query.run(as_dict=True)
-
-def get_partner_equity(company, to_date, period_start_date):
-    """
-    Calculate Equity per Partner, Retained Earnings, and YTD Profit.
-    """
-    # 1. Get Balances for all Equity Accounts
-    gl = DocType("GL Entry")
-    acc = DocType("Account")
+    is_equity = acc.root_type == "Equity"
+    # CRITICAL: Exclude closing entries to show operating profit
+    is_operating_profit = acc.root_type.isin(["Income", "Expense"]) & (gl.voucher_type != "Period Closing Voucher")
+    in_open_years = gl.posting_date >= open_from
+    in_period = gl.posting_date[period_start_date:to_date]
+    net = gl.credit - gl.debit
+    equity_account = Case().when(is_equity, acc.name)
+    year = Extract('year', gl.posting_date)
     
     query = (
         frappe.qb.from_(gl)
         .join(acc).on(gl.account == acc.name)
         .select(
-            acc.name,
-            acc.account_name,
-            Sum(gl.credit - gl.debit).as_("balance")
+            equity_account.as_("account"),
+            Max(Case().when(is_equity, acc.account_name)).as_("account_name"),
+            year.as_("year"),
+            Sum(Case().when(is_equity & (gl.posting_date <= to_date), net).else_(0)).as_("equity"),
+            Sum(Case().when(is_operating_profit & in_open_years, net).else_(0)).as_("profit"),
+            Sum(Case().when(is_operating_profit & in_period, net).else_(0)).as_("period_profit")
         )
         .where(gl.company == company)
         .where(gl.is_cancelled == 0)
-        .where(acc.root_type == "Equity")
-        .where(gl.posting_date <= to_date)
-        .groupby(acc.name)
+        # Income/Expense rows of closed years only matter inside the period
+        .where(is_equity | (acc.root_type.isin(["Income", "Expense"]) & (in_open_years | in_period)))
+        .groupby(equity_account, year)
     )
     
-    account_balances = query.run(as_dict=True)
+    totals = frappe._dict(total_equity=0.0, ytd_profit=0.0, yearly_profits=[], account_balances=[])
+    open_profits = {}
+    account_balances = {}
     
-    # 2. Calculate YTD Profit (Separate Query for Income/Expense)
-    # This is "Current Period Profit" usually shown in Equity
-    ytd_query = (
-        frappe.qb.from_(gl)
-        .join(acc).on(gl.account == acc.name)
-        .select(Sum(gl.credit - gl.debit).as_("profit"))
-        .where(gl.company == company)
-        .where(gl.is_cancelled == 0)
-        .where(acc.root_type.isin(["Income", "Expense"]))
-        .where(gl.posting_date >= period_start_date) # From start of selected period (usually year start)
-        .where(gl.posting_date <= to_date)
-        .where(gl.voucher_type != "Period Closing Voucher") # CRITICAL: Exclude closing entries
-    )
-    
-    # If period is "This Year", we want YTD from start of year
-    # If period is "All Time", this might just be total retained earnings?
-    # Let's stick to the logic: YTD Profit is strictly Income - Expense for the requested period.
+    for row in query.run(as_dict=True):
+        totals.ytd_profit += flt(row.period_profit)
+        if row.account:
+            totals.total_equity += flt(row.equity)
+            balance = account_balances.setdefault(
+                row.account, frappe._dict(name=row.account, account_name=row.account_name, balance=0.0)
+            )
+            balance.balance += flt(row.equity)
+        elif row.year >= open_from.year:
+            # Only years with Income/Expense postings have a row without account
+            open_profits[row.year] = flt(open_profits.get(row.year)) + flt(row.profit)
     
-    ytd_result = ytd_query.run(as_dict=True)
-    ytd_profit = flt(ytd_result[0].profit) if ytd_result and ytd_result[0].profit else 0.0
+    totals.yearly_profits = get_yearly_profits(company, open_profits)
+    totals.account_balances = list(account_balances.values())
+    return totals
 
+def get_partner_equity(company, account_balances):
+    """
+    Calculate Equity per Partner and Retained Earnings from the Equity account balances.
+    Accounts claimed by an Apex Equity Partner rule go to that partner; of the
+    others, retained earnings are set apart, profit and loss accounts skipped
+    and the rest grouped under Other.
+    
+    Returns:
+        tuple: Partner dicts (name, capital, current, withdrawals, net_equity,
+            accounts, withdrawal_accounts, recent_withdrawals), largest net
+            equity first, and the retained earnings
+    """
     partners = {}
     retained_earnings = 0.0
+    # Account -> (partner, role), compiled from the Apex Equity Partner rules
+    partner_map = get_partner_map(company)
     
     for row in account_balances:
         balance = flt(row.balance)
@@ -150,28 +205,19 @@ def get_partner_equity(company, to_date, period_start_date):
             continue
             
         name_lower = row.account_name.lower()
+        partner_name, role = partner_map.get(row.name) or (None, get_role_from_name(name_lower))
         
-        # Identify Partner/Category
-        # Include "Net Income Summary" in Retained Earnings
-        if "retained earnings" in name_lower or "net income summary" in name_lower:
-            retained_earnings += balance
-            continue
-        
-        # Skip if it's the auto-calculated profit/loss account often present in charts
-        if "profit" in name_lower and "loss" in name_lower:
-             continue
-
-        partner_name = _("Other")
-        if "mohamed gaber" in name_lower:
-            partner_name = "Mohamed Gaber"
-        elif "alsaid" in name_lower or "elsayed" in name_lower:
-            partner_name = "Elsayed Said"
-        else:
-            # Maybe handle unknown partners? For now group as Other or skip?
-            # If it's a Capital/Current account, it likely belongs to a partner.
-            if "capital" not in name_lower and "current" not in name_lower and "withdrawal" not in name_lower:
-                 # Likely some other equity account
-                 pass
+        if not partner_name:
+            # Include "Net Income Summary" in Retained Earnings
+            if "retained earnings" in name_lower or "net income summary" in name_lower:
+                retained_earnings += balance
+                continue
+            
+            # Skip if it's the auto-calculated profit/loss account often present in charts
+            if "profit" in name_lower and "loss" in name_lower:
+                continue
+            
+            partner_name = OTHER_PARTNER
         
         if partner_name not in partners:
             partners[partner_name] = {
@@ -184,16 +230,12 @@ def get_partner_equity(company, to_date, period_start_date):
                 "withdrawal_accounts": []
             }
             
-        # Classify
-        if "capital" in name_lower:
-            partners[partner_name]["capital"] += balance
-        elif "current" in name_lower:
-            partners[partner_name]["current"] += balance
-        elif "withdrawal" in name_lower:
+        # Classify (role is capital, current or withdrawal)
+        if role == WITHDRAWAL:
             partners[partner_name]["withdrawals"] += balance
             partners[partner_name]["withdrawal_accounts"].append(row.name)
         else:
-            partners[partner_name]["current"] += balance # Default to current if unsure
+            partners[partner_name][role] += balance
             
         partners[partner_name]["net_equity"] += balance
         partners[partner_name]["accounts"].append({
@@ -201,29 +243,52 @@ def get_partner_equity(company, to_date, period_start_date):
             "balance": balance
         })
 
-    # Fetch Recent Withdrawals for each partner
-    for p_name, p_data in partners.items():
-        p_data["recent_withdrawals"] = []
-        if p_data["withdrawal_accounts"]:
-            # Fetch last 5 withdrawals
-            w_gl = DocType("GL Entry")
-            w_query = (
-                frappe.qb.from_(w_gl)
-                .select(w_gl.posting_date, w_gl.remarks, (w_gl.debit - w_gl.credit).as_("amount"))
-                .where(w_gl.account.isin(p_data["withdrawal_accounts"]))
-                .where(w_gl.is_cancelled == 0)
-                .where(w_gl.company == company)
-                .orderby(w_gl.posting_date, order=frappe.qb.desc)
-                .limit(5)
-            )
-            withdrawals = w_query.run(as_dict=True)
-            p_data["recent_withdrawals"] = withdrawals
+    # Recent Withdrawals of all partners in one query
+    withdrawal_accounts = [name for p_data in partners.values() for name in p_data["withdrawal_accounts"]]
+    withdrawals = get_recent_withdrawals(company, withdrawal_accounts, MAX_RECENT_WITHDRAWALS)
+    
+    for p_data in partners.values():
+        rows = [row for row in withdrawals if row.account in p_data["withdrawal_accounts"]]
+        p_data["recent_withdrawals"] = [
+            {"posting_date": row.posting_date, "remarks": row.remarks, "amount": row.amount}
+            for row in rows[:MAX_RECENT_WITHDRAWALS]
+        ]
 
     # Convert to list
     partner_list = list(partners.values())
     partner_list.sort(key=lambda x: x["net_equity"], reverse=True)
     
-    return partner_list, retained_earnings, ytd_profit
+    return partner_list, retained_earnings
+
+def get_recent_withdrawals(company, accounts, limit=MAX_RECENT_WITHDRAWALS):
+    """
+    Get the latest `limit` withdrawals of each account, newest first.
+    A partner's latest withdrawals are among the latest of each of their accounts.
+    """
+    if not accounts:
+        return []
+    
+    gl = DocType("GL Entry")
+    ranked = (
+        frappe.qb.from_(gl)
+        .select(
+            gl.account,
+            gl.posting_date,
+            gl.remarks,
+            (gl.debit - gl.credit).as_("amount"),
+            RowNumber().over(gl.account).orderby(gl.posting_date, order=frappe.qb.desc).as_("row_no")
+        )
+        .where(gl.account.isin(accounts))
+        .where(gl.is_cancelled == 0)
+        .where(gl.company == company)
+    )
+    query = (
+        frappe.qb.from_(ranked)
+        .select(ranked.account, ranked.posting_date, ranked.remarks, ranked.amount)
+        .where(ranked.row_no <= limit)
+        .orderby(ranked.posting_date, order=frappe.qb.desc)
+    )
+    return query.run(as_dict=True)
 
 def get_period_dates(period):
     """
@@ -231,7 +296,12 @@ def get_period_dates(period):
     """
     current_date = getdate(today())
     
-    if period == "This Month":
+    if period == "Today":
+        return current_date, current_date
+    elif period == "This Week":
+        start = add_days(current_date, -current_date.weekday())
+        return start, add_days(start, 6)
+    elif period == "This Month":
         return get_first_day(current_date), get_last_day(current_date)
     elif period == "Last Month":
         last_month = add_months(current_date, -1)
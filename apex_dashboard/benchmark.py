@@ -0,0 +1,214 @@
+"""
+Benchmark of the Apex Dashboard endpoints
+Times every dashboard endpoint against the synthetic companies (see
+synthetic_data), cold and warm, and writes a JSON report that can be
+compared between commits. Cold means the dashboard caches (payloads,
+account trees, card plans, account groups, equity partner maps, fiscal
+calendars) were dropped just before the call; MariaDB's own buffers are
+left as they are. Exchange rates come from Currency Exchange, in the
+benchmark process and in any refresh job it enqueues, so no network access
+is needed.
+"""
+
+import statistics
+import subprocess
+
+import frappe
+from frappe import _
+from frappe.utils import now
+
+from apex_dashboard.account_tree import clear_account_tree
+from apex_dashboard.cache_utils import clear_all_dashboard_caches
+from apex_dashboard.card_dashboard import clear_card_index, clear_card_plans
+from apex_dashboard.dashboard.utils import clear_account_group_cache
+from apex_dashboard.dashboard_registry import DASHBOARD_REGISTRY
+from apex_dashboard.equity_partners import clear_partner_maps
+from apex_dashboard.exchange_rates import clear_rates_cache, refresh_rates
+from apex_dashboard.fiscal_calendar import clear_fiscal_calendars
+from apex_dashboard.metrics import capture_call
+from apex_dashboard.synthetic_data import check_test_site, get_synthetic_companies
+from apex_dashboard.yearly_profits import freeze_yearly_profits
+
+REPORT_VERSION = 1
+BENCHMARK_PERIODS = ("This Month", "This Year", "All Time")
+WARM_RUNS = 3
+# Endpoints outside the dashboard registry: (name, method, takes a period)
+EXTRA_ENDPOINTS = (
+    ("equity_enhanced", "apex_dashboard.api.finance_api.get_dashboard_data", True),
+    ("equity_trends", "apex_dashboard.api.finance_api.get_equity_trends", False),
+)
+OFFLINE_RATE_PROVIDER = "apex_dashboard.exchange_rates.currency_exchange_provider"
+
+def get_benchmark_endpoints(dashboards=None):
+    """
+    List the benchmarked endpoints
+    Args:
+        dashboards: Endpoint names to keep (dashboard types or EXTRA_ENDPOINTS
+            names), None for all
+    Returns:
+        list: (name, dotted method path, takes a period) tuples
+    """
+    endpoints = [(spec.dashboard_type, spec.method, True) for spec in DASHBOARD_REGISTRY if spec.method]
+    endpoints += EXTRA_ENDPOINTS
+    if dashboards:
+        endpoints = [endpoint for endpoint in endpoints if endpoint[0] in dashboards]
+    return endpoints
+
+def run_benchmark(companies=None, dashboards=None, periods=BENCHMARK_PERIODS, warm_runs=WARM_RUNS):
+    """
+    Time each endpoint, period and company cold once and warm warm_runs times
+    Args:
+        companies: Company names, default every synthetic company
+        dashboards: Endpoint names, None for all (see get_benchmark_endpoints)
+        periods: Period names passed to the endpoints that take one
+        warm_runs: Warm calls per endpoint; their median is reported
+    Returns:
+        dict: The report, see REPORT_VERSION
+    """
+    check_test_site()
+    companies = companies or get_synthetic_companies()
+    if not companies:
+        frappe.throw(_("No synthetic company found, run bench generate-dashboard-ledger first"))
+
+    # Never call the rate provider's HTTP API: load the offline rates now, and
+    # any refresh enqueued later is passed the offline provider too
+    frappe.local.conf.apex_dashboard_rate_provider = OFFLINE_RATE_PROVIDER
+    clear_rates_cache()
+    refresh_rates(provider=OFFLINE_RATE_PROVIDER)
+
+    endpoints = get_benchmark_endpoints(dashboards)
+    report = {
+        "version": REPORT_VERSION,
+        "site": frappe.local.site,
+        "commit": get_app_commit(),
+        "started_at": now(),
+        "periods": list(periods),
+        "warm_runs": warm_runs,
+        "companies": {},
+    }
+
+    for company in companies:
+        # Closed years are frozen by the daily job on a live site
+        freeze_yearly_profits(company)
+        results = []
+        for name, method, takes_period in endpoints:
+            for period in periods if takes_period else (None,):
+                results.append(benchmark_endpoint(name, method, company, period, warm_runs))
+
+        report["companies"][company] = {
+            "gl_entries": frappe.db.count("GL Entry", {"company": company}),
+            "results": results,
+        }
+
+    report["finished_at"] = now()
+    return report
+
+def benchmark_endpoint(name, method, company, period=None, warm_runs=WARM_RUNS):
+    """
+    Time one endpoint cold then warm
+    Returns:
+        dict: endpoint, period, cold and warm measurements, or error
+    """
+    kwargs = {"company": company}
+    if period:
+        kwargs["period"] = period
+
+    result = {"endpoint": name, "period": period}
+    try:
+        function = frappe.get_attr(method)
+        reset_dashboard_caches()
+        result["cold"] = measure_call(function, kwargs)
+        result["warm"] = summarize_runs([measure_call(function, kwargs) for _run in range(warm_runs)])
+    except Exception as e:
+        frappe.db.rollback()
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+def measure_call(function, kwargs):
+    """Call an endpoint once and return its wall/DB time, queries, rows, payload size and cache result"""
+    with capture_call() as call:
+        data = function(**kwargs)
+    # Endpoints only read, don't hold snapshots across calls
+    frappe.db.rollback()
+
+    return {
+        "wall_ms": round(call.wall_ms, 2),
+        "db_ms": round(call.db_ms, 2),
+        "queries": call.queries,
+        "rows": call.rows,
+        "bytes": len(frappe.as_json(data, indent=None)),
+        "cache": call.cache,
+    }
+
+def summarize_runs(runs):
+    """Median of each measurement over several runs; the fastest wall time is kept too"""
+    if not runs:
+        return None
+    return {
+        "wall_ms": round(statistics.median(run["wall_ms"] for run in runs), 2),
+        "min_wall_ms": min(run["wall_ms"] for run in runs),
+        "db_ms": round(statistics.median(run["db_ms"] for run in runs), 2),
+        "queries": max(run["queries"] for run in runs),
+        "rows": max(run["rows"] for run in runs),
+        "bytes": runs[-1]["bytes"],
+        "cache": sorted({run["cache"] or "none" for run in runs}),
+    }
+
+def reset_dashboard_caches():
+    """Drop every cache the dashboards build on, so the next call is cold"""
+    clear_all_dashboard_caches()
+    clear_account_tree()
+    clear_card_index()
+    clear_card_plans()
+    clear_account_group_cache()
+    clear_partner_maps()
+    clear_fiscal_calendars()
+    if hasattr(frappe.local, "apex_dashboard_exchange_rates"):
+        frappe.local.apex_dashboard_exchange_rates = {}
+
+def get_app_commit():
+    """Commit of the apex_dashboard checkout, None outside a git checkout"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=frappe.get_app_path("apex_dashboard", ".."),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare_reports(baseline, report):
+    """
+    Compare two reports endpoint by endpoint
+    Args:
+        baseline: Earlier report
+        report: Current report
+    Returns:
+        list: One dict per (company, endpoint, period) found in both, with the
+            cold and warm wall times and queries before and after
+    """
+    def index(data):
+        return {
+            (company, result["endpoint"], result["period"]): result
+            for company, entry in data.get("companies", {}).items()
+            for result in entry["results"]
+            if "error" not in result
+        }
+
+    before = index(baseline)
+    rows = []
+    for key, after in index(report).items():
+        if key not in before:
+            continue
+        row = {"company": key[0], "endpoint": key[1], "period": key[2]}
+        for run in ("cold", "warm"):
+            old, new = before[key][run], after[run]
+            row[run] = {
+                "wall_ms": [old["wall_ms"], new["wall_ms"]],
+                "queries": [old["queries"], new["queries"]],
+                "change": round(new["wall_ms"] / old["wall_ms"] - 1, 3) if old["wall_ms"] else None,
+            }
+        rows.append(row)
+    return rows
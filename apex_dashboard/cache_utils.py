@@ -3,7 +3,40 @@ Cache utility functions for Apex Dashboard
 Handles caching and cache invalidation for all dashboards
 """
 
+import time
+
 import frappe
+from frappe.utils import (
+    cint,
+    flt,
+    get_datetime,
+    get_number_format_info,
+    getdate,
+    now,
+    now_datetime,
+    nowdate,
+    time_diff_in_seconds,
+)
+
+from apex_dashboard.account_tree import get_leaf_accounts
+from apex_dashboard.dashboard_registry import get_dashboard_types, get_dependent_dashboards, is_affected
+from apex_dashboard.metrics import note_cache_result
+
+# Dashboard payloads stay valid until the company's ledger version moves,
+# so the TTL only bounds how long unused entries linger in Redis.
+DASHBOARD_CACHE_TTL = 6 * 60 * 60
+# Stale-while-revalidate: entries older than this are refreshed in the background
+DASHBOARD_SOFT_TTL = 10 * 60
+# Last computed payload per request, served while another worker rebuilds
+LAST_VALUE_TTL = 24 * 60 * 60
+# Single-flight rebuild: lock lifetime and how long other requests wait for it
+REBUILD_LOCK_TIMEOUT = 120
+REBUILD_WAIT = 5
+# Sorted set of request counts per dashboard and company, used to order the warm-up
+REQUEST_COUNTS_KEY = "apex_dashboard:request_counts"
+# At most one warm-up job is enqueued by invalidations per this many seconds
+WARMUP_DEBOUNCE = 60
+WARMUP_DEBOUNCE_KEY = "apex_dashboard:warmup_scheduled"
 
 def get_dashboard_cache_key(dashboard_type, user=None):
     """Generate cache key for dashboard"""
@@ -53,40 +86,506 @@ def clear_all_dashboard_caches(doc=None, method=None):
         doc: Document object (passed by Frappe hooks, not used)
         method: Method name (passed by Frappe hooks, not used)
     """
-    dashboards = [
-        'liquidity', 'expense', 'equity', 'tax',
-        'inventory', 'sales', 'crm', 'suppliers', 'test'
-    ]
-    for dashboard in dashboards:
+    for dashboard in get_dashboard_types():
         frappe.cache().delete_keys(f"{dashboard}_dashboard_*")
+
+    # Versioned entries become unreachable once their company version moves
+    for company in frappe.get_all("Company", pluck="name"):
+        frappe.cache().incr(_ledger_version_key(company))
     
     frappe.logger().info("Cleared all dashboard caches")
 
-def get_balances_bulk(account_names, company=None):
+def _ledger_version_key(company):
+    return frappe.cache().make_key(f"apex_dashboard:ledger_version:{company}")
+
+def get_ledger_version(company):
+    """
+    Get the ledger version of a company
+    The version is a Redis counter that moves on company-wide invalidation
+    (clear_all_dashboard_caches or bump_ledger_version); ordinary postings
+    evict only the affected entries (see invalidate_dashboard_caches).
+    Args:
+        company: Company name
+    Returns:
+        int: Current version (0 if nothing was posted since Redis started)
+    """
+    return cint(frappe.cache().get(_ledger_version_key(company)))
+
+def invalidate_dashboard_caches(doc, method=None):
+    """
+    Queue eviction of the dashboard cache entries affected by a document
+    Uses the dependency registry (apex_dashboard.dashboard_registry) to find
+    the dashboards depending on doc.doctype; the entries of doc.company whose
+    date range is touched by doc.posting_date are evicted once the
+    transaction commits, so a voucher and its GL rows cost one flush.
+    This function can be used as a hook (on_submit, on_cancel, etc.)
+    Args:
+        doc: Document object (passed by Frappe hooks)
+        method: Method name (passed by Frappe hooks, not used)
+    """
+    company = doc.get("company")
+    if not company:
+        clear_all_dashboard_caches()
+        return
+
+    posting_date = doc.get("posting_date")
+    posting_date = getdate(posting_date) if posting_date else None
+
+    dependents = get_dependent_dashboards(doc.doctype)
+    if not dependents:
+        return
+
+    pending = _get_pending_invalidations()
+    if not pending:
+        _schedule_flush()
+
+    for dashboard_type, scope in dependents.items():
+        pending.setdefault((dashboard_type, company), set()).add((scope, posting_date))
+
+def flush_pending_invalidations():
+    """
+    Evict the cache entries queued by invalidate_dashboard_caches
+    Called after commit; reads each affected dashboard index once.
+    """
+    pending = _get_pending_invalidations()
+    frappe.local.apex_dashboard_pending_invalidations = {}
+
+    for (dashboard_type, company), changes in pending.items():
+        evict_dashboard_entries(dashboard_type, company, changes)
+
+    if pending:
+        schedule_cache_warmup({company for _dashboard_type, company in pending})
+
+def discard_pending_invalidations():
+    """Drop queued evictions of a rolled back transaction"""
+    frappe.local.apex_dashboard_pending_invalidations = {}
+
+def _get_pending_invalidations():
+    if not hasattr(frappe.local, "apex_dashboard_pending_invalidations"):
+        frappe.local.apex_dashboard_pending_invalidations = {}
+    return frappe.local.apex_dashboard_pending_invalidations
+
+def _schedule_flush():
+    frappe.db.after_commit.add(flush_pending_invalidations)
+    frappe.db.after_rollback.add(discard_pending_invalidations)
+
+def evict_dashboard_entries(dashboard_type, company, changes):
+    """
+    Delete the cached entries of a dashboard affected by postings
+    Args:
+        dashboard_type: Type of dashboard (liquidity, expense, etc.)
+        company: Company name
+        changes: Iterable of (scope, posting_date) pairs; scope as in
+            apex_dashboard.dashboard_registry, posting_date None for any date
+    Returns:
+        int: Number of evicted entries
+    """
+    cache = frappe.cache()
+    index_name = _cache_index_name(dashboard_type, company)
+    evicted = 0
+
+    for cache_key, (from_date, to_date) in cache.hgetall(index_name).items():
+        # Hash fields come back as bytes; delete_value would prefix their repr
+        cache_key = frappe.safe_decode(cache_key)
+        if any(is_affected(scope, posting_date, from_date, to_date) for scope, posting_date in changes):
+            cache.delete_value(cache_key)
+            cache.hdel(index_name, cache_key)
+            evicted += 1
+
+    return evicted
+
+def _cache_index_name(dashboard_type, company):
+    return f"apex_dashboard:cache_index:{dashboard_type}:{company}"
+
+def _register_cache_entry(dashboard_type, company, cache_key, from_date, to_date, ttl):
+    """Remember the date range of a cache entry so invalidation can target it"""
+    cache = frappe.cache()
+    index_name = _cache_index_name(dashboard_type, company)
+    date_range = (getdate(from_date) if from_date else None, getdate(to_date) if to_date else None)
+
+    cache.hset(index_name, cache_key, date_range)
+    cache.expire(cache.make_key(index_name), ttl)
+
+def bump_ledger_version(doc=None, method=None, company=None):
+    """
+    Move the ledger version of a company, invalidating its dashboard caches
+    This function can be used as a hook (on_submit, on_cancel, etc.)
+    Args:
+        doc: Document object (passed by Frappe hooks)
+        method: Method name (passed by Frappe hooks, not used)
+        company: Company name, defaults to doc.company
+    """
+    company = company or (doc and doc.get("company"))
+    if not company:
+        clear_all_dashboard_caches()
+        return
+
+    frappe.cache().incr(_ledger_version_key(company))
+
+def get_versioned_cache_key(dashboard_type, company, *parts):
+    """
+    Generate a cache key stamped with the company's ledger version
+    Args:
+        dashboard_type: Type of dashboard (liquidity, expense, etc.)
+        company: Company name
+        parts: Values identifying the request (dates, filters)
+    Returns:
+        str: Cache key, e.g. liquidity_dashboard_APEX_v12_2025-01-01_2025-01-31
+    """
+    version = get_ledger_version(company)
+    return f"{dashboard_type}_dashboard_{company}_v{version}_{_key_suffix(parts)}"
+
+def get_last_value_key(dashboard_type, company, *parts):
+    """
+    Generate the key of the last computed payload, independent of the version
+    Served to concurrent requests while another worker recomputes.
+    """
+    return f"{dashboard_type}_dashboard_{company}_last_{_key_suffix(parts)}"
+
+def _key_suffix(parts):
+    return "_".join(str(part) for part in parts)
+
+def get_cached_dashboard(
+    dashboard_type,
+    company,
+    builder,
+    ttl=DASHBOARD_CACHE_TTL,
+    stale_while_revalidate=False,
+    soft_ttl=DASHBOARD_SOFT_TTL,
+    **kwargs
+):
     """
-    Get balances for multiple accounts in one query
-    Much faster than calling get_balance_on() for each account
+    Return cached dashboard data, building it on a miss
+    Only one worker rebuilds a missing entry (single-flight); concurrent
+    requests get the last computed payload, or wait briefly for the rebuild.
+    Args:
+        dashboard_type: Type of dashboard (liquidity, expense, etc.)
+        company: Company name (already resolved, not None)
+        builder: Module-level function called as builder(company=company, **kwargs)
+        ttl: Time to live in seconds
+        stale_while_revalidate: Return entries older than soft_ttl (or the last
+            computed payload after an invalidation) immediately and refresh
+            them in a background job
+        soft_ttl: Age in seconds after which an entry is refreshed
+        kwargs: Resolved request parameters; they are part of the cache key,
+            so pass concrete dates rather than relative periods
+    Returns:
+        Dashboard data, stamped with computed_at
+    """
+    if frappe.flags.apex_dashboard_warming:
+        # The warm-up job is the background refresh, so build in place
+        stale_while_revalidate = False
+    else:
+        record_dashboard_request(dashboard_type, company)
+
+    parts = [kwargs[name] for name in sorted(kwargs)]
+    cache_key = get_versioned_cache_key(dashboard_type, company, *parts)
+    data = frappe.cache().get_value(cache_key)
+    if data:
+        if stale_while_revalidate and _is_past_soft_ttl(data, soft_ttl):
+            enqueue_dashboard_refresh(dashboard_type, company, builder, cache_key, ttl, kwargs)
+            note_cache_result("stale")
+        else:
+            note_cache_result("hit")
+        return data
+
+    last_value_key = get_last_value_key(dashboard_type, company, *parts)
+    if stale_while_revalidate:
+        data = frappe.cache().get_value(last_value_key)
+        if data:
+            enqueue_dashboard_refresh(dashboard_type, company, builder, cache_key, ttl, kwargs)
+            note_cache_result("stale")
+            return data
+
+    lock = acquire_rebuild_lock(cache_key)
+    if not lock:
+        data = frappe.cache().get_value(last_value_key)
+        if data:
+            note_cache_result("stale")
+            return data
+        data = wait_for_rebuild(cache_key)
+        if data:
+            note_cache_result("hit")
+            return data
+        # The rebuild is taking too long, compute our own copy
+
+    note_cache_result("miss")
+    try:
+        data = builder(company=company, **kwargs)
+        _store_dashboard_data(dashboard_type, company, cache_key, parts, data, ttl, kwargs)
+    finally:
+        if lock:
+            release_rebuild_lock(cache_key, lock)
+
+    return data
+
+def store_dashboard_data(dashboard_type, company, data, ttl=DASHBOARD_CACHE_TTL, **kwargs):
+    """
+    Store a payload built outside get_cached_dashboard (e.g. by a stream)
+    Args:
+        dashboard_type: Type of dashboard (liquidity, expense, etc.)
+        company: Company name
+        data: Dashboard data, stamped with computed_at
+        ttl: Time to live in seconds
+        kwargs: Request parameters, as passed to get_cached_dashboard
+    """
+    parts = [kwargs[name] for name in sorted(kwargs)]
+    cache_key = get_versioned_cache_key(dashboard_type, company, *parts)
+    _store_dashboard_data(dashboard_type, company, cache_key, parts, data, ttl, kwargs)
+
+def enqueue_dashboard_refresh(dashboard_type, company, builder, cache_key, ttl, kwargs):
+    """
+    Refresh a cache entry in the background unless a rebuild is already running
+    The rebuild lock is taken here and released by the job.
+    """
+    lock = acquire_rebuild_lock(cache_key)
+    if not lock:
+        return
+
+    try:
+        frappe.enqueue(
+            "apex_dashboard.cache_utils.refresh_dashboard_cache",
+            queue="short",
+            dashboard_type=dashboard_type,
+            company=company,
+            builder=f"{builder.__module__}.{builder.__name__}",
+            cache_key=cache_key,
+            lock=lock,
+            ttl=ttl,
+            kwargs=kwargs,
+        )
+    except Exception:
+        release_rebuild_lock(cache_key, lock)
+        frappe.log_error(frappe.get_traceback(), f"Apex Dashboard: Refresh enqueue failed for {cache_key}")
+
+def refresh_dashboard_cache(dashboard_type, company, builder, cache_key, lock, ttl, kwargs):
+    """
+    Background job: rebuild a dashboard payload and store it
+    Args:
+        dashboard_type: Type of dashboard (liquidity, expense, etc.)
+        company: Company name
+        builder: Dotted path of the builder function
+        cache_key: Key the refresh was requested for (owner of the lock)
+        lock: Rebuild lock token taken by enqueue_dashboard_refresh
+        ttl: Time to live in seconds
+        kwargs: Builder keyword arguments
+    """
+    try:
+        data = frappe.get_attr(builder)(company=company, **kwargs)
+        parts = [kwargs[name] for name in sorted(kwargs)]
+        # The ledger version may have moved since the refresh was requested
+        current_key = get_versioned_cache_key(dashboard_type, company, *parts)
+        _store_dashboard_data(dashboard_type, company, current_key, parts, data, ttl, kwargs)
+    finally:
+        release_rebuild_lock(cache_key, lock)
+
+def record_dashboard_request(dashboard_type, company):
+    """Count a request so the warm-up job can start with the busiest dashboards"""
+    cache = frappe.cache()
+    cache.zincrby(cache.make_key(REQUEST_COUNTS_KEY), 1, f"{dashboard_type}|{company}")
+
+def get_dashboard_request_counts():
+    """
+    Get the observed request counts, busiest first
+    Returns:
+        list: (dashboard_type, company, count) tuples
+    """
+    cache = frappe.cache()
+    counts = []
+    for member, score in cache.zrevrange(cache.make_key(REQUEST_COUNTS_KEY), 0, -1, withscores=True):
+        dashboard_type, company = frappe.safe_decode(member).split("|", 1)
+        counts.append((dashboard_type, company, int(score)))
+    return counts
+
+def schedule_cache_warmup(companies=None):
+    """
+    Enqueue the warm-up job after an invalidation
+    Debounced, so a burst of postings leads to a single job.
+    Args:
+        companies: Companies whose caches were evicted, None for all
+    """
+    cache = frappe.cache()
+    if not cache.set(cache.make_key(WARMUP_DEBOUNCE_KEY), 1, nx=True, ex=WARMUP_DEBOUNCE):
+        return
+
+    frappe.enqueue(
+        "apex_dashboard.cache_warmup.warm_dashboard_caches",
+        queue="long",
+        companies=sorted(companies) if companies else None,
+    )
+
+def _is_past_soft_ttl(data, soft_ttl):
+    computed_at = isinstance(data, dict) and data.get("computed_at")
+    if not computed_at:
+        return True
+    return time_diff_in_seconds(now_datetime(), get_datetime(computed_at)) > soft_ttl
+
+def _store_dashboard_data(dashboard_type, company, cache_key, parts, data, ttl, kwargs):
+    if isinstance(data, dict):
+        data["computed_at"] = now()
+
+    cache = frappe.cache()
+    cache.set_value(cache_key, data, expires_in_sec=ttl)
+    cache.set_value(
+        get_last_value_key(dashboard_type, company, *parts), data, expires_in_sec=LAST_VALUE_TTL
+    )
+    _register_cache_entry(
+        dashboard_type, company, cache_key, kwargs.get("from_date"), kwargs.get("to_date"), ttl
+    )
+
+def acquire_rebuild_lock(cache_key, timeout=REBUILD_LOCK_TIMEOUT):
+    """
+    Try to take the single-flight lock for rebuilding a cache entry
+    Args:
+        cache_key: Cache key being rebuilt
+        timeout: Seconds after which the lock expires (crashed workers)
+    Returns:
+        str: Lock token if acquired, None if another worker holds it
+    """
+    token = frappe.generate_hash(length=12)
+    if frappe.cache().set(_lock_key(cache_key), token, nx=True, ex=timeout):
+        return token
+    return None
+
+def release_rebuild_lock(cache_key, token):
+    """Release the rebuild lock if it is still ours"""
+    cache = frappe.cache()
+    lock_key = _lock_key(cache_key)
+    if frappe.safe_decode(cache.get(lock_key) or b"") == token:
+        cache.delete(lock_key)
+
+def _lock_key(cache_key):
+    return frappe.cache().make_key(f"apex_dashboard:rebuild_lock:{cache_key}")
+
+def wait_for_rebuild(cache_key, wait=REBUILD_WAIT):
+    """Poll for the entry being rebuilt by another worker"""
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        time.sleep(0.1)
+        data = get_shared_value(cache_key)
+        if data:
+            return data
+    return None
+
+def get_shared_value(cache_key):
+    """
+    Read a cache entry from Redis, not from the request-local copy
+    get_value keeps its first result for the rest of the request, a miss
+    included, so it never sees an entry another worker writes later.
+    """
+    cache = frappe.cache()
+    frappe.local.cache.pop(cache.make_key(cache_key), None)
+    return cache.get_value(cache_key, expires=True)
+
+def get_balances_bulk(account_names, company=None, date=None):
+    """
+    Get balances for multiple accounts with one grouped GL query
+    Matches erpnext.accounts.utils.get_balance_on for each account:
+    cancelled entries are ignored, Profit and Loss accounts only count the
+    fiscal year of `date` (without Period Closing Vouchers), group accounts
+    sum their subtree and amounts are rounded per entry to the currency
+    precision. Account permissions are not checked.
     
     Args:
-        account_names: List of account names
+        account_names: List of account names (ledger or group)
         company: Company name (optional)
+        date: Balance as of this date (default: all entries)
     
     Returns:
-        Dict mapping account name to balance
+        Dict mapping account name to frappe._dict with
+        balance (account currency), balance_in_company_currency and
+        account_currency
     """
     if not account_names:
         return {}
     
-    from erpnext.accounts.utils import get_balance_on
+    from erpnext.accounts.utils import FiscalYearError, get_fiscal_year
     
-    # For now, we'll still use get_balance_on but we can optimize later
-    # with a custom SQL query if needed
-    balances = {}
-    for account in account_names:
+    # Like get_balance_on, no date means every entry, even future-dated ones
+    as_of_date = getdate(date) if date else None
+    date = as_of_date or getdate(nowdate())
+    Account = frappe.qb.DocType("Account")
+    
+    accounts = (
+        frappe.qb.from_(Account)
+        .select(Account.name, Account.is_group, Account.report_type, Account.account_currency, Account.company)
+        .where(Account.name.isin(list(account_names)))
+        .run(as_dict=True)
+    )
+    
+    # Group accounts are expanded to the ledgers of their subtree
+    ledgers = {
+        acc.name: get_leaf_accounts(acc.name, acc.company) if acc.is_group else [acc.name]
+        for acc in accounts
+    }
+    
+    # Fiscal year start per company, for the Profit and Loss window
+    year_starts = {}
+    for acc_company in {acc.company for acc in accounts}:
         try:
-            balances[account] = get_balance_on(account, company=company)
-        except Exception as e:
-            frappe.logger().error(f"Error getting balance for {account}: {str(e)}")
-            balances[account] = 0.0
+            year_starts[acc_company] = get_fiscal_year(date, company=acc_company, verbose=0)[1]
+        except FiscalYearError:
+            if date > getdate(nowdate()):
+                year_starts[acc_company] = get_fiscal_year(nowdate(), company=acc_company, verbose=0)[1]
+            else:
+                # Older than any fiscal year, get_balance_on returns 0.0
+                year_starts[acc_company] = None
+    
+    leaf_names = sorted({leaf for names in ledgers.values() for leaf in names})
+    totals = {}
+    if leaf_names:
+        precision = _get_currency_precision()
+        year_start_case = " ".join("WHEN %s THEN %s" for _company in year_starts)
+        year_start_values = [value for item in year_starts.items() for value in item]
+        conditions = ""
+        values = []
+        if as_of_date:
+            conditions += " AND gle.posting_date <= %s"
+            values.append(as_of_date)
+        if company:
+            conditions += " AND gle.company = %s"
+            values.append(company)
+        
+        rows = frappe.db.sql(f"""
+            SELECT
+                gle.account,
+                gle.posting_date >= (CASE gle.company {year_start_case} END)
+                    AND gle.voucher_type != 'Period Closing Voucher' AS in_fiscal_year,
+                SUM(ROUND(gle.debit_in_account_currency, {precision}))
+                    - SUM(ROUND(gle.credit_in_account_currency, {precision})) AS balance,
+                SUM(ROUND(gle.debit, {precision})) - SUM(ROUND(gle.credit, {precision})) AS balance_in_company_currency
+            FROM `tabGL Entry` gle
+            WHERE gle.account IN %s
+                AND gle.is_cancelled = 0
+                {conditions}
+            GROUP BY gle.account, in_fiscal_year
+        """, [*year_start_values, leaf_names, *values], as_dict=True)
+        
+        for row in rows:
+            totals[(row.account, bool(row.in_fiscal_year))] = row
+    
+    balances = {}
+    for acc in accounts:
+        balance = frappe._dict(balance=0.0, balance_in_company_currency=0.0, account_currency=acc.account_currency)
+        balances[acc.name] = balance
+        if year_starts.get(acc.company) is None:
+            continue
+        
+        # Profit and Loss accounts only count the current fiscal year
+        windows = (True,) if acc.report_type == "Profit and Loss" else (True, False)
+        for leaf in ledgers[acc.name]:
+            for window in windows:
+                row = totals.get((leaf, window))
+                if row:
+                    balance.balance += flt(row.balance)
+                    balance.balance_in_company_currency += flt(row.balance_in_company_currency)
     
     return balances
+
+def _get_currency_precision():
+    """Currency precision as used by get_balance_on"""
+    precision = cint(frappe.db.get_default("currency_precision"))
+    if not precision:
+        number_format = frappe.db.get_default("number_format") or "#,###.##"
+        precision = get_number_format_info(number_format)[2]
+    return precision
@@ -0,0 +1,94 @@
+"""
+Cache pre-warming for Apex Dashboard
+Rebuilds the common period/company combinations of every registered dashboard
+in a background job, so the first request after an invalidation is a hit.
+"""
+
+import time
+
+import frappe
+
+from apex_dashboard.cache_utils import get_dashboard_request_counts
+from apex_dashboard.dashboard_registry import DASHBOARD_REGISTRY
+
+# Periods warmed for every dashboard, most requested first
+WARM_PERIODS = ("Today", "This Month", "This Year", "All Time")
+# Seconds a warm-up run may spend before leaving the rest to the next run
+WARM_TIME_BUDGET = 10 * 60
+
+def warm_dashboard_caches(companies=None, dashboards=None, periods=WARM_PERIODS, time_budget=WARM_TIME_BUDGET):
+    """
+    Build the cache entries of the common dashboard requests
+    Runs from the scheduler and after invalidations (see
+    cache_utils.schedule_cache_warmup). Dashboard/company pairs are warmed
+    in order of observed request frequency; dashboards flagged prewarm=False
+    in the registry are only warmed once someone has requested them.
+    Args:
+        companies: Company names, None for all companies
+        dashboards: Dashboard types, None for all registered dashboards
+        periods: Period names passed to the dashboard endpoints
+        time_budget: Seconds after which the remaining requests are skipped
+    Returns:
+        dict: Number of warmed, failed and skipped requests
+    """
+    deadline = time.monotonic() + time_budget
+    plan = get_warmup_plan(companies, dashboards)
+    result = {"warmed": 0, "failed": 0, "skipped": 0}
+
+    frappe.flags.apex_dashboard_warming = True
+    try:
+        for index, (spec, company) in enumerate(plan):
+            if time.monotonic() >= deadline:
+                result["skipped"] = (len(plan) - index) * len(periods)
+                break
+
+            method = frappe.get_attr(spec.method)
+            for period in periods:
+                try:
+                    method(company=company, period=period)
+                    result["warmed"] += 1
+                except Exception:
+                    result["failed"] += 1
+                    frappe.log_error(
+                        title=f"Dashboard cache warm-up failed: {spec.dashboard_type}",
+                        message=f"Company: {company}, Period: {period}\n\n{frappe.get_traceback()}",
+                    )
+                finally:
+                    # Builders only read, don't hold snapshots across the run
+                    frappe.db.rollback()
+    finally:
+        frappe.flags.apex_dashboard_warming = False
+
+    frappe.logger().info(f"Dashboard cache warm-up: {result}")
+    return result
+
+def get_warmup_plan(companies=None, dashboards=None):
+    """
+    List the (DashboardSpec, company) pairs to warm, busiest first
+    Args:
+        companies: Company names, None for all companies
+        dashboards: Dashboard types, None for all registered dashboards
+    Returns:
+        list: (DashboardSpec, company) tuples
+    """
+    companies = companies or frappe.get_all("Company", pluck="name")
+    specs = {
+        spec.dashboard_type: spec
+        for spec in DASHBOARD_REGISTRY
+        if spec.method and (not dashboards or spec.dashboard_type in dashboards)
+    }
+
+    request_counts = {
+        (dashboard_type, company): count for dashboard_type, company, count in get_dashboard_request_counts()
+    }
+
+    plan = []
+    for dashboard_type, spec in specs.items():
+        for company in companies:
+            count = request_counts.get((dashboard_type, company), 0)
+            if spec.prewarm or count:
+                plan.append((count, spec, company))
+
+    # Stable sort keeps registry order between equally busy dashboards
+    plan.sort(key=lambda entry: entry[0], reverse=True)
+    return [(spec, company) for _count, spec, company in plan]
@@ -0,0 +1,234 @@
+"""
+Card dashboard engine for Apex Dashboard
+Builds the config-card dashboards (sales, crm, tax, test, template_dashboard_NN)
+from a cached per-category card plan compiled from Apex Dashboard Config.
+"""
+
+import hashlib
+
+import frappe
+from frappe.utils import add_days, add_months, flt, get_first_day, get_last_day, getdate, today
+
+from apex_dashboard.account_tree import get_account, get_account_tree, get_leaf_accounts
+from apex_dashboard.cache_utils import get_cached_dashboard
+from apex_dashboard.query_utils import get_gl_balances
+
+CARD_PLAN_TTL = 24 * 60 * 60
+CARD_INDEX_KEY = "apex_dashboard:card_index"
+
+def get_card_dashboard_data(dashboard_type, category=None, company=None, period="This Month", from_date=None, to_date=None):
+    """
+    Get the data of a config-card dashboard page
+    Args:
+        dashboard_type: Dashboard type of the page (see dashboard_registry)
+        category: Apex Dashboard Card category shown on the page, defaults to
+            the category of the Apex Dashboard named dashboard_type
+        company: Company name, defaults to the user's default company
+        period: Period name, or "Custom" with from_date and to_date
+    Returns:
+        dict: total, currency, groups (one per card title) and period
+    """
+    if not company:
+        company = frappe.defaults.get_user_default("Company")
+
+    if not category:
+        category = frappe.get_cached_value("Apex Dashboard", dashboard_type, "category") or "General"
+
+    # Use custom dates if provided, otherwise calculate from period
+    if period == "Custom" and from_date and to_date:
+        from_date = getdate(from_date)
+        to_date = getdate(to_date)
+    else:
+        from_date, to_date = get_period_dates(period)
+
+    # A config or card change yields a new plan version, and so a new cache key
+    plan = get_card_plan(category)
+
+    return get_cached_dashboard(
+        dashboard_type,
+        company,
+        build_card_dashboard_data,
+        category=category,
+        plan_version=plan["version"],
+        from_date=from_date,
+        to_date=to_date,
+    )
+
+def build_card_dashboard_data(company, category, from_date, to_date, plan_version=None):
+    """Build card dashboard data (uncached)"""
+    currency = frappe.get_cached_value("Company", company, "default_currency")
+    plan = get_card_plan(category)
+
+    leaf_accounts = sorted({leaf["name"] for card in plan["cards"] for leaf in card["leaves"]})
+    balances = get_gl_balances(leaf_accounts, from_date, to_date, company=company, group_by_currency=False)
+
+    categories = {}
+    total = 0.0
+
+    for card in plan["cards"]:
+        if card["source"] == "Static Value":
+            card_total = card["static_value"]
+            account_details = []
+        else:
+            card_total = 0.0
+            account_details = []
+            for leaf in card["leaves"]:
+                balance = balances.get(leaf["name"], {}).get("amount_base", 0.0)
+                if balance != 0:
+                    card_total += balance
+                    account_details.append({"name": leaf["account_name"], "balance": balance})
+
+            if card_total == 0 and not account_details:
+                continue
+
+        # Rows sharing a card title are shown as one card
+        group = categories.setdefault(card["title"], {
+            "name": card["title"],
+            "total": 0.0,
+            "color": card["color"],
+            "accounts": []
+        })
+        group["total"] += card_total
+        group["accounts"].extend(account_details)
+        group["accounts"].sort(key=lambda x: abs(x["balance"]), reverse=True)
+        total += card_total
+
+    category_list = list(categories.values())
+    category_list.sort(key=lambda x: abs(x["total"]), reverse=True)
+
+    return {
+        "total": total,
+        "currency": currency,
+        "groups": category_list,
+        "period": {
+            "from_date": from_date,
+            "to_date": to_date
+        }
+    }
+
+def get_card_plan(category):
+    """
+    Get the compiled card plan of a category
+    The plan lists the active cards of the category in config order, with
+    their source, color and, for Chart of Accounts cards, the resolved
+    ledger accounts of the subtree. It is cached until the config, a card
+    or an account changes (see clear_card_plans).
+    Args:
+        category: Apex Dashboard Card category
+    Returns:
+        dict: version (hash of the plan) and cards
+    """
+    cache_key = _card_plan_key(category)
+    plan = frappe.cache().get_value(cache_key)
+    if plan is None:
+        plan = compile_card_plan(category)
+        frappe.cache().set_value(cache_key, plan, expires_in_sec=CARD_PLAN_TTL)
+    return plan
+
+def compile_card_plan(category):
+    """Compile the card plan of a category from Apex Dashboard Config (uncached)"""
+    config = frappe.get_cached_doc("Apex Dashboard Config")
+    active_cards = get_active_cards(category)
+    cards = []
+
+    for row in config.cards:
+        card_doc = active_cards.get(row.card)
+        if not card_doc:
+            continue
+
+        card = {
+            "title": card_doc.card_title,
+            "color": card_doc.color,
+            "source": row.card_source,
+            "static_value": 0.0,
+            "account": None,
+            "leaves": []
+        }
+
+        if row.card_source == "Static Value":
+            card["static_value"] = flt(row.static_value)
+        elif row.card_source == "Chart of Accounts" and row.account:
+            account = get_account(row.account)
+            if not account:
+                continue
+
+            # Subtree ledgers of the account's own company, from the cached tree
+            tree = get_account_tree(account.company)
+            card["account"] = row.account
+            card["leaves"] = [
+                {"name": leaf, "account_name": tree["accounts"][leaf].account_name}
+                for leaf in get_leaf_accounts(row.account, account.company)
+            ]
+        else:
+            continue
+
+        cards.append(card)
+
+    version = hashlib.md5(frappe.as_json(cards).encode()).hexdigest()[:12]
+    return {"version": version, "cards": cards}
+
+def get_active_cards(category):
+    """
+    Get the active Apex Dashboard Cards of a category
+    Served from a category index of all active cards, loaded with one query
+    and cached until a card is saved or deleted (see clear_card_index).
+    Args:
+        category: Apex Dashboard Card category
+    Returns:
+        dict: Card name -> card_title, color
+    """
+    index = frappe.cache().get_value(CARD_INDEX_KEY)
+    if index is None:
+        index = {}
+        for card in frappe.get_all(
+            "Apex Dashboard Card",
+            filters={"is_active": 1},
+            fields=["name", "category", "card_title", "color"],
+        ):
+            index.setdefault(card.category, {})[card.name] = frappe._dict(card_title=card.card_title, color=card.color)
+        frappe.cache().set_value(CARD_INDEX_KEY, index, expires_in_sec=CARD_PLAN_TTL)
+
+    return index.get(category, {})
+
+def clear_card_index(doc=None, method=None):
+    """
+    Drop the card index and the card plans built from it
+    This function is used as a hook on Apex Dashboard Card changes.
+    """
+    frappe.cache().delete_value(CARD_INDEX_KEY)
+    clear_card_plans()
+
+def clear_card_plans(doc=None, method=None):
+    """
+    Drop the compiled card plans of every category
+    This function is used as a hook on Apex Dashboard Config and Account
+    changes.
+    """
+    frappe.cache().delete_keys("apex_dashboard:card_plan:")
+
+def _card_plan_key(category):
+    return f"apex_dashboard:card_plan:{category}"
+
+def get_period_dates(period):
+    current_date = getdate(today())
+
+    if period == "Today":
+        return current_date, current_date
+    elif period == "This Week":
+        start = add_days(current_date, -current_date.weekday())
+        end = add_days(start, 6)
+        return start, end
+    elif period == "This Month":
+        return get_first_day(current_date), get_last_day(current_date)
+    elif period == "Last Month":
+        last_month = add_months(current_date, -1)
+        return get_first_day(last_month), get_last_day(last_month)
+    elif period == "This Year":
+        return getdate(f"{current_date.year}-01-01"), getdate(f"{current_date.year}-12-31")
+    elif period == "Last Year":
+        last_year = current_date.year - 1
+        return getdate(f"{last_year}-01-01"), getdate(f"{last_year}-12-31")
+    elif period == "All Time":
+        return getdate("2000-01-01"), current_date
+    else:
+        return get_first_day(current_date), get_last_day(current_date)
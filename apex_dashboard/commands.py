@@ -0,0 +1,115 @@
+"""Bench commands for Apex Dashboard."""
+
+import click
+from frappe.commands import get_site, pass_context
+
+
+@click.command("rebuild-gl-snapshot")
+@click.option("--company", help="Rebuild only this company")
+@click.option("--month", help="Rebuild only the month of this date (YYYY-MM-DD)")
+@pass_context
+def rebuild_gl_snapshot(context, company=None, month=None):
+	"""Rebuild the monthly GL balance snapshot (Apex GL Monthly Balance) from the GL."""
+	import frappe
+
+	from apex_dashboard.gl_snapshot import rebuild_gl_snapshot as rebuild
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		rows = rebuild(company=company, month=month)
+		frappe.db.commit()
+		click.echo(f"Rebuilt {rows} snapshot rows")
+	finally:
+		frappe.destroy()
+
+
+@click.command("generate-dashboard-ledger")
+@click.option("--size", default="10k", help="10k, 1m, 10m or a number of GL entries")
+@click.option("--company", help="Company to fill, default 'Apex Bench <size>'")
+@click.option("--years", default=3, type=int, help="Years of history, ending today")
+@click.option("--seed", default=42, type=int, help="Random seed")
+@click.option("--replace", is_flag=True, help="Delete the company's earlier synthetic ledger first")
+@pass_context
+def generate_dashboard_ledger(context, size="10k", company=None, years=3, seed=42, replace=False):
+	"""Fill a test site with a synthetic company ledger for the dashboard benchmark."""
+	import frappe
+
+	from apex_dashboard.synthetic_data import generate_synthetic_ledger
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		result = generate_synthetic_ledger(size=size, company=company, years=years, seed=seed, replace=replace)
+		click.echo(
+			f"{result['company']}: {result['gl_entries']} GL entries, {result['bins']} bins, "
+			+ ", ".join(f"{count} {voucher_type}" for voucher_type, count in result["vouchers"].items())
+		)
+	finally:
+		frappe.destroy()
+
+
+@click.command("benchmark-dashboards")
+@click.option("--company", multiple=True, help="Company to benchmark, default every synthetic company")
+@click.option("--dashboard", multiple=True, help="Endpoint to benchmark, default all")
+@click.option("--period", multiple=True, help="Period to request, default This Month, This Year and All Time")
+@click.option("--warm-runs", default=3, type=int, help="Warm calls per endpoint")
+@click.option("--output", default="apex_dashboard_benchmark.json", help="Path of the JSON report")
+@click.option("--compare", type=click.Path(exists=True), help="Earlier report to compare with")
+@pass_context
+def benchmark_dashboards(
+	context, company=None, dashboard=None, period=None, warm_runs=3, output=None, compare=None
+):
+	"""Time every dashboard endpoint cold and warm and write a JSON report."""
+	import json
+
+	import frappe
+
+	from apex_dashboard.benchmark import BENCHMARK_PERIODS, compare_reports, run_benchmark
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		report = run_benchmark(
+			companies=list(company) or None,
+			dashboards=list(dashboard) or None,
+			periods=list(period) or BENCHMARK_PERIODS,
+			warm_runs=warm_runs,
+		)
+	finally:
+		frappe.destroy()
+
+	with open(output, "w") as f:
+		json.dump(report, f, indent=1, default=str)
+
+	for company_name, entry in report["companies"].items():
+		click.echo(f"\n{company_name} ({entry['gl_entries']} GL entries)")
+		for result in entry["results"]:
+			label = f"{result['endpoint']} [{result['period'] or '-'}]"
+			if "error" in result:
+				click.echo(f"  {label:<50} ERROR {result['error']}")
+			else:
+				click.echo(
+					f"  {label:<50} cold {result['cold']['wall_ms']:>9.1f} ms {result['cold']['queries']:>4} q"
+					f"   warm {result['warm']['wall_ms']:>8.1f} ms {result['warm']['queries']:>4} q"
+				)
+
+	if compare:
+		with open(compare) as f:
+			baseline = json.load(f)
+		click.echo(f"\nCompared with {compare} ({baseline.get('commit') or 'unknown commit'})")
+		for row in compare_reports(baseline, report):
+			label = f"{row['company']}: {row['endpoint']} [{row['period'] or '-'}]"
+			changes = "   ".join(
+				f"{run} {row[run]['change']:+.0%}" if row[run]["change"] is not None else f"{run} -"
+				for run in ("cold", "warm")
+			)
+			click.echo(f"  {label:<60} {changes}")
+
+	click.echo(f"\nReport written to {output}")
+
+
+commands = [rebuild_gl_snapshot, generate_dashboard_ledger, benchmark_dashboards]
@@ -9,9 +9,10 @@ from typing import Dict, Iterable, List, Optional, Sequence
 import frappe
 from frappe import _
 from frappe.utils import flt, getdate, nowdate
-from erpnext.accounts.utils import get_balance_on
 from erpnext.setup.utils import get_exchange_rate
 
+from apex_dashboard.cache_utils import get_balances_bulk
+
 
 @dataclass(frozen=True)
 class AccountBalance:
@@ -73,39 +74,46 @@ def get_balances_for_accounts(
 	if not accounts:
 		return []
 
+	return get_balances_for_groups({None: accounts}, company=company, posting_date=posting_date)[None]
+
+
+def get_balances_for_groups(
+	groups: Dict[object, Sequence[str]],
+	company: Optional[str] = None,
+	posting_date: Optional[str] = None,
+) -> Dict[object, List[AccountBalance]]:
+	"""Balances of several account groups, read with one GL query for all of them."""
 	posting_date = posting_date or nowdate()
 	posting_date = str(getdate(posting_date))
 	company_currency = get_company_currency(company)
 
-	results: List[AccountBalance] = []
-	for account in accounts:
-		if not account:
-			continue
-
-		try:
-			amount = flt(
-				get_balance_on(
-					company=company,
+	all_accounts = sorted({account for accounts in groups.values() for account in accounts if account})
+	try:
+		bulk = get_balances_bulk(all_accounts, company=company, date=posting_date)
+	except Exception:
+		frappe.log_error(frappe.get_traceback(), "Apex Dashboard: Balance fetch failed")
+		bulk = {}
+
+	results: Dict[object, List[AccountBalance]] = {}
+	for key, accounts in groups.items():
+		results[key] = []
+		for account in accounts:
+			balance = bulk.get(account)
+			if not balance:
+				continue
+
+			amount = flt(balance.balance)
+			account_currency = balance.account_currency or company_currency
+			base_amount = convert_to_company_currency(amount, account_currency, company_currency, posting_date)
+
+			results[key].append(
+				AccountBalance(
 					account=account,
-					date=posting_date,
-					in_account_currency=True,
+					balance=amount,
+					currency=account_currency,
+					base_balance=base_amount,
 				)
 			)
-		except Exception:
-			frappe.log_error(frappe.get_traceback(), f"Apex Dashboard: Balance fetch failed for {account}")
-			continue
-
-		account_currency = frappe.get_cached_value("Account", account, "account_currency") or company_currency
-		base_amount = convert_to_company_currency(amount, account_currency, company_currency, posting_date)
-
-		results.append(
-			AccountBalance(
-				account=account,
-				balance=amount,
-				currency=account_currency,
-				base_balance=base_amount,
-			)
-		)
 
 	return results
 
@@ -122,17 +130,27 @@ def convert_to_company_currency(
 		return flt(amount)
 
 	posting_date = posting_date or nowdate()
+	return flt(amount) * flt(_get_request_exchange_rate(from_currency, to_currency, str(getdate(posting_date))))
 
-	try:
-		rate = get_exchange_rate(from_currency, to_currency, posting_date=posting_date)
-	except Exception:
-		frappe.log_error(
-			frappe.get_traceback(),
-			f"Apex Dashboard: Exchange rate fetch failed {from_currency}->{to_currency}",
-		)
-		rate = 1
 
-	return flt(amount) * flt(rate)
+def _get_request_exchange_rate(from_currency: str, to_currency: str, posting_date: str) -> float:
+	"""Look each currency pair up once per request."""
+	if not hasattr(frappe.local, "apex_dashboard_exchange_rates"):
+		frappe.local.apex_dashboard_exchange_rates = {}
+
+	rates = frappe.local.apex_dashboard_exchange_rates
+	key = (from_currency, to_currency, posting_date)
+	if key not in rates:
+		try:
+			rates[key] = get_exchange_rate(from_currency, to_currency, posting_date=posting_date)
+		except Exception:
+			frappe.log_error(
+				frappe.get_traceback(),
+				f"Apex Dashboard: Exchange rate fetch failed {from_currency}->{to_currency}",
+			)
+			rates[key] = 1
+
+	return rates[key]
 
 
 def summarize_balances_by_currency(entries: Iterable[AccountBalance]) -> Dict[str, float]:
@@ -157,20 +175,24 @@ def get_section_summary(
 		return {"groups": {}, "totals": {}}
 
 	groups: Dict[str, object] = {}
+	group_accounts_map: Dict[str, Sequence[str]] = {}
 	for group_name, descriptor in raw_mapping.items():
-		group_accounts: Sequence[str] = []
-
 		if isinstance(descriptor, dict) and "accounts" in descriptor:
-			group_accounts = descriptor.get("accounts") or []
+			group_accounts_map[group_name] = descriptor.get("accounts") or []
 		elif isinstance(descriptor, (list, tuple)):
-			group_accounts = descriptor
+			group_accounts_map[group_name] = descriptor
 		elif isinstance(descriptor, str):
-			group_accounts = [descriptor]
-		else:
+			group_accounts_map[group_name] = [descriptor]
+
+	section_balances = get_balances_for_groups(group_accounts_map, company=company, posting_date=posting_date)
+
+	for group_name in raw_mapping:
+		if group_name not in group_accounts_map:
 			groups[group_name] = {"balances": [], "totals": {}}
 			continue
 
-		balances = get_balances_for_accounts(group_accounts, company=company, posting_date=posting_date)
+		group_accounts = group_accounts_map[group_name]
+		balances = section_balances[group_name]
 		totals = {
 			"by_currency": summarize_balances_by_currency(balances),
 			"base": summarize_base_total(balances),
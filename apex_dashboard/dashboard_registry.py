@@ -0,0 +1,149 @@
+"""
+Dashboard dependency registry for Apex Dashboard
+Declares which doctypes each cached dashboard depends on and how a posting
+date maps onto the cached date ranges, so invalidation can be targeted.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+# How a posting dated D affects a cached entry covering [from_date, to_date]
+PERIOD = "period"  # totals over the range: affected when from_date <= D <= to_date
+AS_OF = "as_of"  # balances as of to_date: affected when D <= to_date
+ANY_DATE = "any_date"  # live snapshots / whole history: always affected
+
+
+@dataclass(frozen=True)
+class Dependency:
+	doctype: str
+	scope: str = PERIOD
+
+
+@dataclass(frozen=True)
+class DashboardSpec:
+	dashboard_type: str
+	depends_on: tuple[Dependency, ...]
+	# Whitelisted endpoint, called as method(company=..., period=...) to warm the cache
+	method: str = ""
+	# Warm even before anyone requested it (card dashboards are warmed once used)
+	prewarm: bool = True
+
+
+def period(*doctypes: str) -> tuple[Dependency, ...]:
+	return tuple(Dependency(doctype, PERIOD) for doctype in doctypes)
+
+
+def as_of(*doctypes: str) -> tuple[Dependency, ...]:
+	return tuple(Dependency(doctype, AS_OF) for doctype in doctypes)
+
+
+def any_date(*doctypes: str) -> tuple[Dependency, ...]:
+	return tuple(Dependency(doctype, ANY_DATE) for doctype in doctypes)
+
+
+ACCOUNTING_VOUCHERS = ("GL Entry", "Journal Entry", "Payment Entry", "Sales Invoice", "Purchase Invoice")
+STOCK_VOUCHERS = (
+	"Stock Ledger Entry",
+	"Stock Entry",
+	"Stock Reconciliation",
+	"Delivery Note",
+	"Purchase Receipt",
+	"Sales Invoice",
+	"Purchase Invoice",
+)
+
+# Config-card dashboards sum GL movements inside the selected period
+# (dashboard type, page)
+CARD_DASHBOARDS = (
+	("sales", "sales_dashboard"),
+	("crm", "crm_dashboard"),
+	("tax", "tax_dashboard"),
+	("test", "test_dashboard"),
+	("test2_dashboard", "test2_dashboard"),
+	("test3_dashboard", "test3_dashboard"),
+	("dashboard_template", "dashboard_template"),
+	*((f"template_dashboard_{number:02d}",) * 2 for number in range(1, 21)),
+)
+
+
+def page_method(page: str) -> str:
+	return f"apex_dashboard.apex_dashboard.page.{page}.{page}.get_dashboard_data"
+
+
+DASHBOARD_REGISTRY: tuple[DashboardSpec, ...] = (
+	DashboardSpec(
+		"liquidity",
+		as_of("GL Entry", "Journal Entry", "Payment Entry", "Sales Invoice", "Purchase Invoice"),
+		method=page_method("liquidity_dashboard"),
+	),
+	DashboardSpec(
+		"profitability",
+		# Purchase rates are used as cost fallback for items sold in the period
+		period("GL Entry", "Journal Entry", "Sales Invoice") + any_date("Purchase Invoice"),
+		method=page_method("profitability_dashboard"),
+	),
+	DashboardSpec(
+		"suppliers",
+		# Payments change the outstanding amount of invoices from any period
+		period("Purchase Invoice") + any_date("Payment Entry", "Journal Entry"),
+		method=page_method("suppliers_dashboard"),
+	),
+	DashboardSpec(
+		"expense",
+		period("GL Entry", "Journal Entry", "Payment Entry", "Purchase Invoice"),
+		method=page_method("expenses_dashboard"),
+	),
+	# Bin quantities are live, whatever the selected period
+	DashboardSpec("inventory", any_date(*STOCK_VOUCHERS), method=page_method("inventory_dashboard")),
+	# Equity shows yearly profits over the whole history, split by the partner rules;
+	# api.finance_api.get_dashboard_data reads the same entries
+	DashboardSpec(
+		"equity_v2",
+		any_date(*ACCOUNTING_VOUCHERS, "Apex Equity Partner"),
+		method="apex_dashboard.api.equity_v2.get_dashboard_data",
+	),
+	*(
+		DashboardSpec(name, period(*ACCOUNTING_VOUCHERS), method=page_method(page), prewarm=False)
+		for name, page in CARD_DASHBOARDS
+	),
+)
+
+
+def get_dashboard_types() -> list[str]:
+	return [spec.dashboard_type for spec in DASHBOARD_REGISTRY]
+
+
+def get_dashboard_spec(dashboard_type: str) -> DashboardSpec | None:
+	for spec in DASHBOARD_REGISTRY:
+		if spec.dashboard_type == dashboard_type:
+			return spec
+	return None
+
+
+def get_dependent_dashboards(doctype: str) -> dict[str, str]:
+	"""Map each dashboard depending on `doctype` to the scope of that dependency."""
+	return _get_doctype_index().get(doctype, {})
+
+
+def get_tracked_doctypes() -> list[str]:
+	return sorted(_get_doctype_index())
+
+
+def is_affected(scope: str, posting_date, from_date, to_date) -> bool:
+	"""Return True if a posting dated `posting_date` changes an entry covering the range."""
+	if scope == ANY_DATE or not posting_date:
+		return True
+	if scope == AS_OF:
+		return not to_date or posting_date <= to_date
+	return (not from_date or from_date <= posting_date) and (not to_date or posting_date <= to_date)
+
+
+@lru_cache(maxsize=1)
+def _get_doctype_index() -> dict[str, dict[str, str]]:
+	index: dict[str, dict[str, str]] = {}
+	for spec in DASHBOARD_REGISTRY:
+		for dependency in spec.depends_on:
+			index.setdefault(dependency.doctype, {})[spec.dashboard_type] = dependency.scope
+	return index
@@ -0,0 +1,231 @@
+"""
+Progressive dashboard loading for Apex Dashboard
+A streamed request returns at once; each section of the payload is computed
+by its own background job and pushed to the browser over realtime as soon
+as it is ready, so the first cards render after the fastest query rather
+than the slowest. The last section to finish assembles the full payload,
+publishes it and stores it in the dashboard cache.
+"""
+
+import re
+
+import frappe
+
+from apex_dashboard.cache_utils import (
+    acquire_rebuild_lock,
+    get_last_value_key,
+    get_shared_value,
+    get_versioned_cache_key,
+    record_dashboard_request,
+    release_rebuild_lock,
+    store_dashboard_data,
+    wait_for_rebuild,
+)
+from apex_dashboard.metrics import note_cache_result
+
+STREAM_EVENT = "apex_dashboard_section"
+# Section results are kept this long for the job that assembles the payload
+STREAM_TTL = 10 * 60
+STREAM_ID_PATTERN = re.compile(r"^[A-Za-z0-9]{8,32}$")
+
+def build_sections(sections, finalize=None, **kwargs):
+    """
+    Build a payload from its sections in the current process
+    The non-streamed path; gives the same payload as a stream.
+    Args:
+        sections: dict of section name -> function(**kwargs) returning a
+            dict of payload keys
+        finalize: Optional function(parts, **kwargs) that assembles the
+            payload from {section name: section result}; by default the
+            section results are merged
+        kwargs: Builder arguments (company, from_date, to_date)
+    Returns:
+        dict: Dashboard payload
+    """
+    parts = {name: section(**kwargs) for name, section in sections.items()}
+    return _assemble(parts, finalize, kwargs)
+
+def stream_dashboard(dashboard_type, company, sections, finalize=None, stream_id=None, **kwargs):
+    """
+    Start a streamed dashboard request
+    A fresh cached payload is returned as is. Otherwise one background job
+    per section is enqueued and each publishes STREAM_EVENT to the user:
+    {stream_id, section, data} per section, then {stream_id, done: 1, data}
+    with the full payload, or {stream_id, error: 1} if a section failed.
+    Like get_cached_dashboard, only one stream rebuilds an entry: concurrent
+    requests get the last computed payload, or join the running stream (and
+    are told its stream_id), or wait briefly for a plain rebuild.
+    Args:
+        dashboard_type: Type of dashboard (see dashboard_registry)
+        company: Company name (already resolved)
+        sections: dict of section name -> module-level function
+        finalize: Optional module-level assembling function (see build_sections)
+        stream_id: Id chosen by the browser, so it can listen before the
+            response arrives; generated when omitted
+        kwargs: Resolved request parameters, as passed to get_cached_dashboard
+    Returns:
+        dict: {"data": payload} on a cache hit, else {"stream_id", "sections"};
+            empty when a plain rebuild did not finish in time
+    """
+    parts = [kwargs[name] for name in sorted(kwargs)]
+    cache_key = get_versioned_cache_key(dashboard_type, company, *parts)
+    data = frappe.cache().get_value(cache_key)
+    if data:
+        note_cache_result("hit")
+        return {"data": data}
+
+    record_dashboard_request(dashboard_type, company)
+
+    lock = acquire_rebuild_lock(cache_key, timeout=STREAM_TTL)
+    if not lock:
+        return _follow_rebuild(dashboard_type, company, cache_key, parts, sections)
+
+    note_cache_result("stream")
+    if not stream_id or not STREAM_ID_PATTERN.match(stream_id):
+        stream_id = frappe.generate_hash(length=12)
+
+    try:
+        frappe.cache().set_value(
+            _stream_key(stream_id),
+            {
+                "dashboard_type": dashboard_type,
+                "company": company,
+                "sections": list(sections),
+                "finalize": _dotted_path(finalize) if finalize else None,
+                "kwargs": kwargs,
+                "cache_key": cache_key,
+                "lock": lock,
+            },
+            expires_in_sec=STREAM_TTL,
+        )
+        _add_listener(stream_id, frappe.session.user)
+        frappe.cache().set_value(_active_stream_key(cache_key), stream_id, expires_in_sec=STREAM_TTL)
+
+        for name, section in sections.items():
+            frappe.enqueue(
+                "apex_dashboard.dashboard_stream.run_stream_section",
+                queue="short",
+                stream_id=stream_id,
+                section=name,
+                method=_dotted_path(section),
+            )
+    except Exception:
+        _end_stream(stream_id, cache_key, lock)
+        raise
+
+    return {"stream_id": stream_id, "sections": list(sections)}
+
+def _follow_rebuild(dashboard_type, company, cache_key, parts, sections):
+    """Serve a request for an entry that another worker or stream is rebuilding"""
+    data = frappe.cache().get_value(get_last_value_key(dashboard_type, company, *parts))
+    if data:
+        note_cache_result("stale")
+        return {"data": data}
+
+    stream_id = frappe.cache().get_value(_active_stream_key(cache_key))
+    if stream_id:
+        _add_listener(stream_id, frappe.session.user)
+        # The stream may have finished before we were listening; this request
+        # has already missed on the key, so ask Redis itself
+        data = get_shared_value(cache_key)
+        if data:
+            note_cache_result("hit")
+            return {"data": data}
+        note_cache_result("stream")
+        return {"stream_id": stream_id, "sections": list(sections)}
+
+    # A plain rebuild (or a background refresh) holds the lock
+    data = wait_for_rebuild(cache_key)
+    if data:
+        note_cache_result("hit")
+        return {"data": data}
+    # Let the browser fall back to the plain way
+    return {}
+
+def run_stream_section(stream_id, section, method):
+    """
+    Background job: compute one section of a stream and publish it
+    Args:
+        stream_id: Stream id
+        section: Section name
+        method: Dotted path of the section function
+    """
+    stream = frappe.cache().get_value(_stream_key(stream_id))
+    if not stream:
+        # Expired, nobody is listening any more
+        return
+
+    try:
+        data = frappe.get_attr(method)(company=stream["company"], **stream["kwargs"])
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), f"Apex Dashboard: Section {section} of {stream['dashboard_type']} failed")
+        _publish(stream_id, {"stream_id": stream_id, "error": 1})
+        _end_stream(stream_id, stream["cache_key"], stream["lock"])
+        return
+
+    frappe.cache().set_value(_section_key(stream_id, section), data, expires_in_sec=STREAM_TTL)
+    _publish(stream_id, {"stream_id": stream_id, "section": section, "data": data})
+
+    cache = frappe.cache()
+    finished = cache.incr(cache.make_key(_section_key(stream_id, "finished")))
+    if finished == 1:
+        cache.expire(cache.make_key(_section_key(stream_id, "finished")), STREAM_TTL)
+    if finished == len(stream["sections"]):
+        _finish_stream(stream_id, stream)
+
+def _finish_stream(stream_id, stream):
+    """Assemble the payload from the stored sections, publish and cache it"""
+    try:
+        parts = {}
+        for name in stream["sections"]:
+            part = frappe.cache().get_value(_section_key(stream_id, name))
+            if part is None:
+                _publish(stream_id, {"stream_id": stream_id, "error": 1})
+                return
+            parts[name] = part
+
+        finalize = frappe.get_attr(stream["finalize"]) if stream["finalize"] else None
+        data = _assemble(parts, finalize, dict(company=stream["company"], **stream["kwargs"]))
+        store_dashboard_data(stream["dashboard_type"], stream["company"], data, **stream["kwargs"])
+        _publish(stream_id, {"stream_id": stream_id, "done": 1, "data": data})
+    finally:
+        _end_stream(stream_id, stream["cache_key"], stream["lock"])
+
+def _end_stream(stream_id, cache_key, lock):
+    """Drop the state of a stream and release its rebuild lock"""
+    cache = frappe.cache()
+    if frappe.safe_decode(cache.get_value(_active_stream_key(cache_key)) or "") == stream_id:
+        cache.delete_value(_active_stream_key(cache_key))
+    release_rebuild_lock(cache_key, lock)
+    cache.delete_keys(f"apex_dashboard:stream:{stream_id}")
+
+def _add_listener(stream_id, user):
+    cache = frappe.cache()
+    cache.sadd(_section_key(stream_id, "listeners"), user)
+    cache.expire(cache.make_key(_section_key(stream_id, "listeners")), STREAM_TTL)
+
+def _publish(stream_id, message):
+    """Publish a stream event to every user listening to the stream"""
+    for user in frappe.cache().smembers(_section_key(stream_id, "listeners")):
+        frappe.publish_realtime(STREAM_EVENT, message, user=frappe.safe_decode(user))
+
+def _assemble(parts, finalize, kwargs):
+    if finalize:
+        return finalize(parts, **kwargs)
+
+    data = {}
+    for part in parts.values():
+        data.update(part)
+    return data
+
+def _dotted_path(function):
+    return f"{function.__module__}.{function.__name__}"
+
+def _stream_key(stream_id):
+    return f"apex_dashboard:stream:{stream_id}"
+
+def _active_stream_key(cache_key):
+    return f"apex_dashboard:active_stream:{cache_key}"
+
+def _section_key(stream_id, section):
+    return f"apex_dashboard:stream:{stream_id}:{section}"
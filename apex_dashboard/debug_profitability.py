@@ -1,5 +1,6 @@
 import frappe
-from apex_dashboard.apex_dashboard.page.profitability_dashboard.profitability_dashboard import get_dashboard_data, get_exchange_rates
+from apex_dashboard.apex_dashboard.page.profitability_dashboard.profitability_dashboard import DASHBOARD_CURRENCIES, get_dashboard_data
+from apex_dashboard.exchange_rates import rates_for
 
 def execute():
     print("--- Debugging Profitability Dashboard ---")
@@ -7,7 +8,7 @@ def execute():
     # 1. Check Exchange Rates
     print("\n[1] Checking Exchange Rates...")
     try:
-        rates = get_exchange_rates()
+        rates = rates_for(DASHBOARD_CURRENCIES)
         print(f"Rates: {rates}")
     except Exception as e:
         print(f"Error fetching rates: {e}")
@@ -0,0 +1,100 @@
+"""
+Equity partner classification for Apex Dashboard
+Compiles the Apex Equity Partner rules into a per-company map of Equity
+ledger -> (partner, role), cached until a rule or an account changes, so
+the equity dashboards classify an account with a dict lookup.
+"""
+
+import frappe
+
+from apex_dashboard.account_tree import get_accounts
+
+PARTNER_MAP_TTL = 24 * 60 * 60
+PARTNER_DOCTYPE = "Apex Equity Partner"
+RULE_DOCTYPE = "Apex Equity Partner Rule"
+
+CAPITAL = "capital"
+CURRENT = "current"
+WITHDRAWAL = "withdrawal"
+# Role of an account whose rule sets none, from its name; current otherwise
+ROLE_KEYWORDS = ((CAPITAL, "capital"), (CURRENT, "current"), (WITHDRAWAL, "withdrawal"))
+
+def get_partner_map(company):
+    """
+    Get the compiled partner map of a company
+    Args:
+        company: Company name
+    Returns:
+        dict: Equity ledger name -> (partner name or None, role); accounts
+            matched by no enabled partner have no partner
+    """
+    cache_key = _partner_map_key(company)
+    partner_map = frappe.cache().get_value(cache_key)
+    if partner_map is None:
+        partner_map = compile_partner_map(company)
+        frappe.cache().set_value(cache_key, partner_map, expires_in_sec=PARTNER_MAP_TTL)
+    return partner_map
+
+def compile_partner_map(company):
+    """Compile the partner map of a company from the partner rules (uncached)"""
+    exact = {}
+    patterns = []
+    for rule in get_partner_rules(company):
+        role = (rule.role or "").lower() or None
+        if rule.account:
+            exact.setdefault(rule.account, (rule.partner, role))
+        pattern = (rule.account_name_contains or "").strip().lower()
+        if pattern:
+            patterns.append((pattern, rule.partner, role))
+
+    partner_map = {}
+    for account in get_accounts(company, root_type="Equity", is_group=0):
+        name_lower = (account.account_name or "").lower()
+        partner, role = exact.get(account.name) or next(
+            ((partner, role) for pattern, partner, role in patterns if pattern in name_lower), (None, None)
+        )
+        partner_map[account.name] = (partner, role or get_role_from_name(name_lower))
+
+    return partner_map
+
+def get_partner_rules(company):
+    """
+    Get the rules of the enabled partners of a company, in partner then row order
+    Partners without a company apply to every company.
+    """
+    Partner = frappe.qb.DocType(PARTNER_DOCTYPE)
+    Rule = frappe.qb.DocType(RULE_DOCTYPE)
+
+    return (
+        frappe.qb.from_(Rule)
+        .join(Partner).on(Rule.parent == Partner.name)
+        .select(
+            Partner.name.as_("partner"),
+            Rule.account,
+            Rule.account_name_contains,
+            Rule.role,
+        )
+        .where(Rule.parenttype == PARTNER_DOCTYPE)
+        .where(Partner.enabled == 1)
+        .where((Partner.company == company) | Partner.company.isnull() | (Partner.company == ""))
+        .orderby(Partner.creation)
+        .orderby(Rule.idx)
+        .run(as_dict=True)
+    )
+
+def get_role_from_name(name_lower):
+    for role, keyword in ROLE_KEYWORDS:
+        if keyword in name_lower:
+            return role
+    return CURRENT
+
+def clear_partner_maps(doc=None, method=None):
+    """
+    Drop the compiled partner maps of every company
+    This function is used as a hook on Apex Equity Partner and Account
+    changes.
+    """
+    frappe.cache().delete_keys("apex_dashboard:equity_partner_map:")
+
+def _partner_map_key(company):
+    return f"apex_dashboard:equity_partner_map:{company}"
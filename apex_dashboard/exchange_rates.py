@@ -0,0 +1,226 @@
+"""
+Exchange-rate service for Apex Dashboard
+One cached rate table (currency -> rate to EGP) shared by every dashboard.
+Rates come from a pluggable provider and are refreshed by a background job
+ahead of expiry, so a dashboard request never waits on the HTTP API.
+
+Site config:
+    apex_dashboard_rate_provider: dotted path of the provider, default
+        openexchangerates_provider; fixture_provider reads a JSON file
+    apex_dashboard_rate_fixture: path of that JSON file ({"USD": 50.0, ...})
+    openexchangerates_api_key: API key of openexchangerates_provider
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from collections.abc import Iterable
+
+import frappe
+from frappe.utils import flt, getdate, today
+
+BASE_CURRENCY = "EGP"
+
+RATES_CACHE_KEY = "apex_dashboard:exchange_rates"
+# Last good rates are kept this long, however old, so requests always get an answer
+RATES_TTL = 7 * 24 * 60 * 60
+# Rates older than this are refreshed in the background
+RATES_REFRESH_AFTER = 55 * 60
+HTTP_TIMEOUT = (3, 10)
+
+DEFAULT_PROVIDER = "apex_dashboard.exchange_rates.openexchangerates_provider"
+DEFAULT_API_KEY = "39167a07fcc74a86be7f6b6677bc25e4"
+# Used when neither the provider nor Currency Exchange knows a currency
+DEFAULT_RATES = {
+	"USD": 50.0,
+	"EUR": 54.5,
+	"SAR": 13.3,
+	"AED": 13.6,
+	"GBP": 63.0,
+}
+
+
+def rates_for(currencies: Iterable[str], date: str | None = None) -> dict[str, float]:
+	"""
+	Get the rate to EGP of several currencies in one lookup
+	Args:
+		currencies: Currency codes
+		date: Rates as of this date; past dates read Currency Exchange
+			(latest rate on or before the date), today reads the cached
+			provider rates
+	Returns:
+		dict: Currency -> rate to EGP, for every requested currency
+	"""
+	currencies = {currency for currency in currencies if currency}
+	if date and getdate(date) < getdate(today()):
+		rates = get_currency_exchange_rates(currencies, date)
+	else:
+		rates = get_rates()
+
+	result = {}
+	for currency in currencies:
+		if currency == BASE_CURRENCY:
+			result[currency] = 1.0
+		else:
+			result[currency] = flt(rates.get(currency)) or DEFAULT_RATES.get(currency, 1.0)
+	return result
+
+
+def rate_for(currency: str, date: str | None = None) -> float:
+	if not currency:
+		return 1.0
+	return rates_for([currency], date)[currency]
+
+
+def get_rates() -> dict[str, float]:
+	"""
+	Get the cached rate table, never waiting on the provider
+	A missing or aging table is refreshed by a background job (one at a
+	time); until it lands, Currency Exchange rates are served.
+	"""
+	cached = frappe.cache().get_value(RATES_CACHE_KEY)
+	if cached and time.time() - cached["fetched_at"] < RATES_REFRESH_AFTER:
+		return cached["rates"]
+
+	enqueue_rates_refresh()
+	if cached:
+		return cached["rates"]
+
+	return get_currency_exchange_rates(None, today())
+
+
+def enqueue_rates_refresh() -> None:
+	from apex_dashboard.cache_utils import acquire_rebuild_lock, release_rebuild_lock
+
+	lock = acquire_rebuild_lock(RATES_CACHE_KEY)
+	if not lock:
+		# A refresh is already running
+		return
+
+	try:
+		frappe.enqueue(
+			"apex_dashboard.exchange_rates.refresh_rates",
+			queue="short",
+			lock=lock,
+			# The worker reads the site config, not this process's overrides
+			provider=frappe.conf.get("apex_dashboard_rate_provider"),
+		)
+	except Exception:
+		release_rebuild_lock(RATES_CACHE_KEY, lock)
+		frappe.log_error(frappe.get_traceback(), "Apex Dashboard: Exchange rate refresh not queued")
+
+
+def refresh_rates(lock: str | None = None, provider: str | None = None) -> dict[str, float]:
+	"""
+	Fetch rates from the provider and store them in the shared cache
+	Runs as a background job (enqueued by get_rates, and hourly from the
+	scheduler so the table is renewed before it ages out).
+	Args:
+		lock: Token of the refresh lock held by whoever enqueued the job
+		provider: Dotted path of the provider, default the configured one
+	"""
+	from apex_dashboard.cache_utils import acquire_rebuild_lock, release_rebuild_lock
+
+	lock = lock or acquire_rebuild_lock(RATES_CACHE_KEY)
+	if not lock:
+		return {}
+
+	try:
+		rates = get_provider(provider)(BASE_CURRENCY)
+		if not rates:
+			return {}
+
+		rates[BASE_CURRENCY] = 1.0
+		frappe.cache().set_value(
+			RATES_CACHE_KEY,
+			{"rates": rates, "fetched_at": time.time()},
+			expires_in_sec=RATES_TTL,
+		)
+		return rates
+	except Exception:
+		frappe.log_error(frappe.get_traceback(), "Apex Dashboard: Exchange rate refresh failed")
+		return {}
+	finally:
+		release_rebuild_lock(RATES_CACHE_KEY, lock)
+
+
+def clear_rates_cache() -> None:
+	frappe.cache().delete_value(RATES_CACHE_KEY)
+
+
+def get_provider(provider: str | None = None):
+	return frappe.get_attr(provider or frappe.conf.get("apex_dashboard_rate_provider") or DEFAULT_PROVIDER)
+
+
+def openexchangerates_provider(base_currency: str) -> dict[str, float]:
+	"""Latest rates from openexchangerates.org, converted from USD to base_currency"""
+	import requests
+
+	api_key = frappe.conf.get("openexchangerates_api_key") or DEFAULT_API_KEY
+	response = requests.get(
+		"https://openexchangerates.org/api/latest.json",
+		params={"app_id": api_key, "base": "USD"},
+		timeout=HTTP_TIMEOUT,
+	)
+	response.raise_for_status()
+	usd_rates = response.json().get("rates", {})
+
+	if base_currency not in usd_rates:
+		frappe.log_error(f"OpenExchangeRates: {base_currency} not found in rates", "Apex Dashboard")
+		return {}
+
+	# 1 USD = usd_to_base; 1 unit of currency = 1 / rate_in_usd USD
+	usd_to_base = flt(usd_rates[base_currency])
+	return {
+		currency: usd_to_base / flt(rate_in_usd) if flt(rate_in_usd) > 0 else 0.0
+		for currency, rate_in_usd in usd_rates.items()
+	}
+
+
+def fixture_provider(base_currency: str) -> dict[str, float]:
+	"""Rates read from a local JSON file, for tests and offline sites"""
+	path = frappe.conf.get("apex_dashboard_rate_fixture") or frappe.get_app_path(
+		"apex_dashboard", "tests", "exchange_rates.json"
+	)
+	with open(path, encoding="utf-8") as handle:
+		rates = json.load(handle)
+
+	return {currency: flt(rate) for currency, rate in rates.get(base_currency, rates).items()}
+
+
+def currency_exchange_provider(base_currency: str) -> dict[str, float]:
+	"""Latest rates of ERPNext's Currency Exchange, without any HTTP call"""
+	return get_currency_exchange_rates(None, today(), base_currency)
+
+
+def get_currency_exchange_rates(
+	currencies: Iterable[str] | None, date: str, to_currency: str = BASE_CURRENCY
+) -> dict[str, float]:
+	"""
+	Latest Currency Exchange rate on or before `date` per currency, in one query
+	Args:
+		currencies: Currency codes, None for every currency with a rate
+		date: As-of date
+		to_currency: Target currency
+	"""
+	CurrencyExchange = frappe.qb.DocType("Currency Exchange")
+	query = (
+		frappe.qb.from_(CurrencyExchange)
+		.select(CurrencyExchange.from_currency, CurrencyExchange.exchange_rate)
+		.where(CurrencyExchange.to_currency == to_currency)
+		.where(CurrencyExchange.for_selling == 1)
+		.where(CurrencyExchange.date <= getdate(date))
+		.orderby(CurrencyExchange.date, order=frappe.qb.desc)
+	)
+	if currencies is not None:
+		currencies = list(currencies)
+		if not currencies:
+			return {}
+		query = query.where(CurrencyExchange.from_currency.isin(currencies))
+
+	rates = {}
+	for row in query.run(as_dict=True):
+		# First row per currency is the latest
+		rates.setdefault(row.from_currency, flt(row.exchange_rate, 4))
+	return rates
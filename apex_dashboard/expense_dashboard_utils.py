@@ -16,6 +16,8 @@ from frappe.utils import (
 	flt,
 )
 
+from apex_dashboard.exchange_rates import rate_for
+
 
 @dataclass(frozen=True)
 class ExpenseCategory:
@@ -304,40 +306,10 @@ def fetch_expense_accounts(company: Optional[str] = None) -> List[Dict]:
 
 
 def get_exchange_rate(currency: str) -> float:
-	if not currency or currency.upper() == "EGP":
+	if not currency:
 		return 1.0
 
-	currency = currency.upper()
-
-	try:
-		from apex_customization.apex_customization.utils.balance_utils import get_live_exchange_rate_from_api
-
-		live_rate = get_live_exchange_rate_from_api(currency, "EGP")
-		if live_rate:
-			return flt(live_rate, 4)
-	except Exception:
-		frappe.log_error(frappe.get_traceback(), "Expense Dashboard - Live Exchange Rate Error")
-
-	try:
-		rate = frappe.db.get_value(
-			"Currency Exchange",
-			{"from_currency": currency, "to_currency": "EGP"},
-			"exchange_rate",
-		)
-		if rate:
-			return flt(rate, 4)
-	except Exception:
-		pass
-
-	default_rates = {
-		"USD": 50.0,
-		"EUR": 54.5,
-		"SAR": 13.3,
-		"AED": 13.6,
-		"GBP": 63.0,
-	}
-
-	return default_rates.get(currency, 1.0)
+	return flt(rate_for(currency.upper()), 4)
 
 
 def get_expense_dashboard_data(
@@ -559,7 +531,7 @@ def get_expense_dashboard_data(
 
 def _get_company_currency(company: Optional[str]) -> str:
 	if company:
-		return frappe.db.get_value("Company", company, "default_currency") or frappe.db.get_default("currency") or "EGP"
+		return frappe.get_cached_value("Company", company, "default_currency") or frappe.db.get_default("currency") or "EGP"
 	return frappe.db.get_default("currency") or "EGP"
 
 
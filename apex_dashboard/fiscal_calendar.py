@@ -0,0 +1,62 @@
+"""
+Fiscal year calendar for Apex Dashboard
+Caches the fiscal years of each company (the enabled Fiscal Years listing
+the company, or listing no company at all) so dashboards find the fiscal
+year of a date without querying Fiscal Year on every request.
+"""
+
+import frappe
+from frappe.utils import getdate
+
+FISCAL_CALENDAR_TTL = 24 * 60 * 60
+
+def get_fiscal_calendar(company):
+    """
+    Get the cached fiscal years of a company
+    Args:
+        company: Company name
+    Returns:
+        list: Dicts with name, year_start_date and year_end_date, oldest first
+    """
+    cache_key = _fiscal_calendar_key(company)
+    calendar = frappe.cache().get_value(cache_key)
+    if calendar is None:
+        calendar = build_fiscal_calendar(company)
+        frappe.cache().set_value(cache_key, calendar, expires_in_sec=FISCAL_CALENDAR_TTL)
+    return calendar
+
+def build_fiscal_calendar(company):
+    """Read the fiscal years of a company with one query (uncached)"""
+    return frappe.db.sql("""
+        SELECT fy.name, fy.year_start_date, fy.year_end_date
+        FROM `tabFiscal Year` fy
+        WHERE fy.disabled = 0
+        AND (
+            NOT EXISTS (SELECT 1 FROM `tabFiscal Year Company` fyc WHERE fyc.parent = fy.name)
+            OR EXISTS (SELECT 1 FROM `tabFiscal Year Company` fyc WHERE fyc.parent = fy.name AND fyc.company = %s)
+        )
+        ORDER BY fy.year_start_date
+    """, (company,), as_dict=True)
+
+def get_fiscal_year(date, company):
+    """Get the fiscal year (name, year_start_date, year_end_date) of a company containing date, or None"""
+    date = getdate(date)
+    for fiscal_year in get_fiscal_calendar(company):
+        if fiscal_year.year_start_date <= date <= fiscal_year.year_end_date:
+            return fiscal_year
+    return None
+
+def get_fiscal_year_start(date, company, default=None):
+    """Start of the fiscal year of a company containing date, default when there is none"""
+    fiscal_year = get_fiscal_year(date, company)
+    return fiscal_year.year_start_date if fiscal_year else default
+
+def clear_fiscal_calendars(doc=None, method=None):
+    """
+    Drop the cached fiscal calendars of every company
+    This function is used as a Fiscal Year hook.
+    """
+    frappe.cache().delete_keys("apex_dashboard:fiscal_calendar:")
+
+def _fiscal_calendar_key(company):
+    return f"apex_dashboard:fiscal_calendar:{company}"
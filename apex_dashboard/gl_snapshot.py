@@ -0,0 +1,356 @@
+"""
+Monthly GL balance snapshot for Apex Dashboard
+Keeps per-(company, account, currency, month) debit/credit totals in
+Apex GL Monthly Balance, so balances over long ranges read a few monthly
+rows per account instead of the whole GL history.
+"""
+
+import hashlib
+
+import frappe
+from frappe.query_builder import DocType
+from frappe.query_builder.functions import Coalesce, Sum
+from frappe.utils import add_days, add_months, flt, get_first_day, get_last_day, getdate, now, nowdate
+
+SNAPSHOT_DOCTYPE = "Apex GL Monthly Balance"
+# Global default stamped by rebuild_gl_snapshot; the snapshot is only read once it is set
+SNAPSHOT_BUILT_KEY = "apex_gl_snapshot_built_on"
+
+AMOUNT_FIELDS = ("debit", "credit", "debit_in_account_currency", "credit_in_account_currency")
+# Reposts modified this many days back are resynced again by the daily job
+REPOST_RESYNC_DAYS = 2
+
+def update_gl_snapshot(doc, method=None):
+    """
+    Add a submitted GL Entry to the snapshot
+    Runs inside the posting transaction, so the snapshot rolls back with it.
+    ERPNext cancels a voucher by flagging its GL entries is_cancelled and
+    posting reversal entries (also flagged); a reversal re-syncs the cells
+    of its voucher from the GL once, before the transaction commits.
+    This function is used as a GL Entry on_submit hook.
+    Args:
+        doc: GL Entry document (passed by Frappe hooks)
+        method: Method name (passed by Frappe hooks, not used)
+    """
+    if doc.is_cancelled:
+        _queue_voucher_resync(doc.voucher_type, doc.voucher_no)
+        return
+
+    _upsert_cells(
+        [
+            {
+                "company": doc.company,
+                "account": doc.account,
+                "account_currency": doc.account_currency or "",
+                "month": get_first_day(doc.posting_date),
+                **{field: doc.get(field) or 0 for field in AMOUNT_FIELDS},
+            }
+        ],
+        increment=True,
+    )
+
+def _queue_voucher_resync(voucher_type, voucher_no):
+    if not hasattr(frappe.local, "apex_gl_snapshot_resync"):
+        frappe.local.apex_gl_snapshot_resync = set()
+
+    pending = frappe.local.apex_gl_snapshot_resync
+    if not pending:
+        frappe.db.before_commit.add(flush_voucher_resync)
+        frappe.db.after_rollback.add(discard_voucher_resync)
+    pending.add((voucher_type, voucher_no))
+
+def flush_voucher_resync():
+    """Recompute the snapshot cells touched by the cancelled vouchers of this transaction"""
+    pending = getattr(frappe.local, "apex_gl_snapshot_resync", set())
+    frappe.local.apex_gl_snapshot_resync = set()
+
+    for voucher_type, voucher_no in pending:
+        resync_voucher(voucher_type, voucher_no)
+
+def discard_voucher_resync():
+    frappe.local.apex_gl_snapshot_resync = set()
+
+def resync_voucher(voucher_type, voucher_no):
+    """
+    Recompute the snapshot cells of every account/month a voucher posted to
+    Args:
+        voucher_type: Voucher doctype
+        voucher_no: Voucher name
+    """
+    cells = frappe.db.sql("""
+        SELECT DISTINCT company, account, IFNULL(account_currency, '') AS account_currency,
+            DATE_SUB(posting_date, INTERVAL DAYOFMONTH(posting_date) - 1 DAY) AS month
+        FROM `tabGL Entry`
+        WHERE voucher_type = %s AND voucher_no = %s
+    """, (voucher_type, voucher_no), as_dict=True)
+
+    rows = []
+    for cell in cells:
+        totals = frappe.db.sql("""
+            SELECT
+                IFNULL(SUM(debit), 0) AS debit,
+                IFNULL(SUM(credit), 0) AS credit,
+                IFNULL(SUM(debit_in_account_currency), 0) AS debit_in_account_currency,
+                IFNULL(SUM(credit_in_account_currency), 0) AS credit_in_account_currency
+            FROM `tabGL Entry`
+            WHERE company = %s AND account = %s AND IFNULL(account_currency, '') = %s
+                AND posting_date BETWEEN %s AND %s
+                AND is_cancelled = 0
+        """, (cell.company, cell.account, cell.account_currency, cell.month, get_last_day(cell.month)), as_dict=True)
+
+        rows.append({**cell, **totals[0]})
+
+    _upsert_cells(rows, increment=False)
+
+def _upsert_cells(rows, increment):
+    """
+    Write snapshot cells, adding to (increment=True) or replacing the stored totals
+    """
+    if not rows:
+        return
+
+    timestamp = now()
+    user = frappe.session.user
+    if increment:
+        updates = ", ".join(f"{field} = {field} + VALUES({field})" for field in AMOUNT_FIELDS)
+    else:
+        updates = ", ".join(f"{field} = VALUES({field})" for field in AMOUNT_FIELDS)
+
+    values = []
+    for row in rows:
+        values.append((
+            _cell_name(row["company"], row["account"], row["account_currency"], row["month"]),
+            timestamp, timestamp, user, user,
+            row["company"], row["account"], row["account_currency"], row["month"],
+            *(row[field] for field in AMOUNT_FIELDS),
+        ))
+
+    placeholders = ", ".join(["(" + ", ".join(["%s"] * len(values[0])) + ")"] * len(values))
+    frappe.db.sql(f"""
+        INSERT INTO `tab{SNAPSHOT_DOCTYPE}`
+            (name, creation, modified, owner, modified_by,
+            company, account, account_currency, month, {", ".join(AMOUNT_FIELDS)})
+        VALUES {placeholders}
+        ON DUPLICATE KEY UPDATE {updates}, modified = VALUES(modified)
+    """, [value for row in values for value in row])
+
+def _cell_name(company, account, account_currency, month):
+    key = "|".join((company, account, account_currency or "", str(getdate(month))))
+    return hashlib.md5(key.encode()).hexdigest()
+
+def queue_repost_resync(doc, method=None):
+    """
+    Queue a resync of the snapshot months rewritten by a repost
+    Reposting deletes GL entries with raw SQL, which runs no hook, and posts
+    them again, so the on_submit upserts would count the amounts twice.
+    This function is used as a hook on Repost Item Valuation (on_change,
+    acting once the status is Completed) and Repost Accounting Ledger
+    (on_submit).
+    Args:
+        doc: Repost document (passed by Frappe hooks)
+        method: Method name (passed by Frappe hooks, not used)
+    """
+    if doc.doctype == "Repost Item Valuation" and doc.status != "Completed":
+        return
+    if not is_gl_snapshot_ready():
+        # The initial full rebuild will read the reposted GL
+        return
+
+    frappe.enqueue(
+        "apex_dashboard.gl_snapshot.resync_repost",
+        queue="long",
+        job_id=f"apex_gl_snapshot_resync:{doc.doctype}:{doc.name}",
+        deduplicate=True,
+        enqueue_after_commit=True,
+        doctype=doc.doctype,
+        name=doc.name,
+    )
+
+def resync_repost(doctype, name):
+    """Background job: rebuild the snapshot months of a company rewritten by a repost"""
+    from apex_dashboard.cache_utils import bump_ledger_version
+
+    company, months = get_repost_months(frappe.get_doc(doctype, name))
+    for month in sorted(set(months)):
+        rebuild_gl_snapshot(company=company, month=month)
+    # Payloads built while the months were counted twice
+    bump_ledger_version(company=company)
+
+def get_repost_months(doc):
+    """
+    Company and months whose GL entries a repost rewrote
+    Returns:
+        tuple: Company name and the first days of the months
+    """
+    if doc.doctype == "Repost Item Valuation":
+        # Every stock voucher from the posting date on is revalued
+        months = []
+        month, last_month = get_first_day(doc.posting_date), get_first_day(nowdate())
+        while month <= last_month:
+            months.append(month)
+            month = add_months(month, 1)
+        return doc.company, months
+
+    posting_dates = [
+        frappe.db.get_value(row.voucher_type, row.voucher_no, "posting_date") for row in doc.get("vouchers") or []
+    ]
+    return doc.company, [get_first_day(posting_date) for posting_date in posting_dates if posting_date]
+
+def resync_recent_reposts():
+    """
+    Resync the snapshot months of the reposts of the last REPOST_RESYNC_DAYS
+    Repost Accounting Ledger reposts larger batches in a job of its own, which
+    can finish after the resync queued on submit has run.
+    This function is used as a daily scheduler event.
+    """
+    if not is_gl_snapshot_ready():
+        return
+
+    since = add_days(nowdate(), -REPOST_RESYNC_DAYS)
+    reposts = (
+        ("Repost Item Valuation", {"status": "Completed"}),
+        ("Repost Accounting Ledger", {"docstatus": 1}),
+    )
+    for doctype, filters in reposts:
+        for name in frappe.get_all(doctype, filters={**filters, "modified": [">=", since]}, pluck="name"):
+            resync_repost(doctype, name)
+
+def rebuild_gl_snapshot(company=None, month=None):
+    """
+    Rebuild the snapshot from the GL
+    Needed once after install (see the build_gl_monthly_balance patch);
+    reposts are resynced one company and month at a time (see
+    queue_repost_resync), as a full rebuild rewrites every cell while
+    postings upsert into them. Available as `bench rebuild-gl-snapshot`.
+    Args:
+        company: Company name, None for all companies
+        month: Any date of the month to rebuild, None for the whole history
+    Returns:
+        int: Number of snapshot rows of the rebuilt scope
+    """
+    values = {"company": company, "now": now()}
+    snapshot_conditions = []
+    gl_conditions = []
+    if company:
+        snapshot_conditions.append("AND company = %(company)s")
+        gl_conditions.append("AND company = %(company)s")
+    if month:
+        values["month"] = get_first_day(month)
+        values["month_end"] = get_last_day(month)
+        snapshot_conditions.append("AND month = %(month)s")
+        gl_conditions.append("AND posting_date BETWEEN %(month)s AND %(month_end)s")
+
+    frappe.db.sql(f"""
+        DELETE FROM `tab{SNAPSHOT_DOCTYPE}` WHERE 1 = 1 {" ".join(snapshot_conditions)}
+    """, values)
+
+    frappe.db.sql(f"""
+        INSERT INTO `tab{SNAPSHOT_DOCTYPE}`
+            (name, creation, modified, owner, modified_by,
+            company, account, account_currency, month, {", ".join(AMOUNT_FIELDS)})
+        SELECT
+            MD5(CONCAT_WS('|', company, account, account_currency, month)),
+            %(now)s, %(now)s, 'Administrator', 'Administrator',
+            company, account, account_currency, month,
+            SUM(debit), SUM(credit), SUM(debit_in_account_currency), SUM(credit_in_account_currency)
+        FROM (
+            SELECT company, account, IFNULL(account_currency, '') AS account_currency,
+                DATE_SUB(posting_date, INTERVAL DAYOFMONTH(posting_date) - 1 DAY) AS month,
+                debit, credit, debit_in_account_currency, credit_in_account_currency
+            FROM `tabGL Entry`
+            WHERE is_cancelled = 0 {" ".join(gl_conditions)}
+        ) gl
+        GROUP BY company, account, account_currency, month
+    """, values)
+
+    if not company and not month:
+        frappe.db.set_global(SNAPSHOT_BUILT_KEY, now())
+
+    filters = {}
+    if company:
+        filters["company"] = company
+    if month:
+        filters["month"] = values["month"]
+    return frappe.db.count(SNAPSHOT_DOCTYPE, filters or None)
+
+def is_gl_snapshot_ready():
+    return bool(frappe.db.get_global(SNAPSHOT_BUILT_KEY))
+
+def get_snapshot_gl_totals(accounts, from_date, to_date, company=None, group_by_currency=True):
+    """
+    Sum GL movements over a date range, reading whole months from the snapshot
+    Only the partial months at either end of the range are read from the GL.
+    Args:
+        accounts: List of account names
+        from_date: Start date
+        to_date: End date
+        company: Optional company filter
+        group_by_currency: If True, group by account and currency
+    Returns:
+        list: Rows with account, account_currency, amount_account and
+            amount_base, or None when the range holds no whole month or the
+            snapshot has not been built (callers then read the GL)
+    """
+    from_date, to_date = getdate(from_date), getdate(to_date)
+    first_month = from_date if from_date.day == 1 else get_first_day(add_months(from_date, 1))
+    last_month = get_first_day(to_date) if to_date == get_last_day(to_date) else get_first_day(add_months(to_date, -1))
+
+    if first_month > last_month or not is_gl_snapshot_ready():
+        return None
+
+    Snapshot = DocType(SNAPSHOT_DOCTYPE)
+    snapshot_query = (
+        frappe.qb.from_(Snapshot)
+        .select(
+            Snapshot.account,
+            Snapshot.account_currency,
+            (Sum(Snapshot.debit_in_account_currency) - Sum(Snapshot.credit_in_account_currency)).as_("amount_account"),
+            (Sum(Snapshot.debit) - Sum(Snapshot.credit)).as_("amount_base"),
+        )
+        .where(Snapshot.account.isin(accounts))
+        .where(Snapshot.month.between(first_month, last_month))
+    )
+    if company:
+        snapshot_query = snapshot_query.where(Snapshot.company == company)
+    rows = snapshot_query.groupby(Snapshot.account, Snapshot.account_currency).run(as_dict=True)
+
+    # Partial months before and after the whole months
+    ranges = []
+    if from_date < first_month:
+        ranges.append((from_date, add_days(first_month, -1)))
+    if get_last_day(last_month) < to_date:
+        ranges.append((add_days(get_last_day(last_month), 1), to_date))
+
+    if ranges:
+        GLEntry = DocType("GL Entry")
+        in_ranges = None
+        for start, end in ranges:
+            condition = GLEntry.posting_date.between(start, end)
+            in_ranges = condition if in_ranges is None else in_ranges | condition
+
+        gl_query = (
+            frappe.qb.from_(GLEntry)
+            .select(
+                GLEntry.account,
+                Coalesce(GLEntry.account_currency, "").as_("account_currency"),
+                (Sum(GLEntry.debit_in_account_currency) - Sum(GLEntry.credit_in_account_currency)).as_("amount_account"),
+                (Sum(GLEntry.debit) - Sum(GLEntry.credit)).as_("amount_base"),
+            )
+            .where(GLEntry.account.isin(accounts))
+            .where(in_ranges)
+            .where(GLEntry.is_cancelled == 0)
+        )
+        if company:
+            gl_query = gl_query.where(GLEntry.company == company)
+        rows += gl_query.groupby(GLEntry.account, GLEntry.account_currency).run(as_dict=True)
+
+    totals = {}
+    for row in rows:
+        key = (row.account, row.account_currency or "") if group_by_currency else row.account
+        total = totals.setdefault(key, frappe._dict(
+            account=row.account, account_currency=row.account_currency or "", amount_account=0.0, amount_base=0.0
+        ))
+        total.amount_account += flt(row.amount_account)
+        total.amount_base += flt(row.amount_base)
+
+    return list(totals.values())
@@ -135,32 +135,138 @@ before_uninstall = "apex_dashboard.install.before_uninstall"
 # ---------------
 # Hook on document methods and events
 
+# Postings evict only the cache entries of the dashboards that depend on the
+# doctype, for the document's company and posting date
+# (see apex_dashboard.dashboard_registry)
 doc_events = {
     "GL Entry": {
-        "on_submit": "apex_dashboard.cache_utils.clear_all_dashboard_caches",
-        "on_cancel": "apex_dashboard.cache_utils.clear_all_dashboard_caches"
+        "on_submit": [
+            "apex_dashboard.gl_snapshot.update_gl_snapshot",
+            "apex_dashboard.yearly_profits.mark_year_stale",
+            "apex_dashboard.cache_utils.invalidate_dashboard_caches"
+        ],
+        "on_cancel": "apex_dashboard.cache_utils.invalidate_dashboard_caches"
     },
     "Payment Entry": {
-        "on_submit": "apex_dashboard.cache_utils.clear_all_dashboard_caches",
-        "on_cancel": "apex_dashboard.cache_utils.clear_all_dashboard_caches"
+        "on_submit": "apex_dashboard.cache_utils.invalidate_dashboard_caches",
+        "on_cancel": "apex_dashboard.cache_utils.invalidate_dashboard_caches"
     },
     "Journal Entry": {
-        "on_submit": "apex_dashboard.cache_utils.clear_all_dashboard_caches",
-        "on_cancel": "apex_dashboard.cache_utils.clear_all_dashboard_caches"
+        "on_submit": "apex_dashboard.cache_utils.invalidate_dashboard_caches",
+        "on_cancel": "apex_dashboard.cache_utils.invalidate_dashboard_caches"
     },
     "Sales Invoice": {
-        "on_submit": "apex_dashboard.cache_utils.clear_all_dashboard_caches",
-        "on_cancel": "apex_dashboard.cache_utils.clear_all_dashboard_caches"
+        "on_submit": "apex_dashboard.cache_utils.invalidate_dashboard_caches",
+        "on_cancel": "apex_dashboard.cache_utils.invalidate_dashboard_caches"
     },
     "Purchase Invoice": {
-        "on_submit": "apex_dashboard.cache_utils.clear_all_dashboard_caches",
-        "on_cancel": "apex_dashboard.cache_utils.clear_all_dashboard_caches"
+        "on_submit": "apex_dashboard.cache_utils.invalidate_dashboard_caches",
+        "on_cancel": "apex_dashboard.cache_utils.invalidate_dashboard_caches"
+    },
+    "Stock Ledger Entry": {
+        "on_submit": "apex_dashboard.cache_utils.invalidate_dashboard_caches",
+        "on_cancel": "apex_dashboard.cache_utils.invalidate_dashboard_caches"
+    },
+    "Stock Entry": {
+        "on_submit": "apex_dashboard.cache_utils.invalidate_dashboard_caches",
+        "on_cancel": "apex_dashboard.cache_utils.invalidate_dashboard_caches"
+    },
+    "Delivery Note": {
+        "on_submit": "apex_dashboard.cache_utils.invalidate_dashboard_caches",
+        "on_cancel": "apex_dashboard.cache_utils.invalidate_dashboard_caches"
+    },
+    "Purchase Receipt": {
+        "on_submit": "apex_dashboard.cache_utils.invalidate_dashboard_caches",
+        "on_cancel": "apex_dashboard.cache_utils.invalidate_dashboard_caches"
+    },
+    "Stock Reconciliation": {
+        "on_submit": "apex_dashboard.cache_utils.invalidate_dashboard_caches",
+        "on_cancel": "apex_dashboard.cache_utils.invalidate_dashboard_caches"
+    },
+    # Reposts rewrite GL entries without hooks (apex_dashboard.gl_snapshot)
+    "Repost Item Valuation": {
+        "on_change": "apex_dashboard.gl_snapshot.queue_repost_resync"
+    },
+    "Repost Accounting Ledger": {
+        "on_submit": "apex_dashboard.gl_snapshot.queue_repost_resync"
+    },
+    # Compiled card plans of the config-card dashboards (apex_dashboard.card_dashboard)
+    "Apex Dashboard Config": {
+        "on_update": "apex_dashboard.card_dashboard.clear_card_plans"
+    },
+    "Apex Dashboard Card": {
+        "on_update": "apex_dashboard.card_dashboard.clear_card_index",
+        "after_rename": "apex_dashboard.card_dashboard.clear_card_index",
+        "on_trash": "apex_dashboard.card_dashboard.clear_card_index"
+    },
+    # Compiled equity partner maps (apex_dashboard.equity_partners) and the equity payloads using them
+    "Apex Equity Partner": {
+        "on_update": [
+            "apex_dashboard.equity_partners.clear_partner_maps",
+            "apex_dashboard.cache_utils.invalidate_dashboard_caches"
+        ],
+        "after_rename": [
+            "apex_dashboard.equity_partners.clear_partner_maps",
+            "apex_dashboard.cache_utils.invalidate_dashboard_caches"
+        ],
+        "on_trash": [
+            "apex_dashboard.equity_partners.clear_partner_maps",
+            "apex_dashboard.cache_utils.invalidate_dashboard_caches"
+        ]
+    },
+    # Cached fiscal year calendars (apex_dashboard.fiscal_calendar)
+    "Fiscal Year": {
+        "on_update": "apex_dashboard.fiscal_calendar.clear_fiscal_calendars",
+        "on_trash": "apex_dashboard.fiscal_calendar.clear_fiscal_calendars"
+    },
+    # Cached chart of accounts (apex_dashboard.account_tree) and the card plans and partner maps built on it
+    "Account": {
+        "after_insert": [
+            "apex_dashboard.account_tree.clear_account_tree",
+            "apex_dashboard.card_dashboard.clear_card_plans",
+            "apex_dashboard.equity_partners.clear_partner_maps"
+        ],
+        "on_update": [
+            "apex_dashboard.account_tree.clear_account_tree",
+            "apex_dashboard.card_dashboard.clear_card_plans",
+            "apex_dashboard.equity_partners.clear_partner_maps"
+        ],
+        "after_rename": [
+            "apex_dashboard.account_tree.clear_account_tree",
+            "apex_dashboard.card_dashboard.clear_card_plans",
+            "apex_dashboard.equity_partners.clear_partner_maps"
+        ],
+        "on_trash": [
+            "apex_dashboard.account_tree.clear_account_tree",
+            "apex_dashboard.card_dashboard.clear_card_plans",
+            "apex_dashboard.equity_partners.clear_partner_maps"
+        ]
     }
 }
 
 # Scheduled Tasks
 # ---------------
 
+# Rebuild the common dashboard periods before users ask for them
+scheduler_events = {
+	"cron": {
+		"*/15 * * * *": [
+			"apex_dashboard.cache_warmup.warm_dashboard_caches"
+		]
+	},
+	# Renews the shared exchange-rate table before it is due
+	"hourly": [
+		"apex_dashboard.exchange_rates.refresh_rates"
+	],
+	# Drops dashboard profiles past their retention, freezes the profit of
+	# newly closed years and resyncs the GL snapshot after recent reposts
+	"daily": [
+		"apex_dashboard.profiler.prune_profiles",
+		"apex_dashboard.yearly_profits.freeze_yearly_profits",
+		"apex_dashboard.gl_snapshot.resync_recent_reposts"
+	]
+}
+
 # scheduler_events = {
 # 	"all": [
 # 		"apex_dashboard.tasks.all"
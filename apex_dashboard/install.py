@@ -20,6 +20,10 @@ def after_install() -> None:
 		# Setup default data
 		from apex_dashboard.setup_defaults import setup_defaults
 		setup_defaults()
+
+		# Existing GL history is loaded once, postings keep it current
+		from apex_dashboard.gl_snapshot import rebuild_gl_snapshot
+		rebuild_gl_snapshot()
 		
 		frappe.db.commit()
 
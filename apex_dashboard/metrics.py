@@ -0,0 +1,233 @@
+"""
+Endpoint metrics for Apex Dashboard
+The instrument_endpoint decorator records, per call of a dashboard endpoint,
+wall time, DB time, query count, rows fetched, payload size and whether the
+dashboard cache was hit. Calls are aggregated in Redis into 5-minute buckets
+(sums and latency histograms) kept for a day, and read back by
+get_dashboard_metrics for the Dashboard Metrics page.
+"""
+
+import contextlib
+import functools
+import time
+
+import frappe
+
+from apex_dashboard.profiler import save_profile, should_profile, start_profile
+
+METRICS_PREFIX = "apex_dashboard:metrics"
+ENDPOINTS_KEY = f"{METRICS_PREFIX}:endpoints"
+# Width of a bucket and how long buckets are kept (the longest window)
+BUCKET_SECONDS = 5 * 60
+RETENTION = 24 * 60 * 60
+# Upper bounds (ms) of the latency histogram buckets; slower calls count as "inf"
+LATENCY_BOUNDS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# Cache results noted by get_cached_dashboard / stream_dashboard
+CACHE_RESULTS = ("hit", "stale", "miss", "stream")
+
+SUM_FIELDS = ("wall_ms", "db_ms", "queries", "rows", "bytes")
+
+def instrument_endpoint(fn):
+    """
+    Record the metrics of each call of a whitelisted dashboard endpoint
+    Apply below @frappe.whitelist(). Nested instrumented calls are counted
+    in the outermost one; warm-up runs are not recorded. Calls selected by
+    profiler.should_profile are also profiled.
+    """
+    endpoint = f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if getattr(frappe.local, "apex_dashboard_call", None) is not None or frappe.flags.apex_dashboard_warming:
+            return fn(*args, **kwargs)
+
+        call = None
+        error = False
+        result = None
+        session = start_profile() if should_profile() else None
+        try:
+            with capture_call(record_statements=session is not None) as call:
+                result = fn(*args, **kwargs)
+            return result
+        except Exception:
+            error = True
+            raise
+        finally:
+            if session:
+                session.stop()
+            try:
+                call.bytes = len(frappe.as_json(result, indent=None)) if result is not None else 0
+                record_call(endpoint, call, error)
+                if session:
+                    save_profile(session, endpoint, call, kwargs, error)
+            except Exception:
+                # Metrics must never break the endpoint
+                frappe.log_error(frappe.get_traceback(), "Apex Dashboard: Metrics not recorded")
+
+    return wrapper
+
+@contextlib.contextmanager
+def capture_call(record_statements=False):
+    """
+    Measure a block of code: wall time, DB time, queries and rows
+    Yields the call dict, filled in when the block exits; its cache field
+    holds what note_cache_result was told inside the block. Used by
+    instrument_endpoint, the benchmark and the query budget tests.
+    Args:
+        record_statements: Also keep each query in call.statements, as
+            dicts of query, start_ms (since the block started),
+            duration_ms and rows
+    """
+    call = frappe._dict(wall_ms=0.0, db_ms=0.0, queries=0, rows=0, cache=None)
+    call.statements = [] if record_statements else None
+    previous_call = getattr(frappe.local, "apex_dashboard_call", None)
+    frappe.local.apex_dashboard_call = call
+    # Every query (frappe.qb, get_value, ...) goes through frappe.db.sql;
+    # an enclosing capture keeps counting through the wrapped method
+    db = frappe.db
+    previous_sql = vars(db).get("sql")
+    start = time.perf_counter()
+    db.sql = _timed_sql(db.sql, call, start)
+    try:
+        yield call
+    finally:
+        call.wall_ms = (time.perf_counter() - start) * 1000
+        if previous_sql is None:
+            del db.sql
+        else:
+            db.sql = previous_sql
+        frappe.local.apex_dashboard_call = previous_call
+
+def _timed_sql(sql, call, call_start):
+    @functools.wraps(sql)
+    def timed_sql(*args, **kwargs):
+        start = time.perf_counter()
+        result = None
+        try:
+            result = sql(*args, **kwargs)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            rows = len(result) if isinstance(result, (list, tuple)) else 0
+            call.db_ms += duration_ms
+            call.queries += 1
+            call.rows += rows
+            if call.statements is not None:
+                call.statements.append(frappe._dict(
+                    query=str(args[0] if args else kwargs.get("query")),
+                    start_ms=round((start - call_start) * 1000, 3),
+                    duration_ms=round(duration_ms, 3),
+                    rows=rows,
+                ))
+        return result
+
+    return timed_sql
+
+def note_cache_result(result):
+    """
+    Tell the current instrumented call how the dashboard cache answered
+    Args:
+        result: One of CACHE_RESULTS
+    """
+    call = getattr(frappe.local, "apex_dashboard_call", None)
+    if call is not None and call.cache is None:
+        call.cache = result
+
+def record_call(endpoint, call, error=False):
+    """Add one call to the current bucket of an endpoint"""
+    cache = frappe.cache()
+    key = cache.make_key(_bucket_key(endpoint, int(time.time() // BUCKET_SECONDS)))
+
+    pipe = cache.pipeline()
+    pipe.sadd(cache.make_key(ENDPOINTS_KEY), endpoint)
+    pipe.hincrby(key, "calls", 1)
+    for field in SUM_FIELDS:
+        pipe.hincrbyfloat(key, field, call.get(field) or 0)
+    pipe.hincrby(key, f"wall_le_{_histogram_bucket(call.wall_ms)}", 1)
+    pipe.hincrby(key, f"db_le_{_histogram_bucket(call.db_ms)}", 1)
+    if call.cache:
+        pipe.hincrby(key, f"cache_{call.cache}", 1)
+    if error:
+        pipe.hincrby(key, "errors", 1)
+    pipe.expire(key, RETENTION)
+    pipe.execute()
+
+def _histogram_bucket(ms):
+    for bound in LATENCY_BOUNDS:
+        if ms <= bound:
+            return bound
+    return "inf"
+
+def _bucket_key(endpoint, bucket):
+    return f"{METRICS_PREFIX}:{endpoint}:{bucket}"
+
+@frappe.whitelist()
+def get_dashboard_metrics(window=3600):
+    """
+    Get the aggregated endpoint metrics of the last `window` seconds
+    Args:
+        window: Seconds to look back, at most a day
+    Returns:
+        list: One dict per endpoint, slowest total time first, with calls,
+            errors, averages, p50/p95/p99 upper bounds (ms), cache hit rate
+            and the latency histogram
+    """
+    frappe.only_for("System Manager")
+
+    window = min(max(int(window), BUCKET_SECONDS), RETENTION)
+    cache = frappe.cache()
+    last = int(time.time() // BUCKET_SECONDS)
+    buckets = range(last - window // BUCKET_SECONDS + 1, last + 1)
+
+    endpoints = sorted(frappe.safe_decode(e) for e in cache.smembers(ENDPOINTS_KEY))
+    pipe = cache.pipeline()
+    for endpoint in endpoints:
+        for bucket in buckets:
+            pipe.hgetall(cache.make_key(_bucket_key(endpoint, bucket)))
+    rows = iter(pipe.execute())
+
+    metrics = []
+    for endpoint in endpoints:
+        totals = {}
+        for _bucket in buckets:
+            for field, value in next(rows).items():
+                field = frappe.safe_decode(field)
+                totals[field] = totals.get(field, 0) + float(value)
+
+        calls = int(totals.get("calls", 0))
+        if not calls:
+            continue
+
+        cached = {result: int(totals.get(f"cache_{result}", 0)) for result in CACHE_RESULTS}
+        looked_up = sum(cached.values())
+        histogram = [(bound, int(totals.get(f"wall_le_{bound}", 0))) for bound in (*LATENCY_BOUNDS, "inf")]
+
+        metrics.append({
+            "endpoint": endpoint,
+            "calls": calls,
+            "errors": int(totals.get("errors", 0)),
+            "total_ms": totals.get("wall_ms", 0),
+            **{f"avg_{field}": totals.get(field, 0) / calls for field in SUM_FIELDS},
+            "p50_ms": _percentile(histogram, calls, 0.50),
+            "p95_ms": _percentile(histogram, calls, 0.95),
+            "p99_ms": _percentile(histogram, calls, 0.99),
+            "cache": cached,
+            "hit_rate": (cached["hit"] + cached["stale"]) / looked_up if looked_up else None,
+            "histogram": histogram,
+        })
+
+    metrics.sort(key=lambda row: row["total_ms"], reverse=True)
+    return metrics
+
+def _percentile(histogram, calls, fraction):
+    """Upper bound of the histogram bucket holding the given fraction of calls"""
+    seen = 0
+    for bound, count in histogram:
+        seen += count
+        if seen >= calls * fraction:
+            return bound
+    return "inf"
+
+@frappe.whitelist(methods=["POST"])
+def reset_dashboard_metrics():
+    frappe.only_for("System Manager")
+    frappe.cache().delete_keys(f"{METRICS_PREFIX}:")
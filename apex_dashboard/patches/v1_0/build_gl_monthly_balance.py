@@ -0,0 +1,5 @@
+from apex_dashboard.gl_snapshot import rebuild_gl_snapshot
+
+
+def execute():
+	rebuild_gl_snapshot()
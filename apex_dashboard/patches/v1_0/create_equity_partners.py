@@ -0,0 +1,22 @@
+import frappe
+
+# Partners the equity dashboards used to detect from hardcoded account name checks
+DEFAULT_PARTNERS = {
+	"Mohamed Gaber": ["mohamed gaber"],
+	"Elsayed Said": ["alsaid", "elsayed"],
+}
+
+
+def execute():
+	if frappe.db.count("Apex Equity Partner"):
+		return
+
+	for partner, patterns in DEFAULT_PARTNERS.items():
+		frappe.get_doc(
+			{
+				"doctype": "Apex Equity Partner",
+				"partner_name": partner,
+				"enabled": 1,
+				"rules": [{"account_name_contains": pattern} for pattern in patterns],
+			}
+		).insert(ignore_permissions=True)
@@ -0,0 +1,236 @@
+"""
+Opt-in profiling of dashboard calls for Apex Dashboard
+A System Manager can enable profiling for a user for a while, or profile a
+single call by passing apex_profile=1. instrument_endpoint then runs the
+endpoint under a profiler and stores an artifact: the profile (a pyinstrument
+HTML flame view when pyinstrument is installed, cProfile pstats otherwise)
+and a JSON record with the call's timings and SQL timeline. Artifacts are
+kept in the site's private files, at most PROFILE_RETENTION of them and for
+PROFILE_MAX_AGE_DAYS.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import time
+
+import frappe
+from frappe import _
+from frappe.utils import cint, now
+
+# Request parameter that profiles a single call (System Managers only)
+PROFILE_FLAG = "apex_profile"
+PROFILE_USER_PREFIX = "apex_dashboard:profile_user:"
+MAX_PROFILING_MINUTES = 24 * 60
+PROFILE_RETENTION = 100
+PROFILE_MAX_AGE_DAYS = 7
+# Sampling interval of pyinstrument, in seconds
+SAMPLE_INTERVAL = 0.001
+# Statements kept in the SQL timeline of one profile, and characters per statement
+MAX_TIMELINE = 2000
+MAX_QUERY_LENGTH = 4000
+PROFILE_ID_PATTERN = re.compile(r"^[0-9]{14}-[a-z0-9]{8}$")
+
+def should_profile():
+    """Whether the current call of a dashboard endpoint is to be profiled"""
+    if cint(frappe.form_dict.get(PROFILE_FLAG)) and "System Manager" in frappe.get_roles():
+        return True
+    return bool(frappe.cache().get_value(_user_key(frappe.session.user)))
+
+class ProfileSession:
+    """Profiler around one endpoint call: pyinstrument if installed, else cProfile"""
+
+    def __init__(self):
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            self.kind = "cprofile"
+            self.profiler = cProfile.Profile()
+        else:
+            self.kind = "pyinstrument"
+            self.profiler = Profiler(interval=SAMPLE_INTERVAL)
+
+    def start(self):
+        if self.kind == "pyinstrument":
+            self.profiler.start()
+        else:
+            self.profiler.enable()
+
+    def stop(self):
+        if self.kind == "pyinstrument":
+            self.profiler.stop()
+        else:
+            self.profiler.disable()
+
+    def write(self, path):
+        """Write the profile next to path; returns the file name and a text summary"""
+        if self.kind == "pyinstrument":
+            filename = f"{path}.html"
+            with open(filename, "w", encoding="utf-8") as f:
+                f.write(self.profiler.output_html())
+            return filename, self.profiler.output_text(unicode=False, color=False)
+
+        filename = f"{path}.pstats"
+        self.profiler.dump_stats(filename)
+        summary = io.StringIO()
+        pstats.Stats(self.profiler, stream=summary).sort_stats("cumulative").print_stats(40)
+        return filename, summary.getvalue()
+
+def start_profile():
+    """Start profiling the current call; returns the session for save_profile, or None"""
+    session = ProfileSession()
+    try:
+        session.start()
+    except ValueError:
+        # Another profiler (e.g. bench --profile) is already running
+        return None
+    return session
+
+def save_profile(session, endpoint, call, kwargs, error=False):
+    """
+    Store the artifact of a profiling session
+    Args:
+        session: ProfileSession returned by start_profile, stopped
+        endpoint: Endpoint name, as in the metrics
+        call: Call dict of metrics.capture_call, with statements recorded
+        kwargs: Arguments of the call
+        error: Whether the call raised
+    Returns:
+        str: Profile id
+    """
+    profile_id = f"{time.strftime('%Y%m%d%H%M%S')}-{frappe.generate_hash(length=8).lower()}"
+    path = os.path.join(get_profiles_path(), profile_id)
+    filename, summary = session.write(path)
+
+    timeline = [
+        dict(statement, query=statement["query"][:MAX_QUERY_LENGTH])
+        for statement in (call.statements or [])[:MAX_TIMELINE]
+    ]
+    record = {
+        "id": profile_id,
+        "endpoint": endpoint,
+        "user": frappe.session.user,
+        "args": {key: str(value) for key, value in kwargs.items()},
+        "created_at": now(),
+        "profiler": session.kind,
+        "artifact": os.path.basename(filename),
+        "error": error,
+        "wall_ms": round(call.wall_ms, 2),
+        "db_ms": round(call.db_ms, 2),
+        "queries": call.queries,
+        "rows": call.rows,
+        "cache": call.cache,
+        "summary": summary,
+        "sql_timeline": timeline,
+    }
+    with open(f"{path}.json", "w", encoding="utf-8") as f:
+        json.dump(record, f, default=str)
+
+    prune_profiles()
+    return profile_id
+
+def get_profiles_path():
+    path = frappe.get_site_path("private", "apex_dashboard_profiles")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def prune_profiles(retention=PROFILE_RETENTION, max_age_days=PROFILE_MAX_AGE_DAYS):
+    """
+    Delete profiles beyond the newest `retention` or older than max_age_days
+    Runs after each stored profile and daily from the scheduler.
+    """
+    path = get_profiles_path()
+    oldest = time.time() - max_age_days * 24 * 60 * 60
+    records = sorted(
+        (entry for entry in os.scandir(path) if entry.name.endswith(".json")),
+        key=lambda entry: entry.name,
+        reverse=True,
+    )
+
+    for index, entry in enumerate(records):
+        if index < retention and entry.stat().st_mtime >= oldest:
+            continue
+        profile_id = entry.name[:-len(".json")]
+        for name in os.listdir(path):
+            if name.startswith(f"{profile_id}."):
+                os.remove(os.path.join(path, name))
+
+@frappe.whitelist(methods=["POST"])
+def enable_profiling(user=None, minutes=30):
+    """
+    Profile every dashboard call of a user for a while
+    Args:
+        user: User to profile, default the current user
+        minutes: How long, at most a day
+    """
+    frappe.only_for("System Manager")
+    user = user or frappe.session.user
+    seconds = min(max(cint(minutes), 1), MAX_PROFILING_MINUTES) * 60
+    frappe.cache().set_value(_user_key(user), 1, expires_in_sec=seconds)
+
+@frappe.whitelist(methods=["POST"])
+def disable_profiling(user=None):
+    frappe.only_for("System Manager")
+    frappe.cache().delete_value(_user_key(user or frappe.session.user))
+
+@frappe.whitelist()
+def get_profiling_users():
+    """Users whose dashboard calls are being profiled"""
+    frappe.only_for("System Manager")
+    prefix = frappe.cache().make_key(PROFILE_USER_PREFIX)
+    return sorted(
+        frappe.safe_decode(key)[len(prefix):] for key in frappe.cache().get_keys(PROFILE_USER_PREFIX)
+    )
+
+@frappe.whitelist()
+def get_profiles():
+    """
+    List the stored profiles, newest first
+    Returns:
+        list: Profile records without the summary and SQL timeline
+    """
+    frappe.only_for("System Manager")
+    path = get_profiles_path()
+    profiles = []
+    for name in sorted(os.listdir(path), reverse=True):
+        if name.endswith(".json"):
+            record = _read_record(name[:-len(".json")])
+            record.pop("summary", None)
+            record["statements"] = len(record.pop("sql_timeline", []))
+            profiles.append(record)
+    return profiles
+
+@frappe.whitelist()
+def get_profile(profile_id):
+    """Get a stored profile record, with its text summary and SQL timeline"""
+    frappe.only_for("System Manager")
+    return _read_record(profile_id)
+
+@frappe.whitelist()
+def download_profile(profile_id):
+    """Download the profiler output of a stored profile (HTML or pstats)"""
+    frappe.only_for("System Manager")
+    record = _read_record(profile_id)
+    with open(os.path.join(get_profiles_path(), record["artifact"]), "rb") as f:
+        content = f.read()
+
+    frappe.local.response.filename = record["artifact"]
+    frappe.local.response.filecontent = content
+    frappe.local.response.type = "download"
+
+def _read_record(profile_id):
+    if not PROFILE_ID_PATTERN.match(profile_id or ""):
+        frappe.throw(_("Invalid profile id"))
+
+    path = os.path.join(get_profiles_path(), f"{profile_id}.json")
+    if not os.path.exists(path):
+        frappe.throw(_("Profile {0} not found").format(profile_id), frappe.DoesNotExistError)
+
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def _user_key(user):
+    return f"{PROFILE_USER_PREFIX}{user}"
@@ -0,0 +1,94 @@
+/* eslint-disable no-undef */
+// Progressive loading for the Apex dashboards: the endpoint is called with
+// stream=1 and each section is rendered as its background job publishes it
+// (see apex_dashboard/dashboard_stream.py).
+
+window.DashboardStream = window.DashboardStream || (() => {
+	const EVENT = "apex_dashboard_section";
+	// Give up on a stream (and load the plain way) after this many milliseconds
+	const TIMEOUT = 60000;
+
+	const isAvailable = () =>
+		Boolean(frappe.realtime && frappe.realtime.socket && frappe.realtime.socket.connected);
+
+	/**
+	 * Load a dashboard progressively.
+	 * on_update(data, done) is called with the merged payload after each
+	 * section, and with the full payload (done = true) at the end or on a
+	 * cache hit. on_error() is called when the stream fails or times out;
+	 * the page should then load the plain way.
+	 * Returns a handle whose close() stops listening (e.g. on a new load).
+	 */
+	const load = ({ method, args, on_update, on_error }) => {
+		// Chosen here, so sections published before the response are not missed;
+		// replaced by the id of the running stream when the request joins one
+		let stream_id = frappe.utils.get_random(12);
+		const data = {};
+		let closed = false;
+		let timer = null;
+
+		const close = () => {
+			if (closed) return;
+			closed = true;
+			clearTimeout(timer);
+			frappe.realtime.off(EVENT, handler);
+		};
+
+		const fail = () => {
+			if (closed) return;
+			close();
+			on_error();
+		};
+
+		const handler = (message) => {
+			if (closed || !message || message.stream_id !== stream_id) return;
+			if (message.error) {
+				fail();
+				return;
+			}
+			if (message.done) {
+				close();
+				on_update(message.data, true);
+				return;
+			}
+			Object.assign(data, message.data);
+			on_update(data, false);
+		};
+
+		frappe.realtime.on(EVENT, handler);
+		timer = setTimeout(fail, TIMEOUT);
+
+		frappe.call({
+			method,
+			args: Object.assign({}, args, { stream: 1, stream_id }),
+			callback: (r) => {
+				const message = r.message || {};
+				if (message.data) {
+					// Served from the cache
+					close();
+					on_update(message.data, true);
+				} else if (!message.stream_id) {
+					fail();
+				} else {
+					stream_id = message.stream_id;
+				}
+			},
+			error: fail,
+		});
+
+		return { close };
+	};
+
+	const placeholder = (title, extra_class = "") => `
+		<div class="${extra_class} dashboard-stream-placeholder" style="opacity: 0.6;">
+			<div class="card-header-new">${title}</div>
+			<div class="text-muted" style="padding: 10px 0;">${__("Loading...")}</div>
+		</div>
+	`;
+
+	return {
+		isAvailable,
+		load,
+		placeholder,
+	};
+})();
@@ -9,6 +9,9 @@ from frappe.query_builder.functions import Sum, Coalesce
 from typing import List, Dict, Optional
 from frappe.utils import flt
 
+from apex_dashboard.account_tree import get_descendants
+from apex_dashboard.gl_snapshot import get_snapshot_gl_totals
+
 
 def get_gl_balances(
     accounts: List[str],
@@ -48,6 +51,11 @@ def get_gl_balances(
     if not accounts:
         return {}
     
+    # Whole months come from the monthly snapshot, so long ranges stay cheap
+    rows = get_snapshot_gl_totals(accounts, from_date, to_date, company, group_by_currency)
+    if rows is not None:
+        return _format_balances(rows)
+    
     GLEntry = DocType("GL Entry")
     
     # Build base query
@@ -75,9 +83,10 @@ def get_gl_balances(
         query = query.groupby(GLEntry.account)
     
     # Execute query
-    rows = query.run(as_dict=True)
-    
-    # Format results
+    return _format_balances(query.run(as_dict=True))
+
+
+def _format_balances(rows) -> Dict[str, Dict]:
     result = {}
     for row in rows:
         result[row.account] = {
@@ -196,30 +205,17 @@ def get_child_accounts(
             is_group=0
         )
     """
-    # Get parent account details
-    parent = frappe.get_doc("Account", parent_account)
-    
-    Account = DocType("Account")
-    
-    query = (
-        frappe.qb.from_(Account)
-        .select(
-            Account.name,
-            Account.account_name,
-            Account.account_currency,
-            Account.is_group,
-            Account.account_type
-        )
-        .where(Account.lft > parent.lft)
-        .where(Account.rgt < parent.rgt)
-        .where(Account.company == company)
-    )
-    
-    # Filter by is_group if specified
-    if is_group is not None:
-        query = query.where(Account.is_group == is_group)
-    
-    return query.run(as_dict=True)
+    # Served from the cached chart-of-accounts index
+    return [
+        {
+            "name": account.name,
+            "account_name": account.account_name,
+            "account_currency": account.account_currency,
+            "is_group": account.is_group,
+            "account_type": account.account_type
+        }
+        for account in get_descendants(parent_account, company, is_group)
+    ]
 
 
 def get_account_balance_on_date(
@@ -0,0 +1,610 @@
+"""
+Synthetic ledgers for Apex Dashboard benchmarks
+Fills a test site with a company of a chosen size: foreign-currency banks and
+partner equity accounts, customers, suppliers, items and bins, submitted
+invoices and payments, and the GL entries behind them. Transactions are bulk
+inserted without document validation, so large ledgers load in minutes; no
+network access is needed. Only runs on sites with allow_tests set.
+"""
+
+import random
+from datetime import timedelta
+
+import frappe
+from frappe import _
+from frappe.utils import add_days, add_months, flt, get_first_day, getdate, now, today
+
+from apex_dashboard.account_tree import clear_account_tree, get_accounts
+from apex_dashboard.cache_utils import clear_all_dashboard_caches
+from apex_dashboard.gl_snapshot import rebuild_gl_snapshot
+
+# Named sizes: number of GL entries
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+SYNTHETIC_COMPANY_PREFIX = "Apex Bench"
+# Prefix of every generated transaction, so a ledger can be replaced
+NAME_PREFIX = "SYN"
+COMPANY_CURRENCY = "EGP"
+FOREIGN_CURRENCIES = {"USD": 50.0, "EUR": 54.5}
+# Item groups known to the inventory dashboard
+ITEM_GROUPS = ("Zircon Block", "PMMA Disk", "Intra Oral Scanner", "CAD Software", "Milling Tools")
+PARTNERS = ("Mohamed Gaber", "Elsayed Said")
+# Share of vouchers per type; every voucher posts two GL entries
+VOUCHER_MIX = (
+    ("Sales Invoice", 0.35),
+    ("Purchase Invoice", 0.25),
+    ("Payment Entry", 0.30),
+    ("Journal Entry", 0.10),
+)
+VOUCHER_CODES = {
+    "Sales Invoice": "SINV",
+    "Purchase Invoice": "PINV",
+    "Payment Entry": "PE",
+    "Journal Entry": "JV",
+}
+CHUNK_SIZE = 10_000
+
+GL_FIELDS = (
+    "name", "creation", "modified", "owner", "modified_by", "docstatus",
+    "posting_date", "transaction_date", "fiscal_year", "company", "cost_center",
+    "account", "account_currency", "debit", "credit",
+    "debit_in_account_currency", "credit_in_account_currency",
+    "party_type", "party", "against", "voucher_type", "voucher_no",
+    "remarks", "is_opening", "is_cancelled",
+)
+SALES_INVOICE_FIELDS = (
+    "name", "creation", "modified", "owner", "modified_by", "docstatus",
+    "company", "customer", "customer_name", "posting_date", "due_date", "debit_to",
+    "currency", "conversion_rate", "net_total", "base_net_total", "grand_total",
+    "base_grand_total", "outstanding_amount", "status",
+)
+PURCHASE_INVOICE_FIELDS = (
+    "name", "creation", "modified", "owner", "modified_by", "docstatus",
+    "company", "supplier", "supplier_name", "posting_date", "due_date", "credit_to",
+    "currency", "conversion_rate", "net_total", "base_net_total", "grand_total",
+    "base_grand_total", "outstanding_amount", "status",
+)
+INVOICE_ITEM_FIELDS = (
+    "name", "creation", "modified", "owner", "modified_by", "docstatus",
+    "parent", "parenttype", "parentfield", "idx", "item_code", "item_name",
+    "qty", "stock_qty", "uom", "conversion_factor", "rate", "amount",
+    "base_rate", "base_amount", "net_amount", "base_net_amount",
+    "incoming_rate", "warehouse", "account",
+)
+PAYMENT_ENTRY_FIELDS = (
+    "name", "creation", "modified", "owner", "modified_by", "docstatus",
+    "company", "posting_date", "payment_type", "party_type", "party", "party_name",
+    "paid_from", "paid_to", "paid_from_account_currency", "paid_to_account_currency",
+    "paid_amount", "base_paid_amount", "received_amount", "base_received_amount",
+    "source_exchange_rate", "target_exchange_rate",
+)
+JOURNAL_ENTRY_FIELDS = (
+    "name", "creation", "modified", "owner", "modified_by", "docstatus",
+    "company", "posting_date", "voucher_type", "total_debit", "total_credit", "user_remark",
+)
+BIN_FIELDS = (
+    "name", "creation", "modified", "owner", "modified_by", "docstatus",
+    "item_code", "warehouse", "stock_uom", "actual_qty", "projected_qty",
+    "valuation_rate", "stock_value",
+)
+
+def get_size(size):
+    """Number of GL entries of a named size (see SIZES) or a plain number"""
+    size = str(size).lower()
+    if size in SIZES:
+        return SIZES[size]
+    if not size.isdigit() or int(size) < 2:
+        frappe.throw(_("Size must be one of {0} or a number of GL entries").format(", ".join(SIZES)))
+    return int(size)
+
+def get_synthetic_companies():
+    """Companies created by generate_synthetic_ledger, smallest name first"""
+    return frappe.get_all(
+        "Company", filters={"name": ["like", f"{SYNTHETIC_COMPANY_PREFIX} %"]}, pluck="name", order_by="name"
+    )
+
+def check_test_site():
+    """Refuse to touch a site that is not meant for tests"""
+    if not frappe.conf.get("allow_tests"):
+        frappe.throw(_("Synthetic data and benchmarks only run on sites with allow_tests set"))
+
+def generate_synthetic_ledger(size="10k", company=None, years=3, seed=42, replace=False):
+    """
+    Fill a company with a synthetic ledger
+    Args:
+        size: Named size (10k, 1m, 10m) or number of GL entries
+        company: Company to fill, created when missing; default
+            "Apex Bench <size>"
+        years: Calendar years of history, ending today
+        seed: Random seed, the same seed gives the same ledger
+        replace: Delete the company's earlier synthetic transactions first
+    Returns:
+        dict: company and number of GL entries, vouchers and bins inserted
+    """
+    check_test_site()
+    entries = get_size(size)
+    company = company or f"{SYNTHETIC_COMPANY_PREFIX} {str(size).upper()}"
+    rng = random.Random(seed)
+
+    to_date = getdate(today())
+    from_date = getdate(f"{to_date.year - years + 1}-01-01")
+
+    if frappe.db.exists("Company", company) and frappe.db.exists(
+        "GL Entry", {"company": company, "name": ["like", f"{NAME_PREFIX}-%"]}
+    ):
+        if not replace:
+            frappe.throw(_("{0} already has a synthetic ledger, pass replace to rebuild it").format(company))
+        delete_synthetic_ledger(company)
+
+    abbr = ensure_company(company)
+    ensure_fiscal_years(from_date, to_date)
+    ensure_exchange_rates(from_date, to_date)
+    accounts = ensure_accounts(company, abbr)
+    masters = ensure_masters(company, abbr, entries, rng)
+    frappe.db.commit()
+
+    result = insert_vouchers(company, abbr, accounts, masters, entries, from_date, to_date, rng)
+    result["bins"] = insert_bins(company, abbr, masters, rng)
+    frappe.db.commit()
+
+    # Bulk inserts bypass the GL hooks
+    rebuild_gl_snapshot(company=company)
+    clear_all_dashboard_caches()
+    frappe.db.commit()
+
+    result["company"] = company
+    return result
+
+def delete_synthetic_ledger(company):
+    """Delete the synthetic transactions and bins of a company (masters are kept)"""
+    check_test_site()
+    abbr = frappe.db.get_value("Company", company, "abbr")
+    prefix = f"{NAME_PREFIX}-{abbr}-%"
+
+    for doctype in ("GL Entry", "Sales Invoice", "Purchase Invoice", "Payment Entry", "Journal Entry"):
+        frappe.db.delete(doctype, {"company": company, "name": ["like", prefix]})
+    for doctype in ("Sales Invoice Item", "Purchase Invoice Item", "Bin"):
+        frappe.db.delete(doctype, {"name": ["like", prefix]})
+
+    frappe.db.commit()
+
+def ensure_company(company):
+    """Create the company with ERPNext's standard chart of accounts; returns its abbreviation"""
+    if frappe.db.exists("Company", company):
+        return frappe.db.get_value("Company", company, "abbr")
+
+    for currency in (COMPANY_CURRENCY, *FOREIGN_CURRENCIES):
+        frappe.db.set_value("Currency", currency, "enabled", 1)
+
+    abbr = "".join(word[0] for word in company.split()[:-1]).upper() + company.split()[-1].upper()
+    frappe.get_doc({
+        "doctype": "Company",
+        "company_name": company,
+        "abbr": abbr,
+        "default_currency": COMPANY_CURRENCY,
+        "country": frappe.db.get_default("country") or "Egypt",
+        "create_chart_of_accounts_based_on": "Standard Template",
+        "chart_of_accounts": "Standard",
+    }).insert(ignore_permissions=True)
+    return abbr
+
+def ensure_fiscal_years(from_date, to_date):
+    """Create calendar fiscal years for the years not covered yet"""
+    for year in range(from_date.year, to_date.year + 1):
+        start, end = getdate(f"{year}-01-01"), getdate(f"{year}-12-31")
+        covered = frappe.db.exists(
+            "Fiscal Year", {"year_start_date": ["<=", start], "year_end_date": [">=", end]}
+        )
+        if covered or frappe.db.exists("Fiscal Year", str(year)):
+            continue
+        frappe.get_doc({
+            "doctype": "Fiscal Year",
+            "year": str(year),
+            "year_start_date": start,
+            "year_end_date": end,
+        }).insert(ignore_permissions=True)
+
+def ensure_exchange_rates(from_date, to_date):
+    """Monthly Currency Exchange rates of the foreign currencies, drifting upwards"""
+    month = get_first_day(from_date)
+    step = 0
+    while month <= to_date:
+        for currency, rate in FOREIGN_CURRENCIES.items():
+            filters = {"date": month, "from_currency": currency, "to_currency": COMPANY_CURRENCY}
+            if not frappe.db.exists("Currency Exchange", filters):
+                frappe.get_doc({
+                    "doctype": "Currency Exchange",
+                    **filters,
+                    "exchange_rate": flt(rate * (1 + 0.01 * step), 4),
+                    "for_buying": 1,
+                    "for_selling": 1,
+                }).insert(ignore_permissions=True)
+        month = add_months(month, 1)
+        step += 1
+
+def ensure_accounts(company, abbr):
+    """
+    Add the benchmark accounts to the standard chart: a bank per currency and
+    capital, current and withdrawal accounts per partner
+    Returns:
+        frappe._dict of the account names used by the vouchers
+    """
+    clear_account_tree()
+    bank_group = _first(get_accounts(company, account_type="Bank", is_group=1), "Bank")
+    equity_root = _first(
+        [acc for acc in get_accounts(company, root_type="Equity", is_group=1) if not acc.parent_account], "Equity"
+    )
+
+    banks = {}
+    for currency in (COMPANY_CURRENCY, *FOREIGN_CURRENCIES):
+        banks[currency] = _ensure_account(
+            company, abbr, f"Bank {currency}", bank_group.name, account_type="Bank", account_currency=currency
+        )
+
+    partners = {}
+    for partner in PARTNERS:
+        partners[partner] = frappe._dict({
+            kind: _ensure_account(company, abbr, f"{partner} {label}", equity_root.name)
+            for kind, label in (("capital", "Capital"), ("current", "Current"), ("withdrawals", "Withdrawals"))
+        })
+
+    clear_account_tree()
+    cogs = _first(get_accounts(company, account_type="Cost of Goods Sold", is_group=0), "Cost of Goods Sold")
+    stock = _first(get_accounts(company, account_type="Stock", is_group=0), "Stock")
+    expenses = [
+        acc.name for acc in get_accounts(company, root_type="Expense", is_group=0)
+        if acc.account_type not in ("Cost of Goods Sold", "Stock Adjustment", "Round Off", "Depreciation")
+    ]
+
+    return frappe._dict(
+        receivable=_first(get_accounts(company, account_type="Receivable", is_group=0), "Receivable").name,
+        payable=_first(get_accounts(company, account_type="Payable", is_group=0), "Payable").name,
+        cash=_first(get_accounts(company, account_type="Cash", is_group=0), "Cash").name,
+        banks=banks,
+        income=[acc.name for acc in get_accounts(company, root_type="Income", is_group=0)],
+        cogs=cogs.name,
+        stock=stock.name,
+        expenses=expenses or [cogs.name],
+        partners=partners,
+        cost_center=frappe.get_cached_value("Company", company, "cost_center"),
+    )
+
+def _ensure_account(company, abbr, account_name, parent_account, **fields):
+    name = f"{account_name} - {abbr}"
+    if not frappe.db.exists("Account", name):
+        frappe.get_doc({
+            "doctype": "Account",
+            "account_name": account_name,
+            "parent_account": parent_account,
+            "company": company,
+            "is_group": 0,
+            **fields,
+        }).insert(ignore_permissions=True)
+    return name
+
+def _first(accounts, label):
+    if not accounts:
+        frappe.throw(_("The chart of accounts has no {0} account").format(label))
+    return accounts[0]
+
+def ensure_masters(company, abbr, entries, rng):
+    """
+    Customers, suppliers and stock items scaled to the ledger size, created
+    once per company and reused by later runs
+    Returns:
+        frappe._dict of customer, supplier and item names and the warehouses
+    """
+    for item_group in ITEM_GROUPS:
+        if not frappe.db.exists("Item Group", item_group):
+            frappe.get_doc({
+                "doctype": "Item Group",
+                "item_group_name": item_group,
+                "parent_item_group": "All Item Groups",
+            }).insert(ignore_permissions=True)
+
+    timestamp = now()
+    user = frappe.session.user
+    customer_group = frappe.db.get_value("Customer Group", {"is_group": 0}) or "All Customer Groups"
+    territory = frappe.db.get_value("Territory", {"is_group": 0}) or "All Territories"
+    supplier_group = frappe.db.get_value("Supplier Group", {"is_group": 0}) or "All Supplier Groups"
+
+    customers = [f"{abbr} Customer {n:05d}" for n in range(max(20, min(entries // 500, 5000)))]
+    suppliers = [f"{abbr} Supplier {n:05d}" for n in range(max(10, min(entries // 1000, 2500)))]
+    items = [f"{abbr}-ITEM-{n:05d}" for n in range(max(50, min(entries // 1000, 5000)))]
+
+    _bulk_insert_missing(
+        "Customer",
+        ("name", "creation", "modified", "owner", "modified_by", "customer_name", "customer_type",
+         "customer_group", "territory", "default_currency"),
+        [(name, timestamp, timestamp, user, user, name, "Company", customer_group, territory,
+          COMPANY_CURRENCY) for name in customers],
+    )
+    _bulk_insert_missing(
+        "Supplier",
+        ("name", "creation", "modified", "owner", "modified_by", "supplier_name", "supplier_type",
+         "supplier_group", "default_currency"),
+        [(name, timestamp, timestamp, user, user, name, "Company", supplier_group,
+          rng.choice((COMPANY_CURRENCY, COMPANY_CURRENCY, *FOREIGN_CURRENCIES))) for name in suppliers],
+    )
+    _bulk_insert_missing(
+        "Item",
+        ("name", "creation", "modified", "owner", "modified_by", "item_code", "item_name", "item_group",
+         "stock_uom", "is_stock_item", "description"),
+        [(name, timestamp, timestamp, user, user, name, name, ITEM_GROUPS[n % len(ITEM_GROUPS)], "Nos",
+          1, name) for n, name in enumerate(items)],
+    )
+
+    warehouses = frappe.get_all("Warehouse", filters={"company": company, "is_group": 0}, pluck="name")
+    if not warehouses:
+        frappe.throw(_("{0} has no warehouse").format(company))
+
+    return frappe._dict(
+        customers=customers,
+        suppliers=suppliers,
+        supplier_currency=dict(frappe.get_all(
+            "Supplier", filters={"name": ["in", suppliers]}, fields=["name", "default_currency"], as_list=True
+        )),
+        items=items,
+        warehouses=warehouses,
+    )
+
+def _bulk_insert_missing(doctype, fields, rows):
+    existing = set(frappe.get_all(doctype, filters={"name": ["in", [row[0] for row in rows]]}, pluck="name"))
+    rows = [row for row in rows if row[0] not in existing]
+    if rows:
+        frappe.db.bulk_insert(doctype, fields, rows, chunk_size=CHUNK_SIZE)
+
+def insert_vouchers(company, abbr, accounts, masters, entries, from_date, to_date, rng):
+    """
+    Insert entries // 2 vouchers spread evenly over the date range, with two
+    GL entries each, in chunks of CHUNK_SIZE GL entries (one commit per chunk)
+    Returns:
+        dict: Number of GL entries and vouchers per type
+    """
+    writer = _VoucherWriter(company, abbr, accounts, masters, rng)
+    days = (to_date - from_date).days + 1
+    voucher_types = [voucher_type for voucher_type, _share in VOUCHER_MIX]
+    weights = [share for _voucher_type, share in VOUCHER_MIX]
+
+    for number in range(entries // 2):
+        posting_date = from_date + timedelta(days=rng.randrange(days))
+        voucher_type = rng.choices(voucher_types, weights)[0]
+        writer.add(voucher_type, number, posting_date)
+        if len(writer.gl_rows) >= CHUNK_SIZE:
+            writer.flush()
+
+    writer.flush()
+    return {"gl_entries": writer.gl_count, "vouchers": writer.voucher_counts}
+
+class _VoucherWriter:
+    """Builds voucher, item and GL rows and bulk inserts them chunk by chunk"""
+
+    def __init__(self, company, abbr, accounts, masters, rng):
+        self.company = company
+        self.abbr = abbr
+        self.accounts = accounts
+        self.masters = masters
+        self.rng = rng
+        self.user = frappe.session.user
+        self.timestamp = now()
+        self.fiscal_years = frappe.get_all(
+            "Fiscal Year", fields=["name", "year_start_date", "year_end_date"], order_by="year_start_date"
+        )
+        self.rates = {}
+        self.gl_count = 0
+        self.voucher_counts = {voucher_type: 0 for voucher_type, _share in VOUCHER_MIX}
+        self._reset()
+
+    def _reset(self):
+        self.gl_rows = []
+        self.rows = {
+            "Sales Invoice": [],
+            "Purchase Invoice": [],
+            "Sales Invoice Item": [],
+            "Purchase Invoice Item": [],
+            "Payment Entry": [],
+            "Journal Entry": [],
+        }
+
+    def add(self, voucher_type, number, posting_date):
+        name = f"{NAME_PREFIX}-{self.abbr}-{VOUCHER_CODES[voucher_type]}-{number:09d}"
+        getattr(self, "_add_" + frappe.scrub(voucher_type))(name, posting_date)
+        self.voucher_counts[voucher_type] += 1
+
+    def flush(self):
+        frappe.db.bulk_insert("GL Entry", GL_FIELDS, self.gl_rows, chunk_size=CHUNK_SIZE)
+        self.gl_count += len(self.gl_rows)
+
+        fields = {
+            "Sales Invoice": SALES_INVOICE_FIELDS,
+            "Purchase Invoice": PURCHASE_INVOICE_FIELDS,
+            "Sales Invoice Item": INVOICE_ITEM_FIELDS,
+            "Purchase Invoice Item": INVOICE_ITEM_FIELDS,
+            "Payment Entry": PAYMENT_ENTRY_FIELDS,
+            "Journal Entry": JOURNAL_ENTRY_FIELDS,
+        }
+        for doctype, rows in self.rows.items():
+            if rows:
+                frappe.db.bulk_insert(doctype, fields[doctype], rows, chunk_size=CHUNK_SIZE)
+
+        frappe.db.commit()
+        self._reset()
+
+    def _add_sales_invoice(self, name, posting_date):
+        customer = self.rng.choice(self.masters.customers)
+        currency, rate = self._pick_currency(posting_date, foreign_share=0.2)
+        lines, total = self._item_lines(name, "Sales Invoice", rate, margin=True)
+        base_total = flt(total * rate, 2)
+        outstanding, status, due_date = self._settlement(total, posting_date)
+
+        self.rows["Sales Invoice"].append((
+            *self._standard(name), self.company, customer, customer, posting_date, due_date,
+            self.accounts.receivable, currency, rate, total, base_total, total, base_total, outstanding, status,
+        ))
+        self.rows["Sales Invoice Item"].extend(lines)
+        self._post(name, "Sales Invoice", posting_date, base_total,
+                   debit_account=self.accounts.receivable, credit_account=self.rng.choice(self.accounts.income),
+                   party_type="Customer", party=customer)
+
+    def _add_purchase_invoice(self, name, posting_date):
+        supplier = self.rng.choice(self.masters.suppliers)
+        currency = self.masters.supplier_currency.get(supplier) or COMPANY_CURRENCY
+        rate = self._rate(currency, posting_date)
+        lines, total = self._item_lines(name, "Purchase Invoice", rate, margin=False)
+        base_total = flt(total * rate, 2)
+        outstanding, status, due_date = self._settlement(total, posting_date)
+        debit_account = self.accounts.stock if self.rng.random() < 0.5 else self.rng.choice(self.accounts.expenses)
+
+        self.rows["Purchase Invoice"].append((
+            *self._standard(name), self.company, supplier, supplier, posting_date, due_date,
+            self.accounts.payable, currency, rate, total, base_total, total, base_total, outstanding, status,
+        ))
+        self.rows["Purchase Invoice Item"].extend(lines)
+        self._post(name, "Purchase Invoice", posting_date, base_total,
+                   debit_account=debit_account, credit_account=self.accounts.payable,
+                   party_type="Supplier", party=supplier)
+
+    def _add_payment_entry(self, name, posting_date):
+        receive = self.rng.random() < 0.55
+        currency, rate = self._pick_currency(posting_date, foreign_share=0.25)
+        bank = self.accounts.banks[currency] if self.rng.random() < 0.8 else self.accounts.cash
+        if bank == self.accounts.cash:
+            currency, rate = COMPANY_CURRENCY, 1.0
+        amount = flt(self.rng.uniform(500, 50_000), 2)
+        base_amount = flt(amount * rate, 2)
+
+        if receive:
+            party_type, party = "Customer", self.rng.choice(self.masters.customers)
+            paid_from, paid_to = self.accounts.receivable, bank
+            from_currency, to_currency = COMPANY_CURRENCY, currency
+        else:
+            party_type, party = "Supplier", self.rng.choice(self.masters.suppliers)
+            paid_from, paid_to = bank, self.accounts.payable
+            from_currency, to_currency = currency, COMPANY_CURRENCY
+
+        self.rows["Payment Entry"].append((
+            *self._standard(name), self.company, posting_date, "Receive" if receive else "Pay",
+            party_type, party, party, paid_from, paid_to, from_currency, to_currency,
+            amount if not receive else base_amount, base_amount,
+            amount if receive else base_amount, base_amount,
+            rate if not receive else 1.0, rate if receive else 1.0,
+        ))
+        self._post(name, "Payment Entry", posting_date, base_amount,
+                   debit_account=paid_to, credit_account=paid_from, party_type=party_type, party=party,
+                   debit_currency=to_currency, credit_currency=from_currency, rate=rate)
+
+    def _add_journal_entry(self, name, posting_date):
+        roll = self.rng.random()
+        partner = self.accounts.partners[self.rng.choice(PARTNERS)]
+        amount = flt(self.rng.uniform(1_000, 100_000), 2)
+        if roll < 0.7:
+            debit_account, credit_account, remark = self.rng.choice(self.accounts.expenses), self.accounts.cash, "Expense"
+        elif roll < 0.9:
+            debit_account, credit_account, remark = partner.withdrawals, self.accounts.cash, "Partner withdrawal"
+        else:
+            amount *= 10
+            debit_account, credit_account, remark = (
+                self.accounts.banks[COMPANY_CURRENCY], self.rng.choice((partner.capital, partner.current)),
+                "Partner contribution",
+            )
+
+        self.rows["Journal Entry"].append((
+            *self._standard(name), self.company, posting_date, "Journal Entry", amount, amount, remark,
+        ))
+        self._post(name, "Journal Entry", posting_date, amount,
+                   debit_account=debit_account, credit_account=credit_account, remarks=remark)
+
+    def _item_lines(self, parent, parenttype, rate, margin):
+        """Invoice item rows and their total in invoice currency"""
+        lines = []
+        total = 0
+        for idx in range(1, self.rng.randint(1, 3) + 1):
+            item_code = self.rng.choice(self.masters.items)
+            qty = self.rng.randint(1, 20)
+            price = flt(self.rng.uniform(100, 5_000), 2)
+            amount = flt(qty * price, 2)
+            # Sales lines carry the cost the profitability dashboard reads
+            incoming_rate = flt(price * rate * self.rng.uniform(0.55, 0.85), 2) if margin else 0
+            account = self.accounts.income[0] if parenttype == "Sales Invoice" else self.accounts.stock
+            lines.append((
+                *self._standard(f"{parent}-{idx}"), parent, parenttype, "items", idx, item_code, item_code,
+                qty, qty, "Nos", 1, price, amount, flt(price * rate, 2), flt(amount * rate, 2), amount,
+                flt(amount * rate, 2), incoming_rate, self.masters.warehouses[0], account,
+            ))
+            total += amount
+        return lines, flt(total, 2)
+
+    def _settlement(self, total, posting_date):
+        """Outstanding amount, status and due date of an invoice; about a third stay unpaid"""
+        due_date = add_days(posting_date, 30)
+        if self.rng.random() < 0.3:
+            status = "Overdue" if getdate(due_date) < getdate(today()) else "Unpaid"
+            return total, status, due_date
+        return 0, "Paid", due_date
+
+    def _post(self, voucher_no, voucher_type, posting_date, amount, debit_account, credit_account,
+              party_type=None, party=None, debit_currency=COMPANY_CURRENCY, credit_currency=COMPANY_CURRENCY,
+              rate=1.0, remarks=None):
+        fiscal_year = self._fiscal_year(posting_date)
+        for side, account, against, currency in (
+            ("debit", debit_account, credit_account, debit_currency),
+            ("credit", credit_account, debit_account, credit_currency),
+        ):
+            in_account_currency = flt(amount / rate, 2) if currency != COMPANY_CURRENCY else amount
+            on_party_account = account in (self.accounts.receivable, self.accounts.payable)
+            self.gl_rows.append((
+                *self._standard(f"{voucher_no}-{side[0]}"),
+                posting_date, posting_date, fiscal_year, self.company, self.accounts.cost_center,
+                account, currency,
+                amount if side == "debit" else 0, amount if side == "credit" else 0,
+                in_account_currency if side == "debit" else 0, in_account_currency if side == "credit" else 0,
+                party_type if on_party_account else None, party if on_party_account else None,
+                against, voucher_type, voucher_no, remarks or voucher_type, "No", 0,
+            ))
+
+    def _standard(self, name):
+        return (name, self.timestamp, self.timestamp, self.user, self.user, 1)
+
+    def _pick_currency(self, posting_date, foreign_share):
+        if self.rng.random() >= foreign_share:
+            return COMPANY_CURRENCY, 1.0
+        currency = self.rng.choice(list(FOREIGN_CURRENCIES))
+        return currency, self._rate(currency, posting_date)
+
+    def _rate(self, currency, posting_date):
+        if currency == COMPANY_CURRENCY:
+            return 1.0
+        month = get_first_day(posting_date)
+        if (currency, month) not in self.rates:
+            self.rates[(currency, month)] = flt(frappe.db.get_value(
+                "Currency Exchange",
+                {"from_currency": currency, "to_currency": COMPANY_CURRENCY, "date": ["<=", month]},
+                "exchange_rate",
+                order_by="date desc",
+            )) or FOREIGN_CURRENCIES[currency]
+        return self.rates[(currency, month)]
+
+    def _fiscal_year(self, posting_date):
+        for fiscal_year in self.fiscal_years:
+            if fiscal_year.year_start_date <= posting_date <= fiscal_year.year_end_date:
+                return fiscal_year.name
+        return None
+
+def insert_bins(company, abbr, masters, rng):
+    """One Bin per item and warehouse; some items run low or out of stock"""
+    timestamp = now()
+    user = frappe.session.user
+    rows = []
+    for item_code in masters.items:
+        for warehouse in masters.warehouses:
+            roll = rng.random()
+            qty = 0 if roll < 0.1 else rng.randint(1, 9) if roll < 0.3 else rng.randint(10, 500)
+            valuation_rate = flt(rng.uniform(100, 5_000), 2)
+            rows.append((
+                f"{NAME_PREFIX}-{abbr}-BIN-{len(rows):07d}", timestamp, timestamp, user, user, 0,
+                item_code, warehouse, "Nos", qty, qty, valuation_rate, flt(qty * valuation_rate, 2),
+            ))
+
+    # A Bin is unique per item and warehouse
+    frappe.db.delete("Bin", {"item_code": ["in", masters.items]})
+    frappe.db.bulk_insert("Bin", BIN_FIELDS, rows, chunk_size=CHUNK_SIZE)
+    return len(rows)
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from apex_dashboard import account_tree
+
+
+class TestAccountTree(FrappeTestCase):
+	def setUp(self):
+		account_tree.clear_account_tree()
+		self.company = frappe.get_all("Company", pluck="name", limit=1)[0]
+
+	def test_leaves_match_nested_set(self):
+		groups = frappe.get_all(
+			"Account", filters={"company": self.company, "is_group": 1}, fields=["name", "lft", "rgt"]
+		)
+		for group in groups:
+			expected = frappe.get_all(
+				"Account",
+				filters={"company": self.company, "is_group": 0, "lft": [">", group.lft], "rgt": ["<", group.rgt]},
+				pluck="name",
+			)
+			with self.subTest(group=group.name):
+				self.assertEqual(
+					sorted(account_tree.get_leaf_accounts(group.name, self.company)), sorted(expected)
+				)
+
+	def test_ledger_is_its_own_leaf(self):
+		ledger = frappe.get_all("Account", filters={"company": self.company, "is_group": 0}, pluck="name", limit=1)[0]
+		self.assertEqual(account_tree.get_leaf_accounts(ledger), [ledger])
+		self.assertEqual(account_tree.get_account(ledger).company, self.company)
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, add_months, today
+
+from apex_dashboard.cache_utils import get_balances_bulk
+
+
+class TestBalancesBulk(FrappeTestCase):
+	"""get_balances_bulk must agree with ERPNext's get_balance_on, account by account."""
+
+	def setUp(self):
+		from erpnext.accounts.utils import get_balance_on
+
+		self.get_balance_on = get_balance_on
+		self.company = frappe.db.get_value("GL Entry", {"is_cancelled": 0}, "company") or frappe.get_all(
+			"Company", pluck="name", limit=1
+		)[0]
+		# Ledgers and groups, balance sheet and profit and loss
+		self.accounts = frappe.get_all("Account", filters={"company": self.company}, pluck="name")
+
+	def assert_parity(self, date=None):
+		balances = get_balances_bulk(self.accounts, company=self.company, date=date)
+
+		for account in self.accounts:
+			with self.subTest(account=account, date=date):
+				expected = self.get_balance_on(account, date=date, company=self.company, ignore_account_permission=True)
+				expected_base = self.get_balance_on(
+					account, date=date, company=self.company, in_account_currency=False, ignore_account_permission=True
+				)
+				self.assertAlmostEqual(balances[account].balance, expected, places=2)
+				self.assertAlmostEqual(balances[account].balance_in_company_currency, expected_base, places=2)
+
+	def test_parity_today(self):
+		self.assert_parity()
+
+	def test_parity_as_of_past_dates(self):
+		for date in (add_days(today(), -1), add_months(today(), -6), add_months(today(), -18)):
+			self.assert_parity(date)
+
+	def test_cancelled_entries_are_ignored(self):
+		entry = frappe.db.get_value("GL Entry", {"is_cancelled": 1, "company": self.company}, ["account", "posting_date"])
+		if not entry:
+			self.skipTest("No cancelled GL entries")
+
+		account, posting_date = entry
+		self.accounts = [account]
+		self.assert_parity(posting_date)
+
+	def test_unknown_account_is_skipped(self):
+		self.assertEqual(get_balances_bulk(["_Test Apex Missing Account"]), {})
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from apex_dashboard import benchmark, synthetic_data
+
+
+def _endpoint(company=None, period=None):
+	frappe.db.sql("SELECT 1")
+	frappe.db.sql("SELECT 2")
+	return {"company": company, "period": period}
+
+
+def _report(wall_ms, queries):
+	run = {"wall_ms": wall_ms, "queries": queries}
+	return {
+		"companies": {
+			"Apex Bench 10K": {
+				"gl_entries": 10000,
+				"results": [
+					{"endpoint": "liquidity", "period": "This Month", "cold": run, "warm": run},
+					{"endpoint": "equity_trends", "period": None, "error": "ValueError: boom"},
+				],
+			}
+		}
+	}
+
+
+class TestBenchmark(FrappeTestCase):
+	def test_measure_call(self):
+		run = benchmark.measure_call(_endpoint, {"company": "_Test Company", "period": "This Month"})
+
+		self.assertEqual(run["queries"], 2)
+		self.assertEqual(run["rows"], 2)
+		self.assertGreater(run["bytes"], 0)
+		self.assertIsNone(run["cache"])
+
+	def test_summarize_runs(self):
+		runs = [
+			{"wall_ms": 30.0, "db_ms": 10.0, "queries": 4, "rows": 8, "bytes": 100, "cache": "hit"},
+			{"wall_ms": 10.0, "db_ms": 2.0, "queries": 4, "rows": 8, "bytes": 100, "cache": "hit"},
+			{"wall_ms": 20.0, "db_ms": 4.0, "queries": 4, "rows": 8, "bytes": 100, "cache": "stale"},
+		]
+		summary = benchmark.summarize_runs(runs)
+
+		self.assertEqual(summary["wall_ms"], 20.0)
+		self.assertEqual(summary["min_wall_ms"], 10.0)
+		self.assertEqual(summary["db_ms"], 4.0)
+		self.assertEqual(summary["cache"], ["hit", "stale"])
+
+	def test_compare_reports(self):
+		rows = benchmark.compare_reports(_report(200.0, 10), _report(100.0, 4))
+
+		self.assertEqual(len(rows), 1)
+		self.assertEqual(rows[0]["endpoint"], "liquidity")
+		self.assertEqual(rows[0]["cold"]["change"], -0.5)
+		self.assertEqual(rows[0]["warm"]["queries"], [10, 4])
+
+	def test_endpoints_cover_registry(self):
+		names = [name for name, _method, _period in benchmark.get_benchmark_endpoints()]
+
+		self.assertIn("liquidity", names)
+		self.assertIn("equity_v2", names)
+		self.assertEqual(
+			[name for name, _method, _period in benchmark.get_benchmark_endpoints(["inventory"])], ["inventory"]
+		)
+
+	def test_get_size(self):
+		self.assertEqual(synthetic_data.get_size("1M"), 1_000_000)
+		self.assertEqual(synthetic_data.get_size(5000), 5000)
+		self.assertRaises(frappe.ValidationError, synthetic_data.get_size, "huge")
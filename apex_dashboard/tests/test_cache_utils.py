@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import pickle
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from apex_dashboard import cache_utils
+
+_COMPANY = "_Test Apex Cache Company"
+
+
+class TestCacheUtils(FrappeTestCase):
+	def test_bump_changes_cache_key(self):
+		before = cache_utils.get_versioned_cache_key("liquidity", _COMPANY, "2025-01-01", "2025-01-31")
+		cache_utils.bump_ledger_version(company=_COMPANY)
+		after = cache_utils.get_versioned_cache_key("liquidity", _COMPANY, "2025-01-01", "2025-01-31")
+
+		self.assertNotEqual(before, after)
+		self.assertTrue(after.startswith(f"liquidity_dashboard_{_COMPANY}_v"))
+
+	def test_cached_dashboard_reuses_data_until_bump(self):
+		calls = []
+
+		def builder(company, from_date, to_date):
+			calls.append((company, from_date, to_date))
+			return {"total": len(calls)}
+
+		first = cache_utils.get_cached_dashboard("test", _COMPANY, builder, from_date="2025-01-01", to_date="2025-01-31")
+		second = cache_utils.get_cached_dashboard("test", _COMPANY, builder, from_date="2025-01-01", to_date="2025-01-31")
+		self.assertEqual(first, second)
+		self.assertEqual(len(calls), 1)
+
+		cache_utils.bump_ledger_version(company=_COMPANY)
+		third = cache_utils.get_cached_dashboard("test", _COMPANY, builder, from_date="2025-01-01", to_date="2025-01-31")
+		self.assertEqual(third, {"total": 2})
+
+	def test_invalidation_targets_dashboard_and_period(self):
+		def builder(company, from_date, to_date):
+			return {"from_date": from_date}
+
+		january = {"from_date": "2025-01-01", "to_date": "2025-01-31"}
+		february = {"from_date": "2025-02-01", "to_date": "2025-02-28"}
+		for dashboard_type in ("suppliers", "sales"):
+			for dates in (january, february):
+				cache_utils.get_cached_dashboard(dashboard_type, _COMPANY, builder, **dates)
+
+		def is_cached(dashboard_type, dates):
+			key = cache_utils.get_versioned_cache_key(
+				dashboard_type, _COMPANY, dates["from_date"], dates["to_date"]
+			)
+			# Ask Redis itself, not the request-local copy of get_value
+			return bool(frappe.cache().exists(key))
+
+		def is_indexed(dashboard_type, dates):
+			key = cache_utils.get_versioned_cache_key(
+				dashboard_type, _COMPANY, dates["from_date"], dates["to_date"]
+			)
+			index = frappe.cache().hgetall(cache_utils._cache_index_name(dashboard_type, _COMPANY))
+			return key in {frappe.safe_decode(field) for field in index}
+
+		# The invoice and its GL rows are coalesced into a single flush
+		for doctype in ("Purchase Invoice", "GL Entry", "GL Entry"):
+			doc = frappe._dict(doctype=doctype, company=_COMPANY, posting_date="2025-01-15")
+			cache_utils.invalidate_dashboard_caches(doc)
+		self.assertTrue(is_cached("suppliers", january))
+		cache_utils.flush_pending_invalidations()
+
+		self.assertFalse(is_cached("suppliers", january))
+		self.assertFalse(is_indexed("suppliers", january))
+		self.assertTrue(is_cached("suppliers", february))
+		self.assertTrue(is_indexed("suppliers", february))
+		self.assertFalse(is_cached("sales", january))
+		self.assertTrue(is_cached("sales", february))
+
+		# A Delivery Note does not touch the GL-based card dashboards
+		doc = frappe._dict(doctype="Delivery Note", company=_COMPANY, posting_date="2025-02-10")
+		cache_utils.invalidate_dashboard_caches(doc)
+		cache_utils.flush_pending_invalidations()
+		self.assertTrue(is_cached("sales", february))
+
+	def test_concurrent_rebuild_serves_last_value(self):
+		dates = {"from_date": "2025-03-01", "to_date": "2025-03-31"}
+		cache_utils.get_cached_dashboard("test", _COMPANY, lambda **kwargs: {"total": 1}, **dates)
+		cache_utils.bump_ledger_version(company=_COMPANY)
+
+		cache_key = cache_utils.get_versioned_cache_key("test", _COMPANY, dates["from_date"], dates["to_date"])
+		token = cache_utils.acquire_rebuild_lock(cache_key)
+		self.assertTrue(token)
+		self.assertIsNone(cache_utils.acquire_rebuild_lock(cache_key))
+
+		def builder(**kwargs):
+			raise AssertionError("another worker holds the rebuild lock")
+
+		try:
+			data = cache_utils.get_cached_dashboard("test", _COMPANY, builder, **dates)
+		finally:
+			cache_utils.release_rebuild_lock(cache_key, token)
+
+		self.assertEqual(data, {"total": 1})
+
+	def test_stale_entry_is_served_and_refreshed_in_background(self):
+		dates = {"from_date": "2025-04-01", "to_date": "2025-04-30"}
+		first = cache_utils.get_cached_dashboard("test", _COMPANY, lambda **kwargs: {"total": 1}, **dates)
+		self.assertIn("computed_at", first)
+
+		def builder(**kwargs):
+			raise AssertionError("stale entries must not be rebuilt in the request")
+
+		with patch("frappe.enqueue") as enqueue:
+			data = cache_utils.get_cached_dashboard(
+				"test", _COMPANY, builder, stale_while_revalidate=True, soft_ttl=-1, **dates
+			)
+
+		self.assertEqual(data["total"], 1)
+		enqueue.assert_called_once()
+		self.assertEqual(enqueue.call_args.args[0], "apex_dashboard.cache_utils.refresh_dashboard_cache")
+
+		cache_key = cache_utils.get_versioned_cache_key("test", _COMPANY, dates["from_date"], dates["to_date"])
+		cache_utils.release_rebuild_lock(cache_key, enqueue.call_args.kwargs["lock"])
+
+	def test_warmup_plan_starts_with_busiest_dashboard(self):
+		from apex_dashboard.cache_warmup import get_warmup_plan
+
+		for _i in range(3):
+			cache_utils.record_dashboard_request("sales", _COMPANY)
+
+		plan = [(spec.dashboard_type, company) for spec, company in get_warmup_plan(companies=[_COMPANY])]
+
+		self.assertEqual(plan[0], ("sales", _COMPANY))
+		self.assertIn(("liquidity", _COMPANY), plan)
+		# Card dashboards nobody opened are not warmed
+		self.assertNotIn(("template_dashboard_20", _COMPANY), plan)
+
+	def test_waiter_sees_entry_written_after_a_miss(self):
+		key = cache_utils.get_versioned_cache_key("test", _COMPANY, "2025-03-01", "2025-03-31")
+		cache = frappe.cache()
+		cache.delete_value(key)
+
+		# The request has already missed, so get_value would keep answering None
+		self.assertIsNone(cache.get_value(key))
+		# The lock holder writes from another process, straight to Redis
+		cache.set(cache.make_key(key), pickle.dumps({"total": 1}))
+		self.addCleanup(cache.delete_value, key)
+
+		self.assertEqual(cache_utils.wait_for_rebuild(key, wait=1), {"total": 1})
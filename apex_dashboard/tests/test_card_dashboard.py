@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from unittest.mock import patch
+
+from frappe.tests.utils import FrappeTestCase
+
+from apex_dashboard import card_dashboard
+
+_CATEGORY = "_Test Apex Card Category"
+
+
+class TestCardDashboard(FrappeTestCase):
+	def setUp(self):
+		card_dashboard.clear_card_plans()
+
+	def test_card_plan_is_compiled_once_until_cleared(self):
+		plan = {"version": "v1", "cards": []}
+		with patch.object(card_dashboard, "compile_card_plan", return_value=plan) as compile_plan:
+			card_dashboard.get_card_plan(_CATEGORY)
+			card_dashboard.get_card_plan(_CATEGORY)
+			self.assertEqual(compile_plan.call_count, 1)
+
+			card_dashboard.clear_card_plans()
+			card_dashboard.get_card_plan(_CATEGORY)
+			self.assertEqual(compile_plan.call_count, 2)
+
+	def test_static_cards_with_same_title_are_merged(self):
+		plan = {
+			"version": "v2",
+			"cards": [
+				{"title": "Target", "color": "#fff", "source": "Static Value", "static_value": 10.0, "leaves": []},
+				{"title": "Target", "color": "#000", "source": "Static Value", "static_value": 5.0, "leaves": []},
+			],
+		}
+		with patch.object(card_dashboard, "get_card_plan", return_value=plan):
+			data = card_dashboard.build_card_dashboard_data(None, _CATEGORY, "2025-01-01", "2025-01-31")
+
+		self.assertEqual(data["total"], 15.0)
+		self.assertEqual(data["groups"], [{"name": "Target", "total": 15.0, "color": "#fff", "accounts": []}])
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import pickle
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from apex_dashboard import cache_utils, dashboard_stream
+
+_COMPANY = "_Test Apex Stream Company"
+_SECTIONS = {}
+
+
+def _totals_section(company, from_date, to_date):
+	return {"total": 10}
+
+
+def _rows_section(company, from_date, to_date):
+	return {"rows": [company, from_date]}
+
+
+_SECTIONS.update(totals=_totals_section, rows=_rows_section)
+
+
+class TestDashboardStream(FrappeTestCase):
+	def setUp(self):
+		cache_utils.bump_ledger_version(company=_COMPANY)
+
+	def run_inline(self, method, queue=None, **kwargs):
+		frappe.get_attr(method)(**kwargs)
+
+	def test_stream_publishes_sections_then_full_payload(self):
+		published = []
+		with patch.object(frappe, "enqueue", side_effect=self.run_inline), patch.object(
+			frappe, "publish_realtime", side_effect=lambda event, message, user=None: published.append(message)
+		):
+			response = dashboard_stream.stream_dashboard(
+				"test", _COMPANY, _SECTIONS, stream_id="abcdef123456", from_date="2025-01-01", to_date="2025-01-31"
+			)
+
+		self.assertEqual(response, {"stream_id": "abcdef123456", "sections": ["totals", "rows"]})
+		self.assertEqual([message.get("section") for message in published], ["totals", "rows", None])
+
+		expected = dashboard_stream.build_sections(_SECTIONS, company=_COMPANY, from_date="2025-01-01", to_date="2025-01-31")
+		done = published[-1]
+		self.assertTrue(done["done"])
+		self.assertEqual(done["data"]["rows"], expected["rows"])
+		self.assertEqual(done["data"]["total"], expected["total"])
+
+		# The assembled payload is cached, so the next request is served at once
+		cached = dashboard_stream.stream_dashboard("test", _COMPANY, _SECTIONS, from_date="2025-01-01", to_date="2025-01-31")
+		self.assertEqual(cached["data"]["total"], 10)
+
+	def test_concurrent_request_joins_running_stream(self):
+		# No last computed payload to serve instead
+		frappe.cache().delete_value(cache_utils.get_last_value_key("test", _COMPANY, "2025-02-01", "2025-02-28"))
+		jobs = []
+		with patch.object(frappe, "enqueue", side_effect=lambda method, queue=None, **kwargs: jobs.append(kwargs)):
+			first = dashboard_stream.stream_dashboard(
+				"test", _COMPANY, _SECTIONS, stream_id="abcdef123456", from_date="2025-02-01", to_date="2025-02-28"
+			)
+			second = dashboard_stream.stream_dashboard(
+				"test", _COMPANY, _SECTIONS, stream_id="fedcba654321", from_date="2025-02-01", to_date="2025-02-28"
+			)
+
+		# Only the first request enqueued section jobs; the second listens to them
+		self.assertEqual(len(jobs), len(_SECTIONS))
+		self.assertEqual(second["stream_id"], first["stream_id"])
+
+		published = []
+		with patch.object(
+			frappe, "publish_realtime", side_effect=lambda event, message, user=None: published.append(message)
+		):
+			for job in jobs:
+				dashboard_stream.run_stream_section(**job)
+
+		self.assertTrue(published[-1]["done"])
+		# The rebuild lock is released once the stream is done
+		cache_key = cache_utils.get_versioned_cache_key("test", _COMPANY, "2025-02-01", "2025-02-28")
+		token = cache_utils.acquire_rebuild_lock(cache_key)
+		self.assertTrue(token)
+		cache_utils.release_rebuild_lock(cache_key, token)
+
+	def test_follower_sees_stream_finished_before_it_listened(self):
+		kwargs = {"from_date": "2025-03-01", "to_date": "2025-03-31"}
+		frappe.cache().delete_value(cache_utils.get_last_value_key("test", _COMPANY, *kwargs.values()))
+		with patch.object(frappe, "enqueue", side_effect=lambda method, queue=None, **job: None):
+			leader = dashboard_stream.stream_dashboard("test", _COMPANY, _SECTIONS, **kwargs)
+
+		# The stream lands in Redis after the follower missed on the key, before it listens
+		cache_key = cache_utils.get_versioned_cache_key("test", _COMPANY, *kwargs.values())
+		real_add_listener = dashboard_stream._add_listener
+
+		def add_listener(stream_id, user):
+			real_add_listener(stream_id, user)
+			frappe.cache().set(frappe.cache().make_key(cache_key), pickle.dumps({"total": 10}))
+			frappe.local.cache[frappe.cache().make_key(cache_key)] = None
+
+		with patch.object(dashboard_stream, "_add_listener", side_effect=add_listener):
+			follower = dashboard_stream.stream_dashboard("test", _COMPANY, _SECTIONS, **kwargs)
+
+		self.assertEqual(follower, {"data": {"total": 10}})
+
+		stream = frappe.cache().get_value(dashboard_stream._stream_key(leader["stream_id"]))
+		dashboard_stream._end_stream(leader["stream_id"], cache_key, stream["lock"])
+		frappe.cache().delete_value(cache_key)
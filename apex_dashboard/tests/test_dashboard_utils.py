@@ -33,3 +33,6 @@ class TestDashboardUtils(FrappeTestCase):
 		balances = utils.get_balances_for_accounts([])
 		self.assertEqual(balances, [])
 
+	def test_get_balances_for_groups_keeps_every_group(self):
+		balances = utils.get_balances_for_groups({"empty": [], "missing": ["_Test Apex Missing Account"]})
+		self.assertEqual(balances, {"empty": [], "missing": []})
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from apex_dashboard import equity_partners
+from apex_dashboard.account_tree import get_accounts
+from apex_dashboard.api.equity_v2 import get_partner_equity
+
+_COMPANY = "_Test Company"
+
+
+def _ensure_equity_account(account_name):
+	abbr = frappe.get_cached_value("Company", _COMPANY, "abbr")
+	name = f"{account_name} - {abbr}"
+	if not frappe.db.exists("Account", name):
+		parent = get_accounts(_COMPANY, root_type="Equity", is_group=1)[0].name
+		frappe.get_doc(
+			{
+				"doctype": "Account",
+				"account_name": account_name,
+				"parent_account": parent,
+				"company": _COMPANY,
+				"is_group": 0,
+			}
+		).insert(ignore_permissions=True)
+	return name
+
+
+class TestEquityPartners(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls.capital = _ensure_equity_account("Partner Test Capital")
+		cls.drawings = _ensure_equity_account("Partner Test Drawings")
+		cls.other = _ensure_equity_account("Unmatched Withdrawal")
+
+	def setUp(self):
+		# delete_doc also removes the partner's rule rows
+		frappe.delete_doc("Apex Equity Partner", "_Test Partner", force=1, ignore_missing=True)
+		equity_partners.clear_partner_maps()
+
+	def test_rules_are_compiled(self):
+		frappe.get_doc(
+			{
+				"doctype": "Apex Equity Partner",
+				"partner_name": "_Test Partner",
+				"rules": [
+					{"account_name_contains": "Partner Test"},
+					{"account": self.drawings, "role": "Withdrawal"},
+				],
+			}
+		).insert()
+
+		partner_map = equity_partners.get_partner_map(_COMPANY)
+		self.assertEqual(partner_map[self.capital], ("_Test Partner", "capital"))
+		# Listed accounts win over patterns, with the role of their rule
+		self.assertEqual(partner_map[self.drawings], ("_Test Partner", "withdrawal"))
+		self.assertEqual(partner_map[self.other], (None, "withdrawal"))
+
+	def test_map_is_refreshed_on_rule_change(self):
+		self.assertEqual(equity_partners.get_partner_map(_COMPANY)[self.capital][0], None)
+
+		partner = frappe.get_doc(
+			{
+				"doctype": "Apex Equity Partner",
+				"partner_name": "_Test Partner",
+				"rules": [{"account": self.capital}],
+			}
+		).insert()
+		self.assertEqual(equity_partners.get_partner_map(_COMPANY)[self.capital][0], "_Test Partner")
+
+		partner.enabled = 0
+		partner.save()
+		self.assertEqual(equity_partners.get_partner_map(_COMPANY)[self.capital][0], None)
+
+	def test_partner_equity_groups_balances(self):
+		frappe.get_doc(
+			{
+				"doctype": "Apex Equity Partner",
+				"partner_name": "_Test Partner",
+				"rules": [
+					{"account": self.capital},
+					{"account": self.drawings, "role": "Withdrawal"},
+				],
+			}
+		).insert()
+
+		def balance(name, account_name, amount):
+			return frappe._dict(name=name, account_name=account_name, balance=amount)
+
+		partners, retained_earnings = get_partner_equity(
+			_COMPANY,
+			[
+				balance(self.capital, "Partner Test Capital", 1000),
+				balance(self.drawings, "Partner Test Drawings", -300),
+				balance(self.other, "Unmatched Withdrawal", -50),
+				balance("Retained Earnings - _TC", "Retained Earnings", 700),
+				balance("Profit and Loss - _TC", "Profit and Loss", 90),
+			],
+		)
+
+		self.assertEqual(retained_earnings, 700)
+		by_name = {partner["name"]: partner for partner in partners}
+		self.assertEqual(sorted(by_name), ["Other", "_Test Partner"])
+
+		partner = by_name["_Test Partner"]
+		self.assertEqual((partner["capital"], partner["withdrawals"], partner["net_equity"]), (1000, -300, 700))
+		self.assertEqual(partner["withdrawal_accounts"], [self.drawings])
+		# Unmatched accounts go to Other, with the role their name implies
+		self.assertEqual((by_name["Other"]["withdrawals"], by_name["Other"]["net_equity"]), (-50, -50))
+
+	def test_rule_needs_account_or_pattern(self):
+		partner = frappe.get_doc({"doctype": "Apex Equity Partner", "partner_name": "_Test Partner", "rules": [{}]})
+		self.assertRaises(frappe.ValidationError, partner.insert)
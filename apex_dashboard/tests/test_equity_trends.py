@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import flt, get_last_day, getdate
+
+from apex_dashboard import gl_snapshot
+from apex_dashboard.api.finance_api import get_equity_trends
+
+_COMPANY = "_Test Company"
+
+
+def _equity_at(month_end):
+	return flt(
+		frappe.db.sql(
+			"""
+			SELECT SUM(gl.credit - gl.debit)
+			FROM `tabGL Entry` gl
+			JOIN `tabAccount` acc ON gl.account = acc.name
+			WHERE gl.company = %s AND gl.is_cancelled = 0
+				AND acc.root_type = 'Equity' AND gl.posting_date <= %s
+			""",
+			(_COMPANY, month_end),
+		)[0][0]
+	)
+
+
+class TestEquityTrends(FrappeTestCase):
+	def test_running_totals_match_month_end_balances(self):
+		gl_snapshot.rebuild_gl_snapshot()
+		for snapshot_ready in (True, False):
+			with self.subTest(snapshot_ready=snapshot_ready), patch.object(
+				gl_snapshot, "is_gl_snapshot_ready", return_value=snapshot_ready
+			):
+				trends = get_equity_trends(_COMPANY, months="all")
+				values = trends["datasets"][0]["values"]
+
+				self.assertEqual(len(values), len(trends["labels"]))
+				for label, value in zip(trends["labels"], values, strict=True):
+					month_end = get_last_day(getdate(f"01 {label}"))
+					self.assertAlmostEqual(value, _equity_at(month_end), places=2)
+
+	def test_window_length(self):
+		trends = get_equity_trends(_COMPANY, months=12)
+
+		# Twelve months before the current one, and the current one
+		self.assertEqual(len(trends["labels"]), 13)
+
+	def test_all_starts_at_first_transaction(self):
+		first_posting = frappe.db.sql("SELECT MIN(posting_date) FROM `tabGL Entry` WHERE company = %s", _COMPANY)[0][0]
+		trends = get_equity_trends(_COMPANY, months="all")
+
+		self.assertEqual(trends["labels"][0], getdate(first_posting).strftime("%b %Y"))
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import flt, getdate
+
+from apex_dashboard.api import equity_v2
+
+_COMPANY = "_Test Company"
+
+
+def _sum(root_types, condition="", values=()):
+	return flt(
+		frappe.db.sql(
+			f"""
+			SELECT SUM(gl.credit - gl.debit)
+			FROM `tabGL Entry` gl
+			JOIN `tabAccount` acc ON gl.account = acc.name
+			WHERE gl.company = %s AND gl.is_cancelled = 0 AND acc.root_type IN %s {condition}
+			""",
+			(_COMPANY, root_types, *values),
+		)[0][0]
+	)
+
+
+class TestEquityV2(FrappeTestCase):
+	def test_one_pass_totals_match_separate_queries(self):
+		from_date, to_date = getdate("2020-01-01"), getdate("2030-12-31")
+		totals = equity_v2.get_equity_totals(_COMPANY, from_date, to_date)
+
+		self.assertAlmostEqual(
+			totals.total_equity, _sum(("Equity",), "AND gl.posting_date <= %s", (to_date,)), places=2
+		)
+		self.assertAlmostEqual(
+			totals.ytd_profit,
+			_sum(
+				("Income", "Expense"),
+				"AND gl.voucher_type != 'Period Closing Voucher' AND gl.posting_date BETWEEN %s AND %s",
+				(from_date, to_date),
+			),
+			places=2,
+		)
+		for row in totals.yearly_profits:
+			self.assertAlmostEqual(
+				row["profit"],
+				_sum(
+					("Income", "Expense"),
+					"AND gl.voucher_type != 'Period Closing Voucher' AND YEAR(gl.posting_date) = %s",
+					(row["year"],),
+				),
+				places=2,
+			)
+		years = [row["year"] for row in totals.yearly_profits]
+		self.assertEqual(years, sorted(years, reverse=True))
+
+	def test_recent_withdrawals_are_capped_per_account(self):
+		accounts = frappe.get_all("Account", filters={"company": _COMPANY, "is_group": 0}, pluck="name")
+		withdrawals = equity_v2.get_recent_withdrawals(_COMPANY, accounts, limit=2)
+
+		for account in accounts:
+			self.assertLessEqual(len([row for row in withdrawals if row.account == account]), 2)
+		self.assertEqual(equity_v2.get_recent_withdrawals(_COMPANY, []), [])
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from apex_dashboard import exchange_rates
+
+_FIXTURE_PROVIDER = "apex_dashboard.exchange_rates.fixture_provider"
+
+
+class TestExchangeRates(FrappeTestCase):
+	def setUp(self):
+		exchange_rates.clear_rates_cache()
+		self.addCleanup(exchange_rates.clear_rates_cache)
+
+	def test_refresh_stores_provider_rates(self):
+		with patch.dict(frappe.conf, {"apex_dashboard_rate_provider": _FIXTURE_PROVIDER}):
+			exchange_rates.refresh_rates()
+
+		rates = exchange_rates.rates_for(["USD", "EUR", "EGP"])
+		self.assertEqual(rates, {"USD": 48.5, "EUR": 52.75, "EGP": 1.0})
+
+	def test_cold_cache_does_not_call_provider_inline(self):
+		def provider(base_currency):
+			raise AssertionError("the provider must only run in the background job")
+
+		with patch.object(exchange_rates, "get_provider", return_value=provider), patch("frappe.enqueue") as enqueue:
+			rates = exchange_rates.rates_for(["USD"])
+
+		self.assertIn("USD", rates)
+		enqueue.assert_called_once()
+		self.assertEqual(enqueue.call_args.args[0], "apex_dashboard.exchange_rates.refresh_rates")
+
+		from apex_dashboard.cache_utils import release_rebuild_lock
+
+		release_rebuild_lock(exchange_rates.RATES_CACHE_KEY, enqueue.call_args.kwargs["lock"])
+
+	def test_enqueued_refresh_uses_the_overridden_provider(self):
+		with patch.dict(frappe.conf, {"apex_dashboard_rate_provider": _FIXTURE_PROVIDER}), patch(
+			"frappe.enqueue"
+		) as enqueue:
+			exchange_rates.get_rates()
+
+		job = enqueue.call_args.kwargs
+		self.assertEqual(job["provider"], _FIXTURE_PROVIDER)
+
+		# The job runs in a worker without the override
+		exchange_rates.refresh_rates(**job)
+		self.assertEqual(exchange_rates.get_rates()["USD"], 48.5)
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import frappe
+from erpnext.accounts.utils import get_fiscal_year as erpnext_get_fiscal_year
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import nowdate
+
+from apex_dashboard import fiscal_calendar
+
+_COMPANY = "_Test Company"
+
+
+class TestFiscalCalendar(FrappeTestCase):
+	def setUp(self):
+		fiscal_calendar.clear_fiscal_calendars()
+
+	def test_matches_erpnext(self):
+		name, year_start, year_end = erpnext_get_fiscal_year(nowdate(), company=_COMPANY)[:3]
+		fiscal_year = fiscal_calendar.get_fiscal_year(nowdate(), _COMPANY)
+
+		self.assertEqual((fiscal_year.name, fiscal_year.year_start_date, fiscal_year.year_end_date), (name, year_start, year_end))
+		self.assertEqual(fiscal_calendar.get_fiscal_year_start(nowdate(), _COMPANY), year_start)
+
+	def test_calendar_is_cached(self):
+		fiscal_calendar.get_fiscal_calendar(_COMPANY)
+
+		with self.assertQueryCount(0):
+			fiscal_calendar.get_fiscal_year(nowdate(), _COMPANY)
+
+	def test_date_outside_calendar(self):
+		self.assertIsNone(fiscal_calendar.get_fiscal_year("1900-06-30", _COMPANY))
+		self.assertEqual(fiscal_calendar.get_fiscal_year_start("1900-06-30", _COMPANY, default="x"), "x")
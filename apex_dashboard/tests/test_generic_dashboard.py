@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import flt, today
+
+from apex_dashboard.apex_dashboard.page.generic_dashboard.generic_dashboard import get_card_account_balances
+
+
+class TestGenericDashboard(FrappeTestCase):
+	def test_group_card_sums_its_subtree(self):
+		company = frappe.get_all("Company", pluck="name", limit=1)[0]
+		group = frappe.get_all(
+			"Account", filters={"company": company, "is_group": 1, "parent_account": ["is", "not set"]}, fields=["name", "lft", "rgt"], limit=1
+		)[0]
+
+		expected = frappe.db.sql("""
+			SELECT SUM(gle.debit) - SUM(gle.credit)
+			FROM `tabGL Entry` gle
+			JOIN `tabAccount` acc ON acc.name = gle.account
+			WHERE acc.lft > %s AND acc.rgt < %s
+				AND gle.company = %s AND gle.posting_date <= %s AND gle.is_cancelled = 0
+		""", (group.lft, group.rgt, company, today()))[0][0]
+
+		balances = get_card_account_balances([group.name], company, today())
+		self.assertAlmostEqual(balances[group.name], flt(expected), places=2)
+
+	def test_account_of_other_company_is_zero(self):
+		other = frappe.db.sql("""
+			SELECT gle.account, gle.company, SUM(gle.debit) - SUM(gle.credit) AS balance
+			FROM `tabGL Entry` gle
+			WHERE gle.company != %s AND gle.posting_date <= %s AND gle.is_cancelled = 0
+			GROUP BY gle.account, gle.company
+			HAVING balance != 0
+			LIMIT 1
+		""", ("_Test Company", today()), as_dict=True)
+		if not other:
+			self.skipTest("No other company with a GL balance")
+		other = other[0]
+
+		# The account counts for its own company and never leaks into another one
+		balances = get_card_account_balances([other.account], other.company, today())
+		self.assertAlmostEqual(balances[other.account], flt(other.balance), places=2)
+		self.assertEqual(get_card_account_balances([other.account], "_Test Company", today()), {other.account: 0.0})
+
+	def test_missing_account_is_zero(self):
+		self.assertEqual(get_card_account_balances(["_Test Missing Account"], "_Test Company", today()), {"_Test Missing Account": 0.0})
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from apex_dashboard import metrics
+
+
+@metrics.instrument_endpoint
+def _endpoint(queries=2):
+	for _i in range(queries):
+		frappe.db.sql("SELECT 1")
+	metrics.note_cache_result("miss")
+	return {"total": 1}
+
+
+class TestMetrics(FrappeTestCase):
+	def setUp(self):
+		metrics.reset_dashboard_metrics()
+
+	def get_row(self):
+		rows = {row["endpoint"]: row for row in metrics.get_dashboard_metrics(window=3600)}
+		return rows.get("test_metrics._endpoint")
+
+	def test_call_is_recorded(self):
+		self.assertEqual(_endpoint(queries=3), {"total": 1})
+		_endpoint(queries=1)
+
+		row = self.get_row()
+		self.assertEqual(row["calls"], 2)
+		self.assertEqual(row["avg_queries"], 2)
+		self.assertEqual(row["avg_rows"], 2)
+		self.assertEqual(row["cache"]["miss"], 2)
+		self.assertEqual(row["hit_rate"], 0)
+		self.assertGreater(row["avg_bytes"], 0)
+		# frappe.db.sql is restored after the call
+		self.assertNotIn("sql", vars(frappe.db))
+
+	def test_warm_up_is_not_recorded(self):
+		frappe.flags.apex_dashboard_warming = True
+		try:
+			_endpoint()
+		finally:
+			frappe.flags.apex_dashboard_warming = False
+
+		self.assertIsNone(self.get_row())
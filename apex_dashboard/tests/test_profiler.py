@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import os
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from apex_dashboard import metrics, profiler
+
+
+@metrics.instrument_endpoint
+def _endpoint():
+	frappe.db.sql("SELECT 1")
+	frappe.db.sql("SELECT 2")
+	return {"total": 1}
+
+
+class TestProfiler(FrappeTestCase):
+	def setUp(self):
+		profiler.prune_profiles(retention=0)
+
+	def tearDown(self):
+		profiler.disable_profiling()
+		profiler.prune_profiles(retention=0)
+
+	def test_calls_are_not_profiled_by_default(self):
+		_endpoint()
+
+		self.assertEqual(profiler.get_profiles(), [])
+
+	def test_profiled_call(self):
+		profiler.enable_profiling(minutes=5)
+		self.assertIn(frappe.session.user, profiler.get_profiling_users())
+
+		self.assertEqual(_endpoint(), {"total": 1})
+
+		profiles = profiler.get_profiles()
+		self.assertEqual(len(profiles), 1)
+		self.assertEqual(profiles[0]["endpoint"], "test_profiler._endpoint")
+		self.assertEqual(profiles[0]["statements"], 2)
+
+		record = profiler.get_profile(profiles[0]["id"])
+		self.assertEqual([statement["query"] for statement in record["sql_timeline"]], ["SELECT 1", "SELECT 2"])
+		self.assertTrue(os.path.exists(os.path.join(profiler.get_profiles_path(), record["artifact"])))
+
+	def test_prune_profiles(self):
+		profiler.enable_profiling(minutes=5)
+		for _i in range(3):
+			_endpoint()
+
+		profiler.prune_profiles(retention=1)
+
+		self.assertEqual(len(profiler.get_profiles()), 1)
+		self.assertEqual(len(os.listdir(profiler.get_profiles_path())), 2)
+
+	def test_invalid_profile_id(self):
+		self.assertRaises(frappe.ValidationError, profiler.get_profile, "../../site_config")
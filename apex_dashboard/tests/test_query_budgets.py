@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from apex_dashboard import benchmark, exchange_rates, yearly_profits
+from apex_dashboard.account_tree import clear_account_tree, get_accounts
+from apex_dashboard.dashboard_registry import CARD_DASHBOARDS
+from apex_dashboard.gl_snapshot import SNAPSHOT_DOCTYPE
+from apex_dashboard.metrics import capture_call
+from apex_dashboard.synthetic_data import NAME_PREFIX, delete_synthetic_ledger, generate_synthetic_ledger
+
+# Most SQL statements a cold call (dashboard caches dropped) may issue,
+# whatever the size of the ledger or the chart of accounts
+QUERY_BUDGETS = {
+	"liquidity": 4,
+	"profitability": 3,
+	"suppliers": 6,
+	"expense": 4,
+	# One query per item group section
+	"inventory": 9,
+	# Both equity endpoints run the equity engine: one conditional-aggregation
+	# pass, the frozen yearly profits, one windowed withdrawals query, and the
+	# partner rules, account tree and fiscal calendar behind the cached lookups
+	"equity_enhanced": 6,
+	"equity_v2": 6,
+	# One grouped scan of the equity movements, whatever the window
+	# (months="all" adds the lookup of the first posting date)
+	"equity_trends": 1,
+	**{dashboard_type: 5 for dashboard_type, _page in CARD_DASHBOARDS},
+}
+PERIOD = "All Time"
+
+_SMALL = "_Test Apex Budget Small"
+_LARGE = "_Test Apex Budget Large"
+# Ledgers added to the large company, so per-account queries show up
+_EXTRA_ACCOUNTS = 15
+
+
+def _ensure_ledger(company, size):
+	if not frappe.db.exists("GL Entry", {"company": company, "name": ["like", f"{NAME_PREFIX}-%"]}):
+		generate_synthetic_ledger(size=size, company=company, years=2)
+
+
+def _add_extra_accounts(company):
+	abbr = frappe.get_cached_value("Company", company, "abbr")
+	clear_account_tree()
+	parents = {
+		"Bank": get_accounts(company, account_type="Bank", is_group=1)[0].name,
+		"Expense": get_accounts(company, root_type="Expense", is_group=1)[-1].name,
+		"Equity": next(acc for acc in get_accounts(company, root_type="Equity", is_group=1) if not acc.parent_account).name,
+	}
+	for label, parent in parents.items():
+		for number in range(_EXTRA_ACCOUNTS):
+			account_name = f"Budget {label} {number:02d}"
+			if frappe.db.exists("Account", f"{account_name} - {abbr}"):
+				continue
+			frappe.get_doc(
+				{
+					"doctype": "Account",
+					"account_name": account_name,
+					"parent_account": parent,
+					"company": company,
+					"is_group": 0,
+					"account_type": "Bank" if label == "Bank" else None,
+				}
+			).insert(ignore_permissions=True)
+	clear_account_tree()
+
+
+def count_queries(method, company, takes_period):
+	"""Issue a cold call of an endpoint and return its captured call (queries, statements)"""
+	function = frappe.get_attr(method)
+	kwargs = {"company": company, "period": PERIOD} if takes_period else {"company": company}
+
+	# Warm what lives outside the dashboard caches (defaults, cached docs, meta)
+	function(**kwargs)
+	benchmark.reset_dashboard_caches()
+
+	with capture_call(record_statements=True) as call:
+		function(**kwargs)
+	return call
+
+
+class TestQueryBudgets(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		frappe.local.conf.apex_dashboard_rate_provider = "apex_dashboard.exchange_rates.fixture_provider"
+		exchange_rates.clear_rates_cache()
+		exchange_rates.refresh_rates()
+
+		_ensure_ledger(_SMALL, 1000)
+		_ensure_ledger(_LARGE, 6000)
+		_add_extra_accounts(_LARGE)
+		# Closed years are frozen by the daily job on a live site
+		for company in (_SMALL, _LARGE):
+			yearly_profits.freeze_yearly_profits(company)
+
+	@classmethod
+	def tearDownClass(cls):
+		# The extra accounts were never committed, the generated ledgers were
+		frappe.db.rollback()
+		for company in (_SMALL, _LARGE):
+			delete_synthetic_ledger(company)
+			frappe.db.delete(SNAPSHOT_DOCTYPE, {"company": company})
+			frappe.db.delete(yearly_profits.YEARLY_PROFIT_DOCTYPE, {"company": company})
+			frappe.delete_doc("Company", company, force=1, ignore_permissions=True)
+		frappe.db.commit()
+		super().tearDownClass()
+
+	def test_every_endpoint_has_a_budget(self):
+		missing = [name for name, _method, _period in benchmark.get_benchmark_endpoints() if name not in QUERY_BUDGETS]
+		self.assertEqual(missing, [])
+
+	def test_endpoints_stay_within_budget(self):
+		for name, method, takes_period in benchmark.get_benchmark_endpoints():
+			with self.subTest(endpoint=name):
+				small = count_queries(method, _SMALL, takes_period)
+				large = count_queries(method, _LARGE, takes_period)
+
+				self.assertLessEqual(
+					large.queries,
+					QUERY_BUDGETS[name],
+					f"{name} issued {large.queries} queries:\n" + "\n".join(statement.query for statement in large.statements),
+				)
+				# A bigger ledger and chart of accounts must not mean more queries
+				self.assertLessEqual(
+					large.queries,
+					small.queries,
+					f"{name} issued {small.queries} queries for {_SMALL} but {large.queries} for {_LARGE}",
+				)
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import flt
+
+from apex_dashboard import yearly_profits
+
+_COMPANY = "_Test Company"
+
+
+def _profits_from_gl():
+	return {
+		row.year: flt(row.profit)
+		for row in frappe.db.sql(
+			"""
+			SELECT YEAR(gl.posting_date) as year, SUM(gl.credit - gl.debit) as profit
+			FROM `tabGL Entry` gl
+			JOIN `tabAccount` acc ON gl.account = acc.name
+			WHERE gl.company = %s AND gl.is_cancelled = 0
+				AND gl.voucher_type != 'Period Closing Voucher'
+				AND acc.root_type IN ('Income', 'Expense')
+			GROUP BY YEAR(gl.posting_date)
+			""",
+			_COMPANY,
+			as_dict=True,
+		)
+	}
+
+
+def _profit_account():
+	return frappe.db.get_value("Account", {"company": _COMPANY, "root_type": "Income", "is_group": 0})
+
+
+class TestYearlyProfits(FrappeTestCase):
+	def setUp(self):
+		frappe.db.delete(yearly_profits.YEARLY_PROFIT_DOCTYPE, {"company": _COMPANY})
+		self.jobs = []
+		enqueue = patch(
+			"frappe.enqueue",
+			side_effect=lambda method, queue=None, job_id=None, deduplicate=False, **kwargs: self.jobs.append(kwargs),
+		)
+		enqueue.start()
+		self.addCleanup(enqueue.stop)
+
+	def get_profits(self):
+		return {row["year"]: row["profit"] for row in yearly_profits.get_yearly_profits(_COMPANY)}
+
+	def run_jobs(self):
+		for job in self.jobs:
+			yearly_profits.freeze_yearly_profits(**job)
+		self.jobs = []
+
+	def get_closed_years(self):
+		open_year = yearly_profits.get_open_years_start(_COMPANY).year
+		closed_years = sorted(year for year in _profits_from_gl() if year < open_year)
+		if not closed_years:
+			self.skipTest("No closed year with Income or Expense entries")
+		return closed_years
+
+	def assertProfitsMatchGL(self, profits):
+		expected = _profits_from_gl()
+		self.assertEqual(sorted(profits), sorted(expected))
+		for year, profit in expected.items():
+			self.assertAlmostEqual(profits[year], profit, places=2)
+
+	def test_profits_match_gl(self):
+		# The first read aggregates the closed years and leaves freezing to a job
+		self.assertProfitsMatchGL(self.get_profits())
+		self.assertEqual(len(self.jobs), 1)
+		self.assertFalse(frappe.db.exists(yearly_profits.YEARLY_PROFIT_DOCTYPE, {"company": _COMPANY}))
+
+		self.run_jobs()
+		self.assertProfitsMatchGL(self.get_profits())
+		self.assertEqual(self.jobs, [])
+
+	def test_stale_year_is_recomputed(self):
+		year = self.get_closed_years()[0]
+		self.get_profits()
+		self.run_jobs()
+		frappe.db.set_value(
+			yearly_profits.YEARLY_PROFIT_DOCTYPE,
+			{"company": _COMPANY, "year": year},
+			{"profit": 0, "is_stale": 1},
+		)
+
+		self.assertAlmostEqual(self.get_profits()[year], _profits_from_gl()[year], places=2)
+		self.run_jobs()
+		self.assertFalse(
+			frappe.db.get_value(yearly_profits.YEARLY_PROFIT_DOCTYPE, {"company": _COMPANY, "year": year}, "is_stale")
+		)
+
+	def test_stale_mark_before_first_freeze(self):
+		# A backdated posting before anything was frozen leaves a lone stale mark
+		year = self.get_closed_years()[-1]
+		yearly_profits.mark_year_stale(frappe._dict(posting_date=f"{year}-06-30", company=_COMPANY, account=_profit_account()))
+
+		self.assertProfitsMatchGL(self.get_profits())
+		self.run_jobs()
+		frozen = frappe.get_all(
+			yearly_profits.YEARLY_PROFIT_DOCTYPE, filters={"company": _COMPANY, "entries": [">", 0]}, pluck="year"
+		)
+		self.assertEqual(sorted(frozen), self.get_closed_years())
@@ -0,0 +1,223 @@
+"""
+Frozen yearly profits for Apex Dashboard
+Keeps the operating profit (Income - Expense, excluding Period Closing
+Vouchers) of closed years in Apex Yearly Profit, so the equity dashboards
+only aggregate the open years from the GL. Years are calendar years, like
+the yearly profit charts; a year is closed once it ends before the
+calendar year in which the company's current fiscal year starts. A closed
+year is recomputed only after a backdated GL entry lands in it. Years are
+frozen by background jobs; a request meanwhile aggregates them from the GL.
+"""
+
+import hashlib
+
+import frappe
+from frappe.utils import add_days, flt, getdate, now, nowdate
+
+from apex_dashboard.fiscal_calendar import get_fiscal_year_start
+
+YEARLY_PROFIT_DOCTYPE = "Apex Yearly Profit"
+PROFIT_ROOT_TYPES = ("Income", "Expense")
+# Longest a freeze of one company may run before another one can start
+FREEZE_LOCK_TIMEOUT = 30 * 60
+
+def mark_year_stale(doc, method=None):
+    """
+    Mark the frozen profit of a closed year stale when a GL entry lands in it
+    Runs inside the posting transaction, so the mark rolls back with it.
+    Reversal entries of a cancellation are submitted too, so cancelling a
+    backdated voucher marks its year as well.
+    This function is used as a GL Entry on_submit hook.
+    Args:
+        doc: GL Entry document (passed by Frappe hooks)
+        method: Method name (passed by Frappe hooks, not used)
+    """
+    year = getdate(doc.posting_date).year
+    # The current calendar year is never frozen
+    if year >= getdate(nowdate()).year:
+        return
+    if frappe.get_cached_value("Account", doc.account, "root_type") not in PROFIT_ROOT_TYPES:
+        return
+
+    timestamp = now()
+    user = frappe.session.user
+    frappe.db.sql(f"""
+        INSERT INTO `tab{YEARLY_PROFIT_DOCTYPE}`
+            (name, creation, modified, owner, modified_by, company, year, profit, entries, is_stale)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, 0, 0, 1)
+        ON DUPLICATE KEY UPDATE is_stale = 1, modified = VALUES(modified)
+    """, (_row_name(doc.company, year), timestamp, timestamp, user, user, doc.company, year))
+
+def get_open_years_start(company):
+    """
+    First day of the first open year of a company
+    That is January 1st of the calendar year in which the current fiscal
+    year starts; earlier years are closed.
+    """
+    year_start = get_fiscal_year_start(nowdate(), company, default=nowdate())
+    return getdate(f"{getdate(year_start).year}-01-01")
+
+def get_yearly_profits(company, open_profits=None):
+    """
+    Operating profit per calendar year, closed years from the frozen table
+    Args:
+        company: Company name
+        open_profits: {year: profit} of the open years when the caller has
+            aggregated them already (see get_open_years_start); read from
+            the GL otherwise
+    Returns:
+        list: Dicts with year and profit, newest year first; years without
+            Income or Expense entries are left out
+    """
+    open_from = get_open_years_start(company)
+    profits = get_frozen_profits(company, open_from)
+
+    if open_profits is None:
+        open_profits = {row.year: row.profit for row in _aggregate_profits(company, from_date=open_from)}
+    profits.update({year: flt(profit) for year, profit in open_profits.items() if year >= open_from.year})
+
+    return [{"year": year, "profit": profit} for year, profit in sorted(profits.items(), reverse=True)]
+
+def get_frozen_profits(company, open_from):
+    """
+    Profit of the closed years (before open_from)
+    Missing or stale years are aggregated from the GL for this request and
+    frozen by a background job, so reading a dashboard never writes.
+    Returns:
+        dict: {year: profit} of the closed years with Income or Expense entries
+    """
+    rows = _get_frozen_rows(company, open_from)
+    first_year = _first_outdated_year(rows, open_from)
+
+    profits = {row.year: flt(row.profit) for row in rows if row.entries and not row.is_stale}
+    if first_year is None:
+        return profits
+
+    enqueue_yearly_profits_freeze(company)
+    profits = {year: profit for year, profit in profits.items() if year < first_year}
+    from_date = getdate(f"{first_year}-01-01") if first_year else None
+    for row in _aggregate_profits(company, from_date, add_days(open_from, -1)):
+        profits[row.year] = flt(row.profit)
+    return profits
+
+def enqueue_yearly_profits_freeze(company):
+    """
+    Freeze the outdated closed years of a company in the background
+    A job already queued or running for the company is not queued again.
+    """
+    frappe.enqueue(
+        "apex_dashboard.yearly_profits.freeze_yearly_profits",
+        queue="long",
+        job_id=f"apex_dashboard:freeze_yearly_profits:{company}",
+        deduplicate=True,
+        company=company,
+    )
+
+def freeze_yearly_profits(company=None):
+    """
+    Background job: freeze the missing and stale closed years
+    Enqueued by get_frozen_profits, and daily from the scheduler for every
+    company so years that close are frozen before anyone reads them.
+    Args:
+        company: Company name, None for every company
+    """
+    from apex_dashboard.cache_utils import acquire_rebuild_lock, release_rebuild_lock
+
+    companies = [company] if company else frappe.get_all("Company", pluck="name")
+    for name in companies:
+        # Taken when the freeze starts, so queue time does not count against it
+        lock = acquire_rebuild_lock(_freeze_lock_key(name), timeout=FREEZE_LOCK_TIMEOUT)
+        if not lock:
+            # The daily job and a company's own job overlap
+            continue
+
+        try:
+            open_from = get_open_years_start(name)
+            first_year = _first_outdated_year(_get_frozen_rows(name, open_from), open_from)
+            if first_year is not None:
+                freeze_years(name, open_from, first_year)
+        finally:
+            release_rebuild_lock(_freeze_lock_key(name), lock)
+
+def freeze_years(company, open_from, first_year=None):
+    """
+    Recompute and store the profit of closed years from first_year on
+    Args:
+        company: Company name
+        open_from: First day of the first open year (see get_open_years_start)
+        first_year: First year to recompute, None for the whole history
+    """
+    from_date = getdate(f"{first_year}-01-01") if first_year else None
+    totals = {row.year: row for row in _aggregate_profits(company, from_date, add_days(open_from, -1))}
+
+    # With no closed year at all, an empty row for the last one still records
+    # that the history was frozen
+    first_year = first_year or min(totals, default=open_from.year - 1)
+    timestamp = now()
+    user = frappe.session.user
+    values = []
+    for year in range(first_year, open_from.year):
+        row = totals.get(year) or frappe._dict(profit=0, entries=0)
+        values.append((
+            _row_name(company, year), timestamp, timestamp, user, user,
+            company, year, flt(row.profit), row.entries, 0,
+        ))
+
+    placeholders = ", ".join(["(" + ", ".join(["%s"] * len(values[0])) + ")"] * len(values))
+    frappe.db.sql(f"""
+        INSERT INTO `tab{YEARLY_PROFIT_DOCTYPE}`
+            (name, creation, modified, owner, modified_by, company, year, profit, entries, is_stale)
+        VALUES {placeholders}
+        ON DUPLICATE KEY UPDATE profit = VALUES(profit), entries = VALUES(entries),
+            is_stale = 0, modified = VALUES(modified)
+    """, [value for row in values for value in row])
+
+def _get_frozen_rows(company, open_from):
+    return frappe.get_all(
+        YEARLY_PROFIT_DOCTYPE,
+        filters={"company": company, "year": ["<", open_from.year]},
+        fields=["year", "profit", "entries", "is_stale"],
+    )
+
+def _first_outdated_year(rows, open_from):
+    """
+    First closed year to recompute: 0 for the whole history, None when every
+    closed year is frozen and up to date
+    """
+    # Rows are stale marks only until the first freeze (see mark_year_stale);
+    # the years before them were never frozen
+    if all(row.is_stale for row in rows):
+        return 0
+
+    # Every closed year from the first one stored has a row, with no entries
+    # if nothing was posted to it; newly closed years have none yet
+    stored = {row.year for row in rows}
+    outdated = [row.year for row in rows if row.is_stale]
+    outdated += [year for year in range(min(stored), open_from.year) if year not in stored]
+    return min(outdated) if outdated else None
+
+def _aggregate_profits(company, from_date=None, to_date=None):
+    """Operating profit and entry count per calendar year, from the GL"""
+    conditions = []
+    if from_date:
+        conditions.append("AND gl.posting_date >= %(from_date)s")
+    if to_date:
+        conditions.append("AND gl.posting_date <= %(to_date)s")
+
+    return frappe.db.sql(f"""
+        SELECT YEAR(gl.posting_date) as year, SUM(gl.credit - gl.debit) as profit, COUNT(*) as entries
+        FROM `tabGL Entry` gl
+        JOIN `tabAccount` acc ON gl.account = acc.name
+        WHERE gl.company = %(company)s
+        AND gl.is_cancelled = 0
+        AND gl.voucher_type != 'Period Closing Voucher'
+        AND acc.root_type IN %(root_types)s
+        {" ".join(conditions)}
+        GROUP BY YEAR(gl.posting_date)
+    """, {"company": company, "root_types": PROFIT_ROOT_TYPES, "from_date": from_date, "to_date": to_date}, as_dict=True)
+
+def _row_name(company, year):
+    return hashlib.md5(f"{company}|{year}".encode()).hexdigest()
+
+def _freeze_lock_key(company):
+    return f"apex_dashboard:yearly_profit_freeze:{company}"